@@ -0,0 +1,118 @@
+DEFAULT_MIN_BATCH_SIZE = 1000
+DEFAULT_MAX_BATCH_SIZE = 100000
+DEFAULT_INITIAL_BATCH_SIZE = 10000
+# Approximate size of parameters sent with a batch
+DEFAULT_TARGET_BYTES = 16 * 1024 * 1024
+# Target duration of running and committing a batch
+DEFAULT_TARGET_SECONDS = 5.0
+# Row size is re-estimated every SAMPLE_INTERVAL rows
+SAMPLE_INTERVAL = 100
+# Batch size is adjusted only if duration is out of [target / TOLERANCE, target * TOLERANCE]
+TOLERANCE = 1.5
+# Max factor batch size grows by after one commit
+MAX_GROWTH = 2.0
+MEMORY_ERROR_CODES = ['MemoryPoolOutOfMemoryError', 'TransactionMemoryLimit', 'OutOfMemoryError']
+MEMORY_ERROR_MESSAGES = ['memory limit', 'out of memory']
+
+
+def estimate_row_bytes(obj):
+    """
+    Approximate size of a row sent as a query parameter
+    """
+    size = 0
+    for key, value in obj.items():
+        size += len(str(key)) + len(str(value))
+    return size
+
+
+def is_memory_error(error):
+    """
+    Check if a database error is caused by transaction or server memory limits, on Neo4j or Memgraph
+    """
+    code = getattr(error, 'code', None) or ''
+    if any(name in code for name in MEMORY_ERROR_CODES):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in MEMORY_ERROR_MESSAGES)
+
+
+class AdaptiveBatcher:
+    """
+    Decide batch sizes of a data file. A batch is full when it reaches current batch size or target payload size,
+    batch size grows when batches commit faster than target duration, and shrinks when they are slower or hit
+    memory limits. Batch size is always between min_size and max_size
+    """
+    def __init__(self, min_size=None, max_size=None, target_bytes=None, target_seconds=None,
+                 initial_size=DEFAULT_INITIAL_BATCH_SIZE):
+        self.min_size = max(1, min_size or DEFAULT_MIN_BATCH_SIZE)
+        self.max_size = max(self.min_size, max_size or DEFAULT_MAX_BATCH_SIZE)
+        self.target_bytes = target_bytes or DEFAULT_TARGET_BYTES
+        self.target_seconds = target_seconds or DEFAULT_TARGET_SECONDS
+        self.size = self._bound(initial_size)
+        self.row_bytes = 0
+        self.rows = 0
+
+    def _bound(self, size):
+        return int(min(self.max_size, max(self.min_size, size)))
+
+    def add(self, obj):
+        """
+        Count a row added to current batch
+        :param obj: row
+        :return: True if current batch is full
+        """
+        if self.rows % SAMPLE_INTERVAL == 0:
+            self.row_bytes = estimate_row_bytes(obj)
+        self.rows += 1
+        return self.is_full()
+
+    def is_full(self):
+        return self.rows >= self.size or self.rows * self.row_bytes >= self.target_bytes
+
+    def next_batch(self):
+        """
+        Start counting rows of a new batch
+        """
+        self.rows = 0
+
+    def record(self, seconds, rows):
+        """
+        Adjust batch size by duration of a committed batch. Rows are passed in rather than counted by add, so batches
+        can be prepared in another thread while earlier batches are committed
+        :param seconds: time used to run and commit the batch
+        :param rows: number of rows in the batch
+        """
+        if rows <= 0:
+            return
+        if seconds > self.target_seconds * TOLERANCE or seconds * TOLERANCE < self.target_seconds:
+            # Rows that can be committed in target duration at measured speed
+            factor = self.target_seconds / seconds if seconds > 0 else MAX_GROWTH
+            self.size = self._bound(rows * min(factor, MAX_GROWTH))
+        elif rows * self.row_bytes >= self.target_bytes:
+            # Batch was limited by payload size, don't let batch size drift above it
+            self.size = self._bound(rows)
+
+    def shrink(self):
+        """
+        Halve batch size after a memory error, batch size won't grow back to the size that failed
+        :return: new batch size
+        """
+        self.max_size = max(self.min_size, self.size // 2)
+        self.size = self._bound(self.size // 2)
+        return self.size
+
+    def batches(self, rows):
+        """
+        Split rows into batches, record should be called after each batch is committed
+        :param rows: iterable of (line number, row) tuples
+        :return: generator of lists of (line number, row) tuples
+        """
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if self.add(item[1]):
+                self.next_batch()
+                yield batch
+                batch = []
+        if batch:
+            yield batch
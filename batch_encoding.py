@@ -0,0 +1,39 @@
+import re
+from functools import lru_cache
+
+# Fields of UNWIND records read by a statement, like record.case_id or record.__parentID__
+RECORD_FIELD = re.compile(r'\brecord\.(\w+)\b')
+STATEMENT_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def encode_statement(statement):
+    """
+    Rewrite a statement which reads fields of $batch records by name, so it reads them by position from row lists.
+    Statements must only use record fields by name, not record as a map
+    :param statement: Cypher statement, records are unwound as "record"
+    :return: rewritten statement, tuple of fields in row list order
+    """
+    columns = []
+
+    def replace(match):
+        name = match.group(1)
+        if name not in columns:
+            columns.append(name)
+        return 'record[{}]'.format(columns.index(name))
+
+    return RECORD_FIELD.sub(replace, statement), tuple(columns)
+
+
+def encode_batch(statement, batch):
+    """
+    Encode a batch as row lists with only the fields read by the statement, so field names aren't sent for every
+    row, and columns the statement doesn't use (parent pointers, relationship properties etc.) aren't sent at all
+    :param statement: Cypher statement, records are unwound as "record"
+    :param batch: list of record dicts
+    :return: statement to run, batch to pass in as $batch
+    """
+    encoded_statement, columns = encode_statement(statement)
+    if not columns:
+        return statement, batch
+    return encoded_statement, [[record.get(column) for column in columns] for record in batch]
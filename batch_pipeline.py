@@ -0,0 +1,87 @@
+import queue
+import threading
+
+DEFAULT_QUEUE_SIZE = 2
+# How often a blocked producer checks if the consumer stopped, in seconds
+PUT_TIMEOUT = 0.1
+_ITEM = 'item'
+_DONE = 'done'
+_ERROR = 'error'
+
+
+class BatchPipeline:
+    """
+    Produce items of an iterable in a background thread, while items already produced are consumed by the caller.
+    At most queue_size items are waiting, so the producer blocks when the consumer is slower. An exception raised by
+    the producer is raised again in the consumer after items produced before it, and when the consumer stops early
+    (exception or break), the producer is stopped before leaving the with block. If queue_size is 0, items are produced
+    by the consumer thread, same as iterating the iterable directly
+
+    with BatchPipeline(produce_batches(), 2) as batches:
+        for batch in batches:
+            write(batch)
+    """
+    def __init__(self, iterable, queue_size=DEFAULT_QUEUE_SIZE, name='batch-producer'):
+        self.iterable = iterable
+        self.queue_size = queue_size
+        self.name = name
+        self._queue = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.queue_size > 0:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._produce, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    def __iter__(self):
+        if self._thread is None:
+            yield from self.iterable
+            return
+        while True:
+            kind, value = self._queue.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for item in self.iterable:
+                if not self._put((_ITEM, item)):
+                    break
+            else:
+                self._put((_DONE, None))
+        except BaseException as e:
+            self._put((_ERROR, e))
+        finally:
+            # Close generators in the thread running them
+            close = getattr(self.iterable, 'close', None)
+            if close:
+                close()
+
+    def stop(self):
+        """
+        Stop the producer and wait for it to finish, items not consumed yet are discarded
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,242 @@
+import csv
+import os
+import subprocess
+import time
+
+DEFAULT_DATABASE = 'neo4j'
+NODES_FOLDER = 'nodes'
+RELATIONSHIPS_FOLDER = 'relationships'
+# neo4j-admin import command changed in Neo4j 5
+NEO4J_5 = (5, 0)
+# Max time to wait for Neo4j to come back online after import, in seconds
+NEO4J_START_TIMEOUT = 600
+NEO4J_START_INTERVAL = 5
+STRING = 'string'
+LONG = 'long'
+DOUBLE = 'double'
+BOOLEAN = 'boolean'
+DATETIME = 'datetime'
+# Data model types of converted values, other types are imported as strings
+IMPORT_TYPES = {
+    'Int': LONG,
+    'Float': DOUBLE,
+    'Boolean': BOOLEAN
+}
+MEMGRAPH_CONVERTERS = {
+    LONG: 'toInteger({})',
+    DOUBLE: 'toFloat({})',
+    BOOLEAN: 'toBoolean({})'
+}
+
+
+def get_import_type(prop_type):
+    """
+    Get import type of a data model property type, values of prepared rows are already converted to it
+    """
+    return IMPORT_TYPES.get(prop_type, STRING)
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
+def get_neo4j_header(columns):
+    return ['{}:{}'.format(name, col_type) if col_type and col_type != STRING else name
+            for name, col_type in columns]
+
+
+class BulkImportFiles:
+    """
+    CSV files of nodes and relationships for bulk import into an empty database, written from prepared rows.
+    Headers are in neo4j-admin import format, the same files are loaded into Memgraph with LOAD CSV. Like MERGE,
+    only the first row of a node id and one relationship between two nodes are kept
+    """
+    def __init__(self, folder, log):
+        self.folder = folder
+        self.log = log
+        # Lists of (label, id field, file, columns), columns are (name, type) tuples
+        self.nodes = []
+        # Lists of (relationship type, start label, end label, file, columns)
+        self.relationships = []
+        # label -> (id field, id type)
+        self.id_fields = {}
+        # label -> set of ids written
+        self.node_ids = {}
+        self.relationship_keys = set()
+        self.nodes_written = {}
+        self.relationships_written = {}
+        self.duplicates = 0
+        # (file name prefix, header) -> csv writer of open files, rows are routed to files by their headers
+        self.writers = {}
+        self.out_files = []
+        for sub_folder in [NODES_FOLDER, RELATIONSHIPS_FOLDER]:
+            os.makedirs(os.path.join(folder, sub_folder), exist_ok=True)
+
+    def _get_writer(self, sub_folder, name, header):
+        """
+        Get writer of the file with a header, the file is opened when its first row is written
+        :return: csv writer, and file name if the file is new, None otherwise
+        """
+        writer = self.writers.get((name, header))
+        if writer:
+            return writer, None
+        file_name = os.path.join(self.folder, sub_folder, '{}_{}.csv'.format(name, len(self.nodes) +
+                                                                              len(self.relationships)))
+        out_file = open(file_name, 'w', newline='', encoding='utf-8')
+        self.out_files.append(out_file)
+        writer = csv.writer(out_file)
+        writer.writerow(header)
+        self.writers[(name, header)] = writer
+        return writer, file_name
+
+    def write_node(self, label, id_field, columns, props):
+        """
+        Write a node into the file of its label and columns
+        :param label: node label
+        :param id_field: id field of the node
+        :param columns: tuple of (property name, type) tuples
+        :param props: property dict
+        """
+        ids = self.node_ids.setdefault(label, set())
+        node_id = str(props[id_field])
+        if node_id in ids:
+            self.duplicates += 1
+            return
+        ids.add(node_id)
+        # ID column is not stored, id field is stored as a typed property like other columns
+        header = tuple([':ID({})'.format(label)] + get_neo4j_header(columns))
+        writer, file_name = self._get_writer(NODES_FOLDER, label, header)
+        if file_name:
+            self.nodes.append((label, id_field, file_name, columns))
+            id_type = dict(columns).get(id_field) or STRING
+            old_id = self.id_fields.setdefault(label, (id_field, id_type))
+            if old_id[1] != id_type:
+                self.id_fields[label] = (id_field, STRING)
+        writer.writerow([node_id] + [format_value(props.get(name)) for name, _ in columns])
+        self.nodes_written[label] = self.nodes_written.get(label, 0) + 1
+
+    def write_relationship(self, relationship_type, start_label, end_label, columns, start_id, end_id, props):
+        """
+        Write a relationship into the file of its type, labels and columns
+        :param relationship_type: relationship type
+        :param start_label: label of child node
+        :param end_label: label of parent node
+        :param columns: tuple of (relationship property name, type) tuples
+        :param props: relationship property dict
+        """
+        key = (relationship_type, start_label, str(start_id), end_label, str(end_id))
+        if key in self.relationship_keys:
+            return
+        self.relationship_keys.add(key)
+        header = tuple([':START_ID({})'.format(start_label), ':END_ID({})'.format(end_label)] +
+                       get_neo4j_header(columns))
+        writer, file_name = self._get_writer(RELATIONSHIPS_FOLDER, relationship_type, header)
+        if file_name:
+            self.relationships.append((relationship_type, start_label, end_label, file_name, columns))
+        writer.writerow([str(start_id), str(end_id)] + [format_value(props.get(name)) for name, _ in columns])
+        self.relationships_written[relationship_type] = self.relationships_written.get(relationship_type, 0) + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        for out_file in self.out_files:
+            out_file.close()
+        self.out_files = []
+        self.writers = {}
+
+    def get_neo4j_import_command(self, version, database=DEFAULT_DATABASE, report_file=None):
+        """
+        Get neo4j-admin import command, the database is replaced by imported data
+        :param version: Neo4j version tuple
+        :return: command as list of arguments
+        """
+        options = ['--skip-duplicate-nodes=true', '--skip-bad-relationships=true']
+        if report_file:
+            options.append('--report-file={}'.format(report_file))
+        options += ['--nodes={}={}'.format(label, file_name) for label, _, file_name, _ in self.nodes]
+        options += ['--relationships={}={}'.format(rel_type, file_name)
+                    for rel_type, _, _, file_name, _ in self.relationships]
+        if version >= NEO4J_5:
+            return ['neo4j-admin', 'database', 'import', 'full', '--overwrite-destination=true'] + options + [database]
+        return ['neo4j-admin', 'import', '--database={}'.format(database), '--force'] + options
+
+    def get_memgraph_statements(self, server_folder=None):
+        """
+        Get LOAD CSV statements to load all files into Memgraph, nodes first
+        :param server_folder: folder of the files as seen by Memgraph server, default is the folder they are written to
+        :return: list of (node label or relationship type, True if it loads relationships, statement) tuples
+        """
+        def server_path(file_name):
+            if not server_folder:
+                return os.path.abspath(file_name)
+            return os.path.join(server_folder, os.path.relpath(file_name, self.folder)).replace('\\', '/')
+
+        def value(column, col_type):
+            # Memgraph reads all CSV values as strings
+            return MEMGRAPH_CONVERTERS.get(col_type, '{}').format('row.`{}`'.format(column))
+
+        def prop_map(columns):
+            return ', '.join('{}: {}'.format(name, value(name, col_type)) for name, col_type in columns)
+
+        statements = []
+        for label, id_field, file_name, columns in self.nodes:
+            statement = 'LOAD CSV FROM "{}" WITH HEADER NULLIF "" AS row'.format(server_path(file_name))
+            statement += ' CREATE (:{} {{ {} }})'.format(label, prop_map(columns))
+            statements.append((label, False, statement))
+        for rel_type, start_label, end_label, file_name, columns in self.relationships:
+            start_field, start_type = self.id_fields.get(start_label, (None, STRING))
+            end_field, end_type = self.id_fields.get(end_label, (None, STRING))
+            if not start_field or not end_field:
+                self.log.warning('No nodes to connect by {} relationships, skipped'.format(rel_type))
+                continue
+            props = prop_map(columns)
+            statement = 'LOAD CSV FROM "{}" WITH HEADER NULLIF "" AS row'.format(server_path(file_name))
+            statement += ' MATCH (c:{} {{ {}: {} }})'.format(start_label, start_field,
+                                                            value(':START_ID({})'.format(start_label), start_type))
+            statement += ' MATCH (p:{} {{ {}: {} }})'.format(end_label, end_field,
+                                                            value(':END_ID({})'.format(end_label), end_type))
+            statement += ' CREATE (c)-[:{}{}]->(p)'.format(rel_type, ' {{ {} }}'.format(props) if props else '')
+            statements.append((rel_type, True, statement))
+        return statements
+
+
+def run_command(cmd, log):
+    log.info(' '.join(cmd))
+    subprocess.run(cmd, check=True)
+
+
+def import_neo4j(files, version, log, database=DEFAULT_DATABASE, report_file=None):
+    """
+    Replace a local Neo4j database with files by neo4j-admin import, Neo4j is stopped during import
+    """
+    run_command(['neo4j', 'stop'], log)
+    try:
+        run_command(files.get_neo4j_import_command(version, database, report_file), log)
+    finally:
+        run_command(['neo4j', 'start'], log)
+
+
+def wait_for_neo4j(driver, log, timeout=NEO4J_START_TIMEOUT):
+    """
+    Wait until Neo4j accepts queries after a restart
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with driver.session() as session:
+                session.run('RETURN 1').consume()
+            return
+        except Exception as e:
+            if time.monotonic() > deadline:
+                raise
+            log.info('Waiting for Neo4j to start: {}'.format(e))
+            time.sleep(NEO4J_START_INTERVAL)
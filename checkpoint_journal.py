@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+
+JOURNAL_FOLDER = 'checkpoints'
+JOURNAL_EXT = '.jsonl'
+WIPE_PHASE = 'wipe'
+NODES_PHASE = 'nodes'
+RELATIONSHIPS_PHASE = 'relationships'
+SINGLE_PASS_PHASE = 'single_pass'
+DELETE_PHASE = 'delete'
+
+
+def get_journal_file(temp_folder, file_list, loading_mode):
+    """
+    Journal location, one journal per set of data files and loading mode
+    :param temp_folder: temp folder
+    :param file_list: data files
+    :param loading_mode: loading mode
+    :return: journal file path
+    """
+    key = '|'.join(sorted(os.path.abspath(txt) for txt in file_list)) + '|' + str(loading_mode)
+    return os.path.join(temp_folder, JOURNAL_FOLDER, hashlib.md5(key.encode()).hexdigest() + JOURNAL_EXT)
+
+
+def get_run_signature(file_list, loading_mode):
+    """
+    Signature of data files and loading mode, a journal can only be resumed if data files haven't changed
+    """
+    items = []
+    for txt in sorted(file_list):
+        stat = os.stat(txt)
+        items.append('{}:{}:{}'.format(os.path.abspath(txt), stat.st_size, stat.st_mtime_ns))
+    items.append(str(loading_mode))
+    return hashlib.md5('|'.join(items).encode()).hexdigest()
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of committed batches in split transactions mode. Each record has data file, phase,
+    last committed line, whether the phase of the file is done, and load counters at the time of the commit.
+    Records are flushed to disk before the next batch starts, so an interrupted load can be resumed from the last
+    committed batch of each file
+    """
+    def __init__(self, file_name, signature, log):
+        self.file_name = file_name
+        self.signature = signature
+        self.log = log
+        # (data file, phase) -> last record
+        self.records = {}
+        self.counters = None
+        self._out_file = None
+        self._incomplete = False
+        self._lock = threading.Lock()
+
+    def resume(self):
+        """
+        Open existing journal to resume from
+        :return: True if there are committed batches to resume from
+        """
+        if not os.path.isfile(self.file_name) or not self._read():
+            self.log.warning('No checkpoint journal to resume from, load from the beginning')
+            return False
+        self._out_file = open(self.file_name, 'a', encoding='utf-8')
+        if self._incomplete:
+            # Start a new line after an incomplete last record
+            self._out_file.write('\n')
+        return True
+
+    def start(self):
+        """
+        Start a new journal, existing journal is replaced
+        """
+        self.records = {}
+        self.counters = None
+        folder = os.path.dirname(self.file_name)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._out_file = open(self.file_name, 'w', encoding='utf-8')
+        self._write({'signature': self.signature})
+
+    def _read(self):
+        with open(self.file_name, encoding='utf-8') as in_file:
+            lines = in_file.readlines()
+        if not lines:
+            return False
+        self._incomplete = not lines[-1].endswith('\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return False
+        if header.get('signature') != self.signature:
+            self.log.warning('Data files changed since checkpoint journal "{}" was written, can not resume'.format(
+                self.file_name))
+            return False
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Last record may be incomplete if the load was killed while writing it
+                self.log.warning('Incomplete record in checkpoint journal ignored')
+                continue
+            self.records[(record['file'], record['phase'])] = record
+            self.counters = record.get('counters')
+        return len(self.records) > 0
+
+    def _write(self, record):
+        self._out_file.write(json.dumps(record) + '\n')
+        self._out_file.flush()
+        os.fsync(self._out_file.fileno())
+
+    def get_checkpoint(self, file_name, phase):
+        """
+        :return: last committed line, and if the phase of the file is done
+        """
+        record = self.records.get((file_name, phase))
+        if record is None:
+            return 0, False
+        return record['line'], record['done']
+
+    def commit(self, file_name, phase, line_num, counters=None, done=False):
+        record = {'file': file_name, 'phase': phase, 'line': line_num, 'done': done, 'counters': counters}
+        with self._lock:
+            self.records[(file_name, phase)] = record
+            self.counters = counters
+            self._write(record)
+
+    def close(self, remove=False):
+        """
+        Close the journal
+        :param remove: remove the journal, used when load succeeded
+        """
+        if self._out_file:
+            self._out_file.close()
+            self._out_file = None
+        if remove and os.path.isfile(self.file_name):
+            os.remove(self.file_name)
@@ -48,6 +48,28 @@ class BentoConfig:
             self.database_type = "neo4j"
             self.plugins = []
             self.memgraph_snapshot_dir = None
+            self.row_cache_max_cells = None
+            self.workers = None
+            self.validation_report_format = None
+            self.validation_report_max_rows = None
+            self.single_pass = None
+            self.skip_unchanged = None
+            self.incremental = None
+            self.manifest_file = None
+            self.resume = None
+            self.bulk_import = None
+            self.bulk_import_folder = None
+            self.bulk_import_server_folder = None
+            self.min_batch_size = None
+            self.max_batch_size = None
+            self.batch_target_bytes = None
+            self.batch_target_seconds = None
+            self.pipeline_queue_size = None
+            self.server_side_batching = None
+            self.server_chunk_size = None
+            self.memgraph_load_profile = None
+            self.wipe_drop_database = None
+            self.index_advisor = None
         else:
             if os.path.isfile(config_file):
                 with open(config_file) as c_file:
@@ -110,6 +132,28 @@ class BentoConfig:
                     self.verbose = config.get('verbose')
                     self.database_type = config.get("database_type")
                     self.memgraph_snapshot_dir = config.get("memgraph_snapshot_dir")
+                    self.row_cache_max_cells = config.get('row_cache_max_cells')
+                    self.workers = config.get('workers')
+                    self.validation_report_format = config.get('validation_report_format')
+                    self.validation_report_max_rows = config.get('validation_report_max_rows')
+                    self.single_pass = config.get('single_pass')
+                    self.skip_unchanged = config.get('skip_unchanged')
+                    self.incremental = config.get('incremental')
+                    self.manifest_file = config.get('manifest_file')
+                    self.resume = config.get('resume')
+                    self.bulk_import = config.get('bulk_import')
+                    self.bulk_import_folder = config.get('bulk_import_folder')
+                    self.bulk_import_server_folder = config.get('bulk_import_server_folder')
+                    self.min_batch_size = config.get('min_batch_size')
+                    self.max_batch_size = config.get('max_batch_size')
+                    self.batch_target_bytes = config.get('batch_target_bytes')
+                    self.batch_target_seconds = config.get('batch_target_seconds')
+                    self.pipeline_queue_size = config.get('pipeline_queue_size')
+                    self.server_side_batching = config.get('server_side_batching')
+                    self.server_chunk_size = config.get('server_chunk_size')
+                    self.memgraph_load_profile = config.get('memgraph_load_profile')
+                    self.wipe_drop_database = config.get('wipe_drop_database')
+                    self.index_advisor = config.get('index_advisor')
             else:
                 msg = f'Can NOT open configuration file "{config_file}"!'
                 self.log.error(msg)
@@ -1,5 +1,19 @@
+import re
+import time
+
+from neo4j.exceptions import Neo4jError
+
 NEO4J = "neo4j"
 MEMGRAPH = "memgraph"
+# Max time to wait for indexes to be populated, in seconds
+INDEX_ONLINE_TIMEOUT = 600
+INDEX_POLL_INTERVAL = 1
+# Neo4j 4.1 added "IF NOT EXISTS" and "FOR ... ON" syntax, Neo4j 5 removed "CREATE INDEX ON :Label(property)"
+NEO4J_IF_NOT_EXISTS_VERSION = (4, 1)
+# Neo4j 4.4 added "REQUIRE" to constraints, Neo4j 5 removed "ASSERT"
+NEO4J_REQUIRE_VERSION = (4, 4)
+# Index types usable by MERGE and MATCH on property values, Neo4j 5 replaced BTREE indexes with RANGE indexes
+RANGE_INDEX_TYPES = ("BTREE", "RANGE")
 def format_as_tuple(node_name, properties):
     """
     Format index info as a tuple
@@ -9,16 +23,53 @@ def format_as_tuple(node_name, properties):
     """
     if isinstance(properties, str):
         properties = [properties]
+    # Label indexes have no properties
+    elif properties is None:
+        properties = []
     lst = [node_name] + sorted(properties)
     return tuple(lst)
 
-def create_index(driver, schema, log, database_type):
+def parse_version(version):
+    """
+    Parse version string like "5.12.0" or "4.4.26-enterprise" into tuple of ints
+    """
+    return tuple(int(part) for part in re.findall(r'\d+', version.split('-')[0]))
+
+def get_neo4j_version(session):
+    result = session.run('CALL dbms.components() YIELD name, versions WHERE name = "Neo4j Kernel" '
+                         'RETURN versions[0] AS version').single()
+    return result['version'] if result else ''
+
+def get_schema_version(session, database_type):
+    """
+    Get the version that decides syntax of index and constraint statements
+    :return: Neo4j version tuple, or None for Memgraph, which uses "CREATE INDEX ON :Label(property)" syntax
+    """
+    if database_type != NEO4J:
+        return None
+    return parse_version(get_neo4j_version(session))
+
+def create_index(driver, schema, log, database_type, lookup_keys=None, timeout=INDEX_ONLINE_TIMEOUT):
+    """
+    Create missing constraints and indexes in the properties file, and indexes for lookup keys not covered by them,
+    then wait once until they are all online, so loading doesn't start while indexes are still populating
+    :param lookup_keys: list of (label, property) tuples looked up by loading, from index_advisor.get_lookup_keys
+    :return: number of constraints and indexes created, or False if they can't be created
+    """
     index_created = 0
     if database_type == NEO4J:
         with driver.session() as session:
+            try:
+                version = get_schema_version(session, database_type)
+                existing = get_btree_indexes(session)
+                index_created = create_id_constraints(session, schema, log, existing, version)
+            except Exception as e:
+                log.exception(e)
+                return False
+            # All indexes are created in one transaction, so Neo4j populates them concurrently
             tx = session.begin_transaction()
             try:
-                index_created = create_indexes(tx, schema, log, database_type)
+                index_created += create_indexes(tx, schema, log, database_type, existing, version, lookup_keys)
                 tx.commit()
             except Exception as e:
                 tx.rollback()
@@ -28,10 +79,12 @@ def create_index(driver, schema, log, database_type):
         try:
             #cursor = driver.cursor()
             with driver.session() as session:
-                index_created = create_indexes(session, schema, log, database_type)
+                index_created = create_indexes(session, schema, log, database_type, lookup_keys=lookup_keys)
         except Exception as e:
             log.exception(e)
             return False
+    # Indexes created by an interrupted load may still be populating too
+    wait_for_indexes(driver, log, database_type, timeout)
     return index_created
 
 def get_memgraph_index_info(session):
@@ -45,7 +98,8 @@ def get_memgraph_index_info(session):
 
 def get_btree_indexes(session):
     """
-    Queries the database to get all existing indexes
+    Queries the database to get all existing indexes usable by property lookups, including indexes backing
+    uniqueness constraints
     :param session: the current neo4j transaction session
     :return: A set of tuples representing all existing indexes in the database
     """
@@ -53,43 +107,126 @@ def get_btree_indexes(session):
     result = session.run(command)
     indexes = set()
     for r in result:
-        if r["type"] == "BTREE":
+        if r["type"] in RANGE_INDEX_TYPES and r["entityType"] == "NODE":
             indexes.add(format_as_tuple(r["labelsOrTypes"][0], r["properties"]))
     return indexes
 
-def create_indexes(session, schema, log, database_type):
+def create_id_constraints(session, schema, log, existing, version):
+    """
+    Creates uniqueness constraints for fields in "id_fields" section of the properties file, which are not indexed
+    yet. Each constraint is created in its own transaction, a node type with duplicate ids gets an index instead
+    :param existing: set of existing indexes, constraints created are added into it
+    :param version: Neo4j version tuple
+    :return: number of constraints created
+    """
+    constraint_created = 0
+    ids = schema.props.id_fields
+    for node_name in ids:
+        index_tuple = format_as_tuple(node_name, ids[node_name])
+        if not isinstance(ids[node_name], str) or index_tuple in existing:
+            continue
+        try:
+            session.run(get_constraint_statement(node_name, ids[node_name], version)).consume()
+        except Neo4jError as e:
+            log.warning("Can not create uniqueness constraint for \"{}\" on property \"{}\", index will be created "
+                        "instead: {}".format(node_name, ids[node_name], e))
+            continue
+        existing.add(index_tuple)
+        constraint_created += 1
+        log.info("Uniqueness constraint created for \"{}\" on property \"{}\"".format(node_name, ids[node_name]))
+    return constraint_created
+
+def create_indexes(session, schema, log, database_type, existing=None, version=None, lookup_keys=None):
     """
     Creates indexes, if they do not already exist, for all entries in the "id_fields" and "indexes" sections of the
-    properties file
+    properties file, and for lookup keys not covered by them
     :param session: the current neo4j transaction session
+    :param existing: set of existing indexes, queried from the database if not given
+    :param version: Neo4j version tuple, None for Memgraph
+    :param lookup_keys: list of (label, property) tuples looked up by loading
     """
     index_created = 0
-    if database_type == NEO4J:
-        existing = get_btree_indexes(session)
-    elif database_type == MEMGRAPH:
-        existing = get_memgraph_index_info(session)
+    if existing is None:
+        if database_type == NEO4J:
+            existing = get_btree_indexes(session)
+        elif database_type == MEMGRAPH:
+            existing = get_memgraph_index_info(session)
     # Create indexes from "id_fields" section of the properties file
     ids = schema.props.id_fields
     for node_name in ids:
-        index_created = add_index(node_name, ids[node_name], existing, session, log, index_created)
+        index_created = add_index(node_name, ids[node_name], existing, session, log, index_created, version)
     # Create indexes from "indexes" section of the properties file
     indexes = schema.props.indexes
     # each index is a dictionary, indexes is a list of these dictionaries
     # for each dictionary in list
     for node_dict in indexes:
         node_name = list(node_dict.keys())[0]
-        index_created = add_index(node_name, node_dict[node_name], existing, session, log, index_created)
+        index_created = add_index(node_name, node_dict[node_name], existing, session, log, index_created, version)
+    # Create indexes for lookups not covered by the properties file
+    advised = [key for key in lookup_keys or [] if format_as_tuple(*key) not in existing]
+    for label, prop in advised:
+        index_created = add_index(label, prop, existing, session, log, index_created, version)
+    if advised:
+        log.info('{} index(es) added for lookups not covered by properties file: {}'.format(
+            len(advised), ', '.join(':{}({})'.format(label, prop) for label, prop in advised)))
 
     return index_created
 
-def add_index(node_name, node_property, existing, session, log, index_created):
+def get_index_statement(node_name, node_property, version=None):
+    properties = [node_property] if isinstance(node_property, str) else node_property
+    if version is None or version < NEO4J_IF_NOT_EXISTS_VERSION:
+        return "CREATE INDEX ON :{}({});".format(node_name, ",".join(properties))
+    return "CREATE INDEX IF NOT EXISTS FOR (n:{}) ON ({})".format(node_name, ", ".join("n." + p for p in properties))
+
+def get_constraint_statement(node_name, node_property, version):
+    if version < NEO4J_IF_NOT_EXISTS_VERSION:
+        return "CREATE CONSTRAINT ON (n:{}) ASSERT n.{} IS UNIQUE".format(node_name, node_property)
+    if version < NEO4J_REQUIRE_VERSION:
+        return "CREATE CONSTRAINT IF NOT EXISTS ON (n:{}) ASSERT n.{} IS UNIQUE".format(node_name, node_property)
+    return "CREATE CONSTRAINT IF NOT EXISTS FOR (n:{}) REQUIRE n.{} IS UNIQUE".format(node_name, node_property)
+
+def add_index(node_name, node_property, existing, session, log, index_created, version=None):
     index_tuple = format_as_tuple(node_name, node_property)
-    # If node_property is a list of properties, convert to a comma delimited string
-    if isinstance(node_property, list):
-        node_property = ",".join(node_property)
     if index_tuple not in existing:
-        command = "CREATE INDEX ON :{}({});".format(node_name, node_property)
-        session.run(command)
+        session.run(get_index_statement(node_name, node_property, version))
+        existing.add(index_tuple)
         index_created += 1
+        # If node_property is a list of properties, convert to a comma delimited string
+        if isinstance(node_property, list):
+            node_property = ",".join(node_property)
         log.info("Index created for \"{}\" on property \"{}\"".format(node_name, node_property))
     return index_created
+
+def wait_for_indexes(driver, log, database_type, timeout=INDEX_ONLINE_TIMEOUT):
+    """
+    Wait until all indexes are online, Memgraph creates indexes synchronously so there is nothing to wait for
+    :param timeout: max time to wait, in seconds
+    :return: True if all indexes are online, loading continues with a warning otherwise
+    """
+    if database_type != NEO4J:
+        return True
+    deadline = time.monotonic() + timeout
+    failed = set()
+    with driver.session() as session:
+        while True:
+            populating = []
+            try:
+                records = list(session.run("SHOW INDEXES YIELD name, state, populationPercent"))
+            except Neo4jError as e:
+                log.warning("Can not check if indexes are online: {}".format(e))
+                return False
+            for r in records:
+                if r["state"] == "FAILED":
+                    if r["name"] not in failed:
+                        failed.add(r["name"])
+                        log.warning("Index \"{}\" failed to populate".format(r["name"]))
+                elif r["state"] != "ONLINE":
+                    populating.append("{} ({}%)".format(r["name"], r["populationPercent"]))
+            if not populating:
+                return True
+            if time.monotonic() > deadline:
+                log.warning("Indexes not online after {} seconds, loading continues: {}".format(
+                    timeout, ", ".join(populating)))
+                return False
+            log.info("Waiting for indexes to be online: {}".format(", ".join(populating)))
+            time.sleep(INDEX_POLL_INTERVAL)
@@ -1,22 +1,35 @@
 #!/usr/bin/env python3
 
 import os
-from collections import deque
+import copy
+from itertools import islice
 import csv
-import re
 import datetime
 import sys
 import platform
 import subprocess
-import json
-import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import datetime
 from timeit import default_timer as timer
-from bento.common.utils import get_host, DATETIME_FORMAT, reformat_date, get_time_stamp
+from bento.common.utils import get_host, DATETIME_FORMAT, get_time_stamp
 from memgraph_backup_restore import backup_memgraph_mgconsole
-from create_index import create_index, NEO4J, MEMGRAPH
+from create_index import create_index, get_neo4j_version, parse_version, NEO4J, MEMGRAPH
+from row_cache import RowCache
+from relationship_writer import RelationshipWriter
+from file_planner import plan_file_waves
+from adaptive_batcher import AdaptiveBatcher, is_memory_error
+from batch_pipeline import BatchPipeline, DEFAULT_QUEUE_SIZE
+from batch_encoding import encode_batch
+from bulk_import import BulkImportFiles, get_import_type, import_neo4j, wait_for_neo4j, DATETIME
+from memgraph_profile import MemgraphLoadProfile
+from index_advisor import get_lookup_keys
+from checkpoint_journal import CheckpointJournal, get_journal_file, get_run_signature, WIPE_PHASE, NODES_PHASE, \
+    RELATIONSHIPS_PHASE, SINGLE_PASS_PHASE, DELETE_PHASE
+from validation_report import ViolationCollector, LineGroups, format_line_numbers, open_report_writer
 
 from neo4j import Driver
+from neo4j.exceptions import Neo4jError
 
 from icdc_schema import ICDC_Schema, is_parent_pointer
 from bento.common.utils import get_logger, NODES_CREATED, RELATIONSHIP_CREATED, UUID, \
@@ -34,12 +47,25 @@ CASE_NODE = 'case'
 CASE_ID = 'case_id'
 CREATED = 'created'
 UPDATED = 'updated'
+CONTENT_HASH = 'content_hash'
 RELATIONSHIPS = 'relationships'
 INT_NODE_CREATED = 'int_node_created'
+SINGLE_PASS = 'single_pass'
 PROVIDED_PARENTS = 'provided_parents'
 RELATIONSHIP_PROPS = 'relationship_properties'
 BATCH_SIZE = 10000
+# Rows sent in one auto-commit transaction when batches are committed by the server
+DEFAULT_SERVER_CHUNK_SIZE = 100000
+# Violations of a data file are written into validation report every VIOLATION_FLUSH_ROWS rows
+VIOLATION_FLUSH_ROWS = 10000
+BULK_IMPORT_FOLDER = 'bulk_import'
+# CALL { } IN TRANSACTIONS is supported since Neo4j 4.4
+MIN_SERVER_BATCHING_VERSION = (4, 4)
+BATCH_PREFIX = 'WITH $batch as batch UNWIND batch as record '
 OTHER = '__other__'
+# Load counters saved in checkpoint journal, and restored when a load is resumed
+COUNTER_ATTRS = ['nodes_created', 'nodes_updated', 'relationships_created', 'nodes_deleted', 'relationships_deleted',
+                 'nodes_stat', 'nodes_stat_updated', 'relationships_stat', 'nodes_deleted_stat']
 
 maxInt = sys.maxsize
 while True:
@@ -113,16 +139,57 @@ def backup_neo4j(backup_dir, name, address, log):
         return False
 
 
-def check_encoding(file_name):
-    utf8 = 'utf-8'
-    windows1252 = 'windows-1252'
-    try:
-        with open(file_name, encoding=utf8) as file:
-            for _ in file.readlines():
-                pass
-        return utf8
-    except UnicodeDecodeError:
-        return windows1252
+def iter_batches(iterable, size):
+    """
+    Split an iterable into lists of given size, last list may be shorter
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_batch(tx, statement, batch):
+    """
+    Run a batch statement and return its counters, can be used as a unit of work for managed transactions
+    """
+    statement, batch = encode_batch(statement, batch)
+    return tx.run(statement, batch=batch).consume().counters
+
+
+def get_in_transactions_statement(statement, rows):
+    """
+    Wrap a batch statement in CALL { } IN TRANSACTIONS, so the server commits every given number of rows
+    :param statement: Cypher statement starting with BATCH_PREFIX
+    :param rows: number of rows per server side transaction
+    :return: statement, must be run in an auto-commit transaction
+    """
+    if not statement.startswith(BATCH_PREFIX):
+        raise ValueError('Not a batch statement: {}'.format(statement))
+    return 'UNWIND $batch AS record CALL {{ WITH record {} }} IN TRANSACTIONS OF {} ROWS'.format(
+        statement[len(BATCH_PREFIX):], rows)
+
+
+def run_batch_in_transactions(session, statement, batch, rows):
+    """
+    Run a batch statement in an auto-commit transaction, and let the server commit every given number of rows
+    :return: counters of all server side transactions
+    """
+    statement, batch = encode_batch(statement, batch)
+    return session.run(get_in_transactions_statement(statement, rows), batch=batch).consume().counters
+
+
+class SummedCounters:
+    """
+    Sum of counters of a batch written in multiple statements
+    """
+    def __init__(self, *counters):
+        self.counters = counters
+
+    def __getattr__(self, name):
+        return sum(getattr(counters, name) for counters in self.counters)
 
 
 # Mask all relationship properties, so they won't participate in property comparison
@@ -135,6 +202,14 @@ def get_props_signature(props):
     return signature
 
 
+def get_content_hash(obj):
+    """
+    Hash of all columns of a prepared row, including parent ids and relationship properties, so rows with same hash
+    have same node properties and relationships
+    """
+    return get_string_md5(str(sorted(obj.items(), key=lambda item: item[0])))
+
+
 class DataLoader:
     def __init__(self, driver, schema, config=None, memgraph_snapshot_dir=None, plugins=None):
         if plugins is None:
@@ -144,8 +219,49 @@ class DataLoader:
         self.log = get_logger('Data Loader')
         self.driver = driver
         self.database_type = NEO4J
+        row_cache_max_cells = None
+        temp_folder = None
+        self.validation_report_format = None
+        self.validation_report_max_rows = None
+        self.min_batch_size = None
+        self.max_batch_size = None
+        self.batch_target_bytes = None
+        self.batch_target_seconds = None
+        self.pipeline_queue_size = DEFAULT_QUEUE_SIZE
+        self.server_side_batching = False
+        self.server_chunk_size = DEFAULT_SERVER_CHUNK_SIZE
+        self.bulk_import_folder = None
+        self.bulk_import_server_folder = None
+        self.memgraph_load_profile = False
+        self.wipe_drop_database = False
+        self.index_advisor = True
+        # (label, property) tuples looked up by statements of current load, from get_lookup_keys
+        self.lookup_keys = []
+        # Memgraph load profile of current load, if it's used
+        self.load_profile = None
         if config is not None:
             self.database_type = config.database_type
+            row_cache_max_cells = config.row_cache_max_cells
+            temp_folder = config.temp_folder
+            self.validation_report_format = config.validation_report_format
+            self.validation_report_max_rows = config.validation_report_max_rows
+            self.min_batch_size = config.min_batch_size
+            self.max_batch_size = config.max_batch_size
+            self.batch_target_bytes = config.batch_target_bytes
+            self.batch_target_seconds = config.batch_target_seconds
+            if config.pipeline_queue_size is not None:
+                self.pipeline_queue_size = config.pipeline_queue_size
+            self.server_side_batching = bool(config.server_side_batching)
+            if config.server_chunk_size:
+                self.server_chunk_size = config.server_chunk_size
+            self.bulk_import_folder = config.bulk_import_folder
+            self.bulk_import_server_folder = config.bulk_import_server_folder
+            self.memgraph_load_profile = bool(config.memgraph_load_profile)
+            self.wipe_drop_database = bool(config.wipe_drop_database)
+            if config.index_advisor is not None:
+                self.index_advisor = bool(config.index_advisor)
+        # Every data file is parsed once and shared by validation, node loading and relationship loading
+        self.row_cache = RowCache(temp_folder, row_cache_max_cells)
 
         self.schema = schema
         self.rel_prop_delimiter = self.schema.rel_prop_delimiter
@@ -176,9 +292,107 @@ class DataLoader:
         self.nodes_deleted_stat = {}
         self.relationships_deleted_stat = {}
         self.validation_result_file_key = ""
-        self.df_validation_dict = {}
+        # All files of validation report, validation_result_file_key is the main one
+        self.validation_result_files = []
+        # Files skipped by incremental loading, only reported in statistics
+        self.skipped_files = []
+        self.violations = ViolationCollector()
         self.skip_validation_flag = False
         self.cheat_mode = True
+        # Node types that can be parents of other nodes
+        self.parent_types = {dest for rels in self.schema.relationships.values() for dest in rels}
+        # (label, id field, id) of nodes confirmed to exist or created during current load
+        self.known_nodes = set()
+        # Protects known_nodes, which is shared by workers loading batches in parallel
+        self.known_nodes_lock = threading.Lock()
+        # Protects statistics when nodes are loaded by multiple workers
+        self.stat_lock = threading.Lock()
+        # Statements keyed by (node type, id field, property columns, database type), and skip_unchanged for upserts
+        self.statement_cache = {}
+        # Property columns set by upsert statements, keyed by (id field, row keys, skip_unchanged)
+        self.statement_shapes = {}
+        # Typed columns of bulk import files, keyed by (node type, id field, row keys)
+        self.bulk_columns = {}
+        # Skip rows whose content hash is same as the one saved in DB, upsert mode only
+        self.skip_unchanged = False
+        # Checkpoint journal of committed batches, only used in split transactions mode
+        self.journal = None
+        # Nodes are committed by the server with CALL { } IN TRANSACTIONS, set when loading starts
+        self.use_server_batching = False
+
+    def new_batcher(self, size=None):
+        """
+        Create a batcher for a data file in split transactions mode, each file gets its own batcher, so wide and
+        narrow files get different batch sizes
+        :param size: fixed batch size, not limited by payload size
+        """
+        if size:
+            return AdaptiveBatcher(size, size, sys.maxsize, None, size)
+        return AdaptiveBatcher(self.min_batch_size, self.max_batch_size, self.batch_target_bytes,
+                               self.batch_target_seconds, BATCH_SIZE)
+
+    @staticmethod
+    def get_neo4j_version(session):
+        return get_neo4j_version(session)
+
+    def check_server_batching(self, session):
+        """
+        Check if the database can commit batches with CALL { } IN TRANSACTIONS, only Neo4j 4.4 and later can
+        """
+        if self.database_type != NEO4J:
+            self.log.warning('Server side batching is only supported by Neo4j, batches are committed by the loader')
+            return False
+        try:
+            version = self.get_neo4j_version(session)
+        except Neo4jError as e:
+            self.log.warning('Can not get Neo4j version, batches are committed by the loader: {}'.format(e))
+            return False
+        if parse_version(version) < MIN_SERVER_BATCHING_VERSION:
+            self.log.warning('Neo4j {} does not support CALL {{ }} IN TRANSACTIONS, batches are committed by the '
+                             'loader'.format(version))
+            return False
+        self.log.info('Neo4j {}, nodes are committed by the server every {} rows'.format(version,
+                                                                                        self.server_chunk_size))
+        return True
+
+    def get_counters(self):
+        with self.stat_lock:
+            return {attr: copy.copy(getattr(self, attr)) for attr in COUNTER_ATTRS}
+
+    def restore_counters(self, counters):
+        for attr in COUNTER_ATTRS:
+            if attr in counters:
+                setattr(self, attr, counters[attr])
+
+    def get_checkpoint(self, file_name, phase):
+        """
+        :return: last committed line of the file in given phase, and if the phase of the file is done
+        """
+        if not self.journal:
+            return 0, False
+        return self.journal.get_checkpoint(file_name, phase)
+
+    def checkpoint(self, file_name, phase, line_num, done=False):
+        """
+        Record a committed batch in checkpoint journal, must be called after the batch is committed
+        """
+        if self.journal:
+            self.journal.commit(file_name, phase, line_num, self.get_counters(), done)
+
+    def get_resume_rows(self, file_name, phase):
+        """
+        Get prepared rows of a file, rows committed by an interrupted load are skipped
+        :return: generator of (line number, prepared row) tuples, or None if the phase of the file is done
+        """
+        resume_line, done = self.get_checkpoint(file_name, phase)
+        if done:
+            self.log.info('File "{}" already loaded ({}), skipped'.format(file_name, phase))
+            return None
+        rows = self.row_cache.get_file(file_name).prepared_rows(lambda row: self.prepare_node(row, file_name))
+        if resume_line:
+            self.log.info('Resuming file "{}" ({}) after line {}'.format(file_name, phase, resume_line))
+            rows = ((line_num, obj) for line_num, obj in rows if line_num > resume_line)
+        return rows
 
     def check_files(self, file_list):
         if not file_list:
@@ -196,37 +410,58 @@ class DataLoader:
         try:
             with self.driver.session() as session:
                 for txt in file_list:
-                    file_encoding = check_encoding(txt)
-                    with open(txt, encoding=file_encoding) as in_file:
-                        reader = csv.DictReader(in_file, delimiter='\t')
-                        line_number = 1
-                        for org_obj in reader:
-                            line_number += 1
-                            obj = self.cleanup_node(org_obj)
-                            id_field = self.schema.get_id_field(obj)
-                            if id_field not in obj.keys():
-                                self.log.error(f'Line: {line_number}: Required id field {id_field} is missing, validation failed')
-                                return False
-                            elif obj[id_field] is None:
-                                self.log.error(f'Line: {line_number}: Required id field {id_field} is None, validation failed')
-                                return False
-                            if NODE_TYPE not in obj.keys():
-                                self.log.error(f'Line: {line_number}: Required node type field {NODE_TYPE} is missing, validation failed')
-                                return True
-                            elif obj[NODE_TYPE] is None:
-                                self.log.error(f'Line: {line_number}: Required node type field {NODE_TYPE} is None, validation failed')
-                                return False
-                            node_type = obj.get(NODE_TYPE, None)
-                            if not self.node_exists(session, node_type, id_field, obj[id_field]):
-                                self.log.error(f'Line: {line_number}: The node to be deleted (:{obj[NODE_TYPE]} {{{id_field}: "{obj[id_field]}"}}) not found in DB!, validation failed')
-                                validation_result = False
-                            
+                    missing_nodes, valid = self.find_missing_delete_nodes(session, txt)
+                    if not valid:
+                        validation_result = False
+                    for line_number, node_type, id_field, node_id in missing_nodes:
+                        self.log.error(f'Line: {line_number}: The node to be deleted (:{node_type} {{{id_field}: "{node_id}"}}) not found in DB!, validation failed')
+                    if missing_nodes:
+                        self.log.error(f'{len(missing_nodes)} node(s) to be deleted in file "{txt}" not found in DB')
+                        validation_result = False
         except Exception as e:
             self.log.error(e)
             self.log.error("Delete file validation failed, abort the deletion")
             sys.exit(1)
         return validation_result
 
+    def find_missing_delete_nodes(self, session, file_name):
+        """
+        Check existence of all nodes in a delete file, rows are checked in chunks, with one query per
+        label and id field in each chunk
+        :param session: Neo4j session
+        :param file_name: delete file
+        :return: list of (line number, node type, id field, id) of all nodes not found in DB, and False if any row
+        doesn't have a node type or id
+        """
+        missing_nodes = []
+        valid = True
+        for batch in iter_batches(self.row_cache.get_file(file_name).rows(), BATCH_SIZE):
+            # (node type, id field) -> id -> line numbers
+            pending = {}
+            for line_number, obj in batch:
+                if obj.get(NODE_TYPE) is None:
+                    self.log.error(f'Line: {line_number}: Required node type field {NODE_TYPE} is missing or None, validation failed')
+                    valid = False
+                    continue
+                id_field = self.schema.get_id_field(obj)
+                if id_field not in obj.keys():
+                    self.log.error(f'Line: {line_number}: Required id field {id_field} is missing, validation failed')
+                    valid = False
+                    continue
+                elif obj[id_field] is None:
+                    self.log.error(f'Line: {line_number}: Required id field {id_field} is None, validation failed')
+                    valid = False
+                    continue
+                pending.setdefault((obj[NODE_TYPE], id_field), {}).setdefault(obj[id_field], []).append(line_number)
+            for (node_type, id_field), ids in pending.items():
+                found = self.nodes_exist(session, node_type, id_field, ids.keys())
+                for node_id, line_numbers in ids.items():
+                    if node_id not in found:
+                        for line_number in line_numbers:
+                            missing_nodes.append((line_number, node_type, id_field, node_id))
+        missing_nodes.sort()
+        return missing_nodes, valid
+
 
     def validate_files(self, cheat_mode, loading_mode, file_list, max_violations, temp_folder, verbose):
         if not cheat_mode:
@@ -234,23 +469,31 @@ class DataLoader:
                 self.cheat_mode = False
                 validation_failed = False
                 output_key_invalid = ""
-                for txt in file_list:
-                    validate_result = self.validate_file(txt, max_violations, verbose)
-                    if not validate_result:
-                        self.log.error('Validating file "{}" failed!'.format(txt))
-                        validation_failed = True
+                if not os.path.exists(temp_folder):
+                    os.makedirs(temp_folder)
+                df_validation_result_file_key = os.path.basename(os.path.dirname(file_list[0]))
+                timestamp = get_time_stamp()
+                # Violations are written into report while files are validated, so memory usage doesn't grow with
+                # violations
+                report_writer = open_report_writer(self.validation_report_format,
+                                                   os.path.join(temp_folder, df_validation_result_file_key) + "_" + timestamp,
+                                                   self.validation_report_max_rows)
+                try:
+                    for txt in file_list:
+                        validate_result = self.validate_file(txt, max_violations, verbose, report_writer)
+                        self.violations.flush(report_writer)
+                        if not validate_result:
+                            self.log.error('Validating file "{}" failed!'.format(txt))
+                            validation_failed = True
+                finally:
+                    report_writer.close()
                 if validation_failed:
-                    if not os.path.exists(temp_folder):
-                        os.makedirs(temp_folder)
-                    df_validation_result_file_key = os.path.basename(os.path.dirname(file_list[0]))
-                    timestamp = get_time_stamp()
-                    output_key_invalid = os.path.join(temp_folder, df_validation_result_file_key) + "_" + timestamp + ".xlsx"
-                    #df_validation_result.to_csv(output_key_invalid, index=False)
-                    writer=pd.ExcelWriter(output_key_invalid, engine='xlsxwriter')
-                    for key in self.df_validation_dict.keys():
-                        sheet_name_new = key
-                        self.df_validation_dict[key].to_excel(writer,sheet_name=sheet_name_new, index=False)
-                    writer.close()
+                    output_key_invalid = report_writer.file_name
+                    self.validation_result_files = report_writer.files
+                    for sheet, omitted in report_writer.rows_omitted.items():
+                        self.log.warning('{} violation(s) of "{}" not written into validation report, see summary'.format(omitted, sheet))
+                else:
+                    report_writer.remove()
 
                 self.validation_result_file_key = output_key_invalid
                 return not validation_failed
@@ -265,13 +508,40 @@ class DataLoader:
             return True
 
     def load(self, file_list, cheat_mode, dry_run, loading_mode, wipe_db, max_violations, temp_folder, verbose,
-             split=False, no_backup=True, neo4j_uri=None, backup_folder="/", username=None, password=None):
+             split=False, no_backup=True, neo4j_uri=None, backup_folder="/", username=None, password=None, workers=1,
+             single_pass=False, skip_unchanged=False, resume=False, bulk_import=False):
+        result = False
+        try:
+            result = self._load(file_list, cheat_mode, dry_run, loading_mode, wipe_db, max_violations, temp_folder,
+                                verbose, split, no_backup, neo4j_uri, backup_folder, username, password, workers,
+                                single_pass, skip_unchanged, resume, bulk_import)
+            return result
+        finally:
+            self.finish_load_profile(bool(result))
+            # Release cached rows and remove spill files
+            self.row_cache.clear()
+
+    def _load(self, file_list, cheat_mode, dry_run, loading_mode, wipe_db, max_violations, temp_folder, verbose,
+              split, no_backup, neo4j_uri, backup_folder, username, password, workers, single_pass=False,
+              skip_unchanged=False, resume=False, bulk_import=False):
         if not self.check_files(file_list):
             return False
         start = timer()
-        if not self.validate_files(cheat_mode, loading_mode, file_list, max_violations, temp_folder, verbose):
+        bulk_import = bulk_import and wipe_db and loading_mode != DELETE_MODE and \
+            self.can_bulk_import(neo4j_uri, file_list)
+        # Journal is only kept when resume is enabled, an interrupted load can be resumed by running it again
+        journal = None
+        if split and resume and not dry_run and not bulk_import:
+            journal = CheckpointJournal(get_journal_file(temp_folder, file_list, loading_mode),
+                                        get_run_signature(file_list, loading_mode), self.log)
+        resuming = bool(journal and journal.resume())
+        if resuming:
+            # Data files haven't changed since they were validated and backed up by the interrupted load
+            self.log.info('Resuming load from checkpoint journal "{}", validation and backup skipped'.format(
+                journal.file_name))
+        elif not self.validate_files(cheat_mode, loading_mode, file_list, max_violations, temp_folder, verbose):
             return False
-        if not no_backup and not dry_run:
+        if not no_backup and not dry_run and not resuming:
             if not neo4j_uri:
                 self.log.error('No Neo4j URI specified for backup, abort loading!')
                 sys.exit(1)
@@ -305,29 +575,64 @@ class DataLoader:
         self.relationships_stat = {}
         self.nodes_deleted_stat = {}
         self.relationships_deleted_stat = {}
+        self.known_nodes = set()
+        self.skip_unchanged = bool(skip_unchanged)
         self.cheat_mode = True
         if not self.driver or not isinstance(self.driver, Driver):
             self.log.error('Invalid Neo4j Python Driver!')
             return False
+        if resuming:
+            if journal.counters:
+                self.restore_counters(journal.counters)
+        elif journal:
+            journal.start()
+        self.journal = journal
+        if bulk_import and self.database_type == NEO4J:
+            # Import replaces the database, so indexes are created after it
+            try:
+                self.bulk_import_neo4j(file_list, temp_folder)
+            except Exception as e:
+                self.log.exception(e)
+                return False
+        if self.database_type == MEMGRAPH and wipe_db and loading_mode != DELETE_MODE and \
+                (self.memgraph_load_profile or bulk_import):
+            wipe_db = self.start_load_profile()
         # Data updates and schema related updates cannot be performed in the same session so multiple will be created
         # Create new session for schema related updates (index creation)
         try:
-            self.indexes_created = create_index(self.driver, self.schema, self.log, self.database_type)
+            self.lookup_keys = self.get_lookup_keys(file_list)
+            self.indexes_created = self.create_indexes()
         except Exception as e:
             self.log.exception(e)
             return False
         # Create new session for data related updates
         with self.driver.session() as session:
+            if bulk_import:
+                # Memgraph loads CSV files after indexes are created, so relationships can find their nodes fast
+                if self.database_type == MEMGRAPH:
+                    self.bulk_import_memgraph(session, file_list, temp_folder, wipe_db)
             # Split Transactions enabled
-            if split:
-                self._load_all(session, file_list, loading_mode, split, wipe_db)
+            elif split:
+                self.use_server_batching = self.server_side_batching and self.check_server_batching(session)
+                try:
+                    self._load_all(session, file_list, loading_mode, split, wipe_db, workers, single_pass)
+                except BaseException:
+                    if self.journal:
+                        self.journal.close()
+                        self.log.error('Loading interrupted, committed batches are recorded in "{}", '
+                                       'use --resume to continue loading'.format(self.journal.file_name))
+                    raise
+                finally:
+                    self.journal = None
+                if journal:
+                    journal.close(remove=True)
 
             # Split Transactions Disabled
             else:
                 # Data updates transaction
                 tx = session.begin_transaction()
                 try:
-                    self._load_all(tx, file_list, loading_mode, split, wipe_db)
+                    self._load_all(tx, file_list, loading_mode, split, wipe_db, single_pass=single_pass)
                     tx.commit()
                 except Exception as e:
                     tx.rollback()
@@ -354,6 +659,9 @@ class DataLoader:
         for rel in sorted(self.relationships_stat.keys()):
             count = self.relationships_stat[rel]
             self.log.info('Relationship: [:{}] loaded: {}'.format(rel, count))
+        if self.skipped_files:
+            self.log.info('{} unchanged file(s) skipped: {}'.format(
+                len(self.skipped_files), ', '.join(os.path.basename(txt) for txt in self.skipped_files)))
         self.log.info('{} new indexes created!'.format(self.indexes_created))
         self.log.info('{} nodes and {} relationships loaded!'.format(self.nodes_created, self.relationships_created))
         self.log.info('{} nodes and {} relationships deleted!'.format(self.nodes_deleted, self.relationships_deleted))
@@ -362,14 +670,48 @@ class DataLoader:
         return {NODES_CREATED: self.nodes_created, RELATIONSHIP_CREATED: self.relationships_created,
                 NODES_DELETED: self.nodes_deleted, RELATIONSHIP_DELETED: self.relationships_deleted, NODES_UPDATED: self.nodes_updated}
 
-    def _load_all(self, tx, file_list, loading_mode, split, wipe_db):
+    def _load_all(self, tx, file_list, loading_mode, split, wipe_db, workers=1, single_pass=False):
         if wipe_db:
-            self.wipe_db(tx, split)
-        for txt in file_list:
-            self.load_nodes(tx, txt, loading_mode, split)
+            # Wiping again when resuming would remove data committed by the interrupted load
+            if self.get_checkpoint('', WIPE_PHASE)[1]:
+                self.log.info('Database already wiped by the interrupted load')
+            else:
+                replaced = self.wipe_db(tx, split, workers)
+                self.checkpoint('', WIPE_PHASE, 0, True)
+                if replaced:
+                    # Session opened before the database was replaced still points to the old database
+                    with self.driver.session() as session:
+                        return self._load_all(session, file_list, loading_mode, split, False, workers, single_pass)
+        waves = [file_list]
         if loading_mode != DELETE_MODE:
+            # Load parents before their children
+            waves = plan_file_waves(file_list, self.schema, self.row_cache, self.log)
+            file_list = [txt for wave in waves for txt in wave]
+            self.log.info('Files will be loaded in {} wave(s): {}'.format(
+                len(waves), ' | '.join(', '.join(os.path.basename(txt) for txt in wave) for wave in waves)))
+        if single_pass:
+            if split and workers > 1:
+                self.load_single_pass_parallel(waves, loading_mode, workers)
+            else:
+                for txt in file_list:
+                    self.load_single_pass(tx, txt, loading_mode, split)
+            return
+        # Parallel loading needs separate transactions, it's only available in split transactions mode
+        if split and workers > 1 and loading_mode != DELETE_MODE:
+            self.load_nodes_parallel(file_list, loading_mode, workers)
+        else:
             for txt in file_list:
-                self.load_relationships(tx, txt, loading_mode, split)
+                self.load_nodes(tx, txt, loading_mode, split)
+        if loading_mode != DELETE_MODE:
+            writer = None
+            if split and workers > 1:
+                writer = RelationshipWriter(self.driver, workers, self.log)
+            try:
+                for txt in file_list:
+                    self.load_relationships(tx, txt, loading_mode, split, writer)
+            finally:
+                if writer:
+                    writer.close()
 
     # Remove extra spaces at beginning and end of the keys and values
     @staticmethod
@@ -385,81 +727,25 @@ class DataLoader:
         node_type = obj.get(NODE_TYPE, None)
         # Cleanup values for Boolean, Int and Float types
         if node_type:
-            df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-            for key, value in obj.items():
-                search_node_type = node_type
-                search_key = key
-                if is_parent_pointer(key):
-                    search_node_type, search_key = key.split('.')
-                elif self.schema.is_relationship_property(key):
-                    search_node_type, search_key = key.split(self.rel_prop_delimiter)
-
-                key_type = self.schema.get_prop_type(search_node_type, search_key)
-                if key_type == 'Boolean':
-                    cleaned_value = None
-                    if isinstance(value, str):
-                        if re.search(r'yes|true', value, re.IGNORECASE):
-                            cleaned_value = True
-                        elif re.search(r'no|false', value, re.IGNORECASE):
-                            cleaned_value = False
-                        else:
-                            self.log.debug('Unsupported Boolean value: "{}"'.format(value))
-                            cleaned_value = None
-                    obj[key] = cleaned_value
-                elif key_type == 'Int':
-                    try:
-                        if value is None:
-                            cleaned_value = None
-                        else:
-                            cleaned_value = int(value)
-                    except ValueError:
-                        cleaned_value = None
-                    obj[key] = cleaned_value
-                elif key_type == 'Float':
-                    try:
-                        if value is None:
-                            cleaned_value = None
-                        else:
-                            cleaned_value = float(value)
-                    except ValueError:
-                        cleaned_value = None
-                    obj[key] = cleaned_value
-                elif key_type == 'Array':
-                    items = self.schema.get_list_values(value)
-                    # todo: need to transform items if item type is not string
-                    obj[key] = json.dumps(items)
-                elif key_type == 'DateTime' or key_type == 'Date':
-                    if value is None:
-                        cleaned_value = None
-                    else:
-                        cleaned_value = reformat_date(value)
-                    obj[key] = cleaned_value
+            plan = self.schema.get_row_plan(node_type, tuple(obj.keys()))
+            for key, converter in plan.converters:
+                obj[key] = converter(obj[key])
+            # Add parent id field(s) into node
+            parent_pointers = plan.parent_pointers if obj[NODE_TYPE] in self.schema.props.save_parent_id else {}
+            extra_props = plan.extra_props
             obj2 = {}
             for key, value in obj.items():
                 obj2[key] = value
-                # Add parent id field(s) into node
-                if obj[NODE_TYPE] in self.schema.props.save_parent_id and is_parent_pointer(key):
-                    header = key.split('.')
-                    if len(header) > 2:
-                        self.log.warning('Column header "{}" has multiple periods!'.format(key))
-                        df_validation_result = self.update_field_validation_result(df_validation_result, file_name, "", "column_header_has_multiple_periods", "warning")
-                        if obj[NODE_TYPE] not in self.df_validation_dict.keys():
-                            self.df_validation_dict[obj[NODE_TYPE]] = df_validation_result
-                        else:
-                            self.df_validation_dict[obj[NODE_TYPE]] = pd.concat([self.df_validation_dict[obj[NODE_TYPE]], df_validation_result])
-                    field_name = header[1]
-                    parent = header[0]
-                    combined = '{}_{}'.format(parent, field_name)
-                    if field_name in obj:
-                        self.log.debug(
-                            '"{}" field is in both current node and parent "{}", use {} instead !'.format(key, parent,
-                                                                                                        combined))
-                        field_name = combined
+                if key in parent_pointers:
                     # Add an value for parent id
-                    obj2[field_name] = value
+                    obj2[parent_pointers[key][2]] = value
                 # Add extra properties if any
-                for extra_prop_name, extra_value in self.schema.get_extra_props(node_type, key, value).items():
-                    obj2[extra_prop_name] = extra_value
+                if key in extra_props:
+                    # For MVP use default unit for all values, and value is same as original value
+                    unit_prop_name, org_prop_name, org_unit_prop_name, default_unit = extra_props[key]
+                    obj2[unit_prop_name] = default_unit
+                    obj2[org_prop_name] = value
+                    obj2[org_unit_prop_name] = default_unit
 
             if UUID not in obj2:
                 id_field = self.schema.get_id_field(obj2)
@@ -476,12 +762,7 @@ class DataLoader:
         elif not self.cheat_mode:
             self.log.error('No "type" column in file')
             #sys.exit(1)
-            df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-            df_validation_result = self.update_field_validation_result(df_validation_result, file_name, "", "type_column_missing", "error")
-            if OTHER not in self.df_validation_dict.keys():
-                self.df_validation_dict[OTHER] = df_validation_result
-            else:
-                self.df_validation_dict[OTHER] = pd.concat([self.df_validation_dict[OTHER], df_validation_result])
+            self.violations.add(OTHER, file_name, "", "type_column_missing", "error")
             self.skip_validation_flag = True
             return obj
         else: #if enable cheat mode and bypass the validation
@@ -502,28 +783,23 @@ class DataLoader:
             self.log.error('Invalid Neo4j Python Driver!')
             return False
         with self.driver.session() as session:
-            file_encoding = check_encoding(file_name)
-            with open(file_name, encoding=file_encoding) as in_file:
-                self.log.info('Validating relationships in file "{}" ...'.format(file_name))
-                reader = csv.DictReader(in_file, delimiter='\t')
-                line_num = 1
-                validation_failed = False
-                violations = 0
-                for org_obj in reader:
-                    obj = self.prepare_node(org_obj, file_name)
-                    line_num += 1
-                    # Validate parent exist
-                    if CASE_ID in obj:
-                        case_id = obj[CASE_ID]
-                        if not self.node_exists(session, CASE_NODE, CASE_ID, case_id):
-                            self.log.error(
-                                'Invalid data at line {}: Parent (:{} {{ {}: "{}" }}) does not exist!'.format(
-                                    line_num, CASE_NODE, CASE_ID, case_id))
-                            validation_failed = True
-                            violations += 1
-                            if violations >= max_violations:
-                                return False
-                return not validation_failed
+            self.log.info('Validating relationships in file "{}" ...'.format(file_name))
+            validation_failed = False
+            violations = 0
+            for line_num, org_obj in self.row_cache.get_file(file_name).rows():
+                obj = self.prepare_node(org_obj, file_name)
+                # Validate parent exist
+                if CASE_ID in obj:
+                    case_id = obj[CASE_ID]
+                    if not self.node_exists(session, CASE_NODE, CASE_ID, case_id):
+                        self.log.error(
+                            'Invalid data at line {}: Parent (:{} {{ {}: "{}" }}) does not exist!'.format(
+                                line_num, CASE_NODE, CASE_ID, case_id))
+                        validation_failed = True
+                        violations += 1
+                        if violations >= max_violations:
+                            return False
+            return not validation_failed
 
     # Validate all parents exist in a data (TSV/TXT) file
     def validate_parents_exist_in_file(self, file_name, max_violations):
@@ -531,17 +807,15 @@ class DataLoader:
             self.log.error('Invalid Neo4j Python Driver!')
             return False
         with self.driver.session() as session:
-            file_encoding = check_encoding(file_name)
-            with open(file_name, encoding=file_encoding) as in_file:
-                self.log.info('Validating relationships in file "{}" ...'.format(file_name))
-                reader = csv.DictReader(in_file, delimiter='\t')
-                line_num = 1
-                validation_failed = False
-                violations = 0
-                for org_obj in reader:
-                    line_num += 1
-                    obj = self.prepare_node(org_obj, file_name)
-                    results = self.collect_relationships(obj, session, False, line_num)
+            self.log.info('Validating relationships in file "{}" ...'.format(file_name))
+            validation_failed = False
+            violations = 0
+            rows = ((line_num, self.prepare_node(org_obj, file_name))
+                    for line_num, org_obj in self.row_cache.get_file(file_name).rows())
+            for batch in iter_batches(rows, BATCH_SIZE):
+                missing_nodes = self.prefetch_parents(session, [obj for _, obj in batch])
+                for line_num, obj in batch:
+                    results = self.collect_relationships(obj, session, False, line_num, missing_nodes)
                     relationships = results[RELATIONSHIPS]
                     provided_parents = results[PROVIDED_PARENTS]
                     if provided_parents > 0:
@@ -569,6 +843,8 @@ class DataLoader:
                 continue
             elif self.schema.is_relationship_property(key):
                 continue
+            elif key == CONTENT_HASH and self.skip_unchanged:
+                continue
             else:
                 node[key] = value
 
@@ -576,247 +852,184 @@ class DataLoader:
 
     # Validate the field names
     def validate_field_name(self, file_name):
-        df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
-            row = next(reader)
-            row = self.cleanup_node(row)
-            row_prepare_node = self.prepare_node(row, file_name)
-            if self.skip_validation_flag:
-                return False
-            parent_pointer = []
-            for key in row_prepare_node.keys():
-                if is_parent_pointer(key):
-                    parent_pointer.append(key)
-            error_list = []
-            parent_error_list = []
-            for key in row.keys():
-                if key not in parent_pointer:
-                    try:
-                        if key not in self.schema.get_props_for_node(row['type']) and key != 'type':
-                            error_list.append(key)
-                    except:
+        row = self.row_cache.get_file(file_name).first_row()
+        if row is None:
+            self.log.warning('File "{}" has no data rows'.format(file_name))
+            return True
+        row_prepare_node = self.prepare_node(row, file_name)
+        if self.skip_validation_flag:
+            return False
+        if self.skip_unchanged and CONTENT_HASH in row:
+            self.log.error('Column "{}" is reserved for content hash when skip_unchanged is enabled, abort loading!'
+                           .format(CONTENT_HASH))
+            self.violations.add(row[NODE_TYPE], file_name, CONTENT_HASH, "reserved_property", "error")
+            return False
+        parent_pointer = []
+        for key in row_prepare_node.keys():
+            if is_parent_pointer(key):
+                parent_pointer.append(key)
+        error_list = []
+        parent_error_list = []
+        for key in row.keys():
+            if key not in parent_pointer:
+                try:
+                    if key not in self.schema.get_props_for_node(row['type']) and key != 'type':
                         error_list.append(key)
-                else:
-                    try:
-                        if key.split('.')[1] not in self.schema.get_props_for_node(key.split('.')[0]):
-                            parent_error_list.append(key)
-                    except:
-                        parent_error_list.append(key)
-            if len(error_list) > 0:
-                for error_field_name in error_list:
-                    self.log.warning('Property: "{}" not found in data model'.format(error_field_name))
-                    df_validation_result = self.update_field_validation_result(df_validation_result, file_name, error_field_name, "property_not_found_in_model", "warning")
-            if len(parent_error_list) > 0:
-                for parent_error_field_name in parent_error_list:
-                    self.log.error('Parent pointer: "{}" not found in data model'.format(parent_error_field_name))
-                    df_validation_result = self.update_field_validation_result(df_validation_result, file_name, parent_error_field_name, "parent_pointer_not_found_in_model", "error")
-                if len(df_validation_result) > 0:
-                    if row[NODE_TYPE] not in self.df_validation_dict.keys():
-                        self.df_validation_dict[row[NODE_TYPE]] = df_validation_result
-                    else:
-                        self.df_validation_dict[row[NODE_TYPE]] = pd.concat([self.df_validation_dict[row[NODE_TYPE]], df_validation_result])
-                self.log.error('Parent pointer not found in the data model, abort loading!')
-                return False
-        if len(df_validation_result) > 0:
-            if row[NODE_TYPE] not in self.df_validation_dict.keys():
-                    self.df_validation_dict[row[NODE_TYPE]] = df_validation_result
+                except:
+                    error_list.append(key)
             else:
-                self.df_validation_dict[row[NODE_TYPE]] = pd.concat([self.df_validation_dict[row[NODE_TYPE]], df_validation_result])
+                try:
+                    if key.split('.')[1] not in self.schema.get_props_for_node(key.split('.')[0]):
+                        parent_error_list.append(key)
+                except:
+                    parent_error_list.append(key)
+        if len(error_list) > 0:
+            for error_field_name in error_list:
+                self.log.warning('Property: "{}" not found in data model'.format(error_field_name))
+                self.violations.add(row[NODE_TYPE], file_name, error_field_name, "property_not_found_in_model", "warning")
+        if len(parent_error_list) > 0:
+            for parent_error_field_name in parent_error_list:
+                self.log.error('Parent pointer: "{}" not found in data model'.format(parent_error_field_name))
+                self.violations.add(row[NODE_TYPE], file_name, parent_error_field_name, "parent_pointer_not_found_in_model", "error")
+            self.log.error('Parent pointer not found in the data model, abort loading!')
+            return False
         return True
-    # update field validation result
-    def update_field_validation_result(self, df_validation_result, file_name, error_field_name, reason, severity):
-        tmp_df_validation_result_field = pd.DataFrame()
-        tmp_df_validation_result_field['File Name'] = [os.path.basename(file_name)]
-        tmp_df_validation_result_field['Property'] = [error_field_name]
-        tmp_df_validation_result_field['Reason'] =  [reason]
-        tmp_df_validation_result_field['Severity'] = [severity]
-        df_validation_result = pd.concat([df_validation_result, tmp_df_validation_result_field])
-        return df_validation_result
     # Validate file
-    def validate_file(self, file_name, max_violations, verbose):
+    def validate_file(self, file_name, max_violations, verbose, report_writer=None):
+        """
+        :param report_writer: ReportWriter, if given, violations are written into it every VIOLATION_FLUSH_ROWS rows,
+        otherwise they are kept in self.violations
+        :return: True if file is valid
+        """
         self.skip_validation_flag = False
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            self.log.info('Validating file "{}" ...'.format(file_name))
-            reader = csv.DictReader(in_file, delimiter='\t')
-            line_num = 1
-            validation_failed = False
-            violations = 0
-            ids = {}
-            df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-            field_validation_result = self.validate_field_name(file_name)
-            if not field_validation_result:
-                return False
-            df_invalid = pd.DataFrame(columns=['invalid_properties', 'invalid_values', 'invalid_reason', 'invalid_line_num', 'node_type'])
-            df_missing = pd.DataFrame(columns=['missing_properties', 'missing_reason', 'missing_line_num', 'node_type'])
-            df_duplicate_id = pd.DataFrame(columns=['duplicate_id', 'duplicate_reason', 'duplicate_id_field', 'duplicate_line_num', 'node_type'])
-            duplicate_id = []
-            duplicate_reason = []
-            duplicate_line_num = []
-            duplicate_node_type = []
-            duplicate_id_field = []
-            for org_obj in reader:
-                obj = self.cleanup_node(org_obj)
-                props = self.get_node_properties(obj)
-                line_num += 1
-                id_field = self.schema.get_id_field(obj)
-                node_id = self.schema.get_id(obj)
-
-                if node_id:
-                    if node_id in ids:
-                        if get_props_signature(props) != ids[node_id]['props']:
-                            validation_failed = True
-                            self.log.error(
-                                f'Invalid data at line {line_num}: duplicate {id_field}: {node_id}, found in line: '
-                                f'{", ".join(ids[node_id]["lines"])}')
-                            ids[node_id]['lines'].append(str(line_num))
-                            duplicate_id.append(node_id)
-                            duplicate_reason.append('duplicate_id')
-                            duplicate_line_num.append(line_num)
-                            duplicate_node_type.append(obj[NODE_TYPE])
-                            duplicate_id_field.append(id_field)
-                        else:
-                            # Same ID exists in same file, but properties are also same, probably it's pointing same
-                            # object to multiple parents
-                            self.log.debug(
-                                f'Duplicated data at line {line_num}: duplicate {id_field}: {node_id}, found in line: '
-                                f'{", ".join(ids[node_id]["lines"])}')
-                            duplicate_id.append(node_id)
-                            duplicate_reason.append('many_to_many')
-                            duplicate_line_num.append(line_num)
-                            duplicate_node_type.append(obj[NODE_TYPE])
-                            duplicate_id_field.append(id_field)
+        cached_file = self.row_cache.get_file(file_name)
+        self.log.info('Validating file "{}" ...'.format(file_name))
+        validation_failed = False
+        violations = 0
+        ids = {}
+        field_validation_result = self.validate_field_name(file_name)
+        if not field_validation_result:
+            return False
+        # Line numbers grouped by (property, value, reason)
+        invalid_groups = LineGroups()
+        missing_groups = LineGroups()
+        # Line numbers grouped by (id, reason, id field)
+        duplicate_groups = LineGroups()
+        node_type = None
+        for line_num, obj in cached_file.rows():
+            props = self.get_node_properties(obj)
+            id_field = self.schema.get_id_field(obj)
+            node_id = self.schema.get_id(obj)
+
+            if node_id:
+                if node_id in ids:
+                    if get_props_signature(props) != ids[node_id]['props']:
+                        validation_failed = True
+                        self.log.error(
+                            f'Invalid data at line {line_num}: duplicate {id_field}: {node_id}, found in line: '
+                            f'{", ".join(ids[node_id]["lines"])}')
+                        ids[node_id]['lines'].append(str(line_num))
+                        duplicate_groups.add((node_id, 'duplicate_id', id_field), line_num)
                     else:
-                        ids[node_id] = {'props': get_props_signature(props), 'lines': [str(line_num)]}
-
-                validate_result = self.schema.validate_node(obj[NODE_TYPE], obj, verbose)
-                try:
-                    if len(validate_result['invalid_properties']) > 0:
-                        tmp_df_invalid = pd.DataFrame()
-                        tmp_df_invalid['invalid_properties'] = validate_result['invalid_properties']
-                        tmp_df_invalid['invalid_values'] = validate_result['invalid_values']
-                        tmp_df_invalid['invalid_reason'] = validate_result['invalid_reason']
-                        tmp_df_invalid['invalid_line_num'] = line_num
-                        tmp_df_invalid['node_type'] = obj[NODE_TYPE]
-                        df_invalid = pd.concat([df_invalid,tmp_df_invalid])
-
-                except Exception as e:
-                    print(e)
-                try:
-                    if len(validate_result['missing_properties']) > 0:
-                        tmp_df_missing = pd.DataFrame()
-                        tmp_df_missing['missing_properties'] = validate_result['missing_properties']
-                        tmp_df_missing['missing_reason'] = validate_result['missing_reason']
-                        tmp_df_missing['missing_line_num'] = line_num
-                        tmp_df_missing['node_type'] = obj[NODE_TYPE]
-                        df_missing = pd.concat([df_missing, tmp_df_missing])
-                except Exception as e:
-                    print(e)
-                if not validate_result['result'] and not validate_result['warning']:
-                    for msg in validate_result['messages']:
-                        self.log.error('Invalid data at line {}: "{}"!'.format(line_num, msg))
-                    validation_failed = True
-                    violations += 1
-                    if violations >= max_violations:
-                        #return False, df_validation_dict
-                        break
-                elif not validate_result['result'] and validate_result['warning']:
-                    for msg in validate_result['messages']:
-                        self.log.warning('Invalid data at line {}: "{}"!'.format(line_num, msg))
-            # ouput the data vlidation result
-            df_duplicate_id['duplicate_id'] = duplicate_id
-            df_duplicate_id['duplicate_reason'] = duplicate_reason
-            df_duplicate_id['duplicate_line_num'] = duplicate_line_num
-            df_duplicate_id['node_type'] = duplicate_node_type
-            df_duplicate_id['duplicate_id_field'] = duplicate_id_field
-            ''''''
-            if len(df_invalid) > 0:
-                df_invalid = df_invalid.sort_values(by=['invalid_properties'])
-                df_invalid = df_invalid.explode('invalid_line_num').groupby(['invalid_properties', 'invalid_values', 'invalid_reason', 'node_type'])['invalid_line_num'].unique().reset_index()
-                tmp_df_validation_result_invalid = pd.DataFrame()
-                tmp_df_validation_result_invalid['File Name'] = [os.path.basename(file_name)] * len(df_invalid)
-                tmp_df_validation_result_invalid['Property'] = df_invalid['invalid_properties']
-                tmp_df_validation_result_invalid['Value'] =  df_invalid['invalid_values']
-                tmp_df_validation_result_invalid['Reason'] =  df_invalid['invalid_reason']
-                tmp_df_validation_result_invalid['Line Numbers'] = self.convert_line_num_list(list(df_invalid['invalid_line_num']))
-                tmp_df_validation_result_invalid['Severity'] = ["error"] * len(df_invalid)
-                df_validation_result = pd.concat([df_validation_result, tmp_df_validation_result_invalid])
-            if len(df_missing) >0:
-                df_missing = df_missing.sort_values(by=['missing_properties'])
-                df_missing = df_missing.explode('missing_line_num').groupby(['missing_properties', 'missing_reason', 'node_type'])['missing_line_num'].unique().reset_index()
-                tmp_df_validation_result_missing = pd.DataFrame()
-                tmp_df_validation_result_missing['File Name'] = [os.path.basename(file_name)] * len(df_missing)
-                tmp_df_validation_result_missing['Property'] = df_missing['missing_properties']
-                tmp_df_validation_result_missing['Reason'] =  df_missing['missing_reason']
-                tmp_df_validation_result_missing['Line Numbers'] = self.convert_line_num_list(list(df_missing['missing_line_num']))
-                tmp_df_validation_result_missing['Severity'] = ["error"] * len(df_missing)
-                df_validation_result = pd.concat([df_validation_result, tmp_df_validation_result_missing])
-            if len(df_duplicate_id) > 0:
-                df_duplicate_id = df_duplicate_id.explode('duplicate_line_num').groupby(['duplicate_id', 'duplicate_reason', 'duplicate_id_field', 'node_type'])['duplicate_line_num'].unique().reset_index()
-                tmp_df_validation_result_duplicate= pd.DataFrame()
-                tmp_df_validation_result_duplicate['File Name'] = [os.path.basename(file_name)] * len(df_duplicate_id)
-                tmp_df_validation_result_duplicate['Property'] = df_duplicate_id['duplicate_id_field']
-                tmp_df_validation_result_duplicate['Value'] = df_duplicate_id['duplicate_id']
-                tmp_df_validation_result_duplicate['Reason'] = df_duplicate_id['duplicate_reason']
-                tmp_df_validation_result_duplicate['Line Numbers'] = self.convert_line_num_list(list(df_duplicate_id['duplicate_line_num']))
-                tmp_df_validation_result_duplicate['Severity'] = ["error"] * len(df_duplicate_id)
-                df_validation_result = pd.concat([df_validation_result, tmp_df_validation_result_duplicate])
-            if len(df_validation_result) > 0:
-                if obj[NODE_TYPE] not in self.df_validation_dict.keys():
-                    self.df_validation_dict[obj[NODE_TYPE]] = df_validation_result
-                else:
-                    self.df_validation_dict[obj[NODE_TYPE]] = pd.concat([self.df_validation_dict[obj[NODE_TYPE]], df_validation_result])
-            return not validation_failed
-
-    def convert_line_num_list(self, line_num_list):
-        if len(line_num_list) > 0:
-            new_line_num_list = []
-            for line_num in line_num_list:
-                line_num.sort()
-                line_num_str = [str(x) for x in line_num]
-                if len(line_num) > 1:
-                    new_line_num_list.append(','.join(line_num_str))
+                        # Same ID exists in same file, but properties are also same, probably it's pointing same
+                        # object to multiple parents
+                        self.log.debug(
+                            f'Duplicated data at line {line_num}: duplicate {id_field}: {node_id}, found in line: '
+                            f'{", ".join(ids[node_id]["lines"])}')
+                        duplicate_groups.add((node_id, 'many_to_many', id_field), line_num)
                 else:
-                    new_line_num_list.append(line_num_str[0])
-            return new_line_num_list
-        else:
-            return line_num_list
+                    ids[node_id] = {'props': get_props_signature(props), 'lines': [str(line_num)]}
 
-    def get_new_statement(self, node_type, obj):
-        # statement is used to create current node
-        prop_stmts = []
+            node_type = obj[NODE_TYPE]
+            validate_result = self.schema.validate_node(obj[NODE_TYPE], obj, verbose)
+            try:
+                for prop, value, reason in zip(validate_result['invalid_properties'], validate_result['invalid_values'],
+                                               validate_result['invalid_reason']):
+                    invalid_groups.add((prop, value, reason), line_num)
+            except Exception as e:
+                self.log.exception(e)
+            try:
+                for prop, reason in zip(validate_result['missing_properties'], validate_result['missing_reason']):
+                    missing_groups.add((prop, None, reason), line_num)
+            except Exception as e:
+                self.log.exception(e)
+            if report_writer and line_num % VIOLATION_FLUSH_ROWS == 0:
+                # Lines of a violation in different chunks are reported in separate rows
+                self.add_violation_groups(node_type, file_name, invalid_groups, missing_groups, duplicate_groups)
+                self.violations.flush(report_writer)
+                invalid_groups = LineGroups()
+                missing_groups = LineGroups()
+                duplicate_groups = LineGroups()
+            if not validate_result['result'] and not validate_result['warning']:
+                for msg in validate_result['messages']:
+                    self.log.error('Invalid data at line {}: "{}"!'.format(line_num, msg))
+                validation_failed = True
+                violations += 1
+                if violations >= max_violations:
+                    #return False, df_validation_dict
+                    break
+            elif not validate_result['result'] and validate_result['warning']:
+                for msg in validate_result['messages']:
+                    self.log.warning('Invalid data at line {}: "{}"!'.format(line_num, msg))
+        # ouput the data vlidation result
+        self.add_violation_groups(node_type, file_name, invalid_groups, missing_groups, duplicate_groups)
+        return not validation_failed
 
-        for key in obj.keys():
-            if key in excluded_fields:
-                continue
-            elif is_parent_pointer(key):
-                continue
-            elif self.schema.is_relationship_property(key):
-                continue
+    def add_violation_groups(self, node_type, file_name, invalid_groups, missing_groups, duplicate_groups):
+        """
+        Add grouped violations of a data file into self.violations
+        """
+        self.violations.add_groups(node_type, file_name, invalid_groups, "error")
+        self.violations.add_groups(node_type, file_name, missing_groups, "error")
+        for (node_id, reason, id_field), line_numbers in duplicate_groups.items():
+            self.violations.add(node_type, file_name, id_field, reason, "error", node_id,
+                                format_line_numbers(line_numbers))
+
+    def get_new_statement(self, node_type, id_field, obj):
+        shape = self.get_statement_shape(id_field, obj)
+        cache_key = (NEW_MODE, node_type, id_field, shape, self.database_type)
+        statement = self.statement_cache.get(cache_key)
+        if statement is None:
+            # statement is used to create current node
+            prop_stmts = ['{0}: record.{0}'.format(key) for key in [id_field] + sorted(shape)]
+            statement = BATCH_PREFIX
+            statement += 'CREATE (:{0} {{ {1} }})'.format(node_type, ' ,'.join(prop_stmts))
+            self.statement_cache[cache_key] = statement
+        return statement
 
-            prop_stmts.append('{0}: ${0}'.format(key))
+    def get_statement_shape(self, id_field, obj):
+        """
+        Get property columns set by upsert statement, rows with same keys share the same shape
+        :param id_field: id field of the node
+        :param obj: prepared row
+        :return: frozenset of property names
+        """
+        keys = tuple(obj.keys())
+        shape = self.statement_shapes.get((id_field, keys, self.skip_unchanged))
+        if shape is None:
+            # Content hash is not a node property in data model, it's set by upsert statement on its own
+            excluded = excluded_fields | {CONTENT_HASH} if self.skip_unchanged else excluded_fields
+            shape = frozenset(key for key in keys if key not in excluded and key != id_field and
+                              not is_parent_pointer(key) and not self.schema.is_relationship_property(key))
+            self.statement_shapes[(id_field, keys, self.skip_unchanged)] = shape
+        return shape
 
-        statement = 'CREATE (:{0} {{ {1} }})'.format(node_type, ' ,'.join(prop_stmts))
+    def get_upsert_statement(self, node_type, id_field, obj):
+        shape = self.get_statement_shape(id_field, obj)
+        cache_key = (node_type, id_field, shape, self.database_type, self.skip_unchanged)
+        statement = self.statement_cache.get(cache_key)
+        if statement is None:
+            statement = self.build_upsert_statement(node_type, id_field, shape)
+            self.statement_cache[cache_key] = statement
         return statement
 
-    def get_upsert_statement(self, node_type, id_field, obj):
+    def build_upsert_statement(self, node_type, id_field, props):
         # statement is used to create current node
-        statement = 'WITH $batch as batch UNWIND batch as record '
-        prop_stmts = []
-
-        for key in obj.keys():
-            if key in excluded_fields:
-                continue
-            elif key == id_field:
-                continue
-            elif is_parent_pointer(key):
-                continue
-            elif self.schema.is_relationship_property(key):
-                continue
-
-            prop_stmts.append('n.{0} = record.{0}'.format(key))
+        statement = BATCH_PREFIX
+        # Sorted so same set of properties always generates same statement
+        prop_stmts = ['n.{0} = record.{0}'.format(key) for key in sorted(props)]
+        if self.skip_unchanged:
+            prop_stmts.append('n.{0} = record.{0}'.format(CONTENT_HASH))
         statement += 'MERGE (n:{0} {{ {1}: record.{1} }})'.format(node_type, id_field)
         if self.database_type == NEO4J:
             statement += ' ON CREATE ' + 'SET n.{} = datetime(), '.format(CREATED) + ' ,'.join(prop_stmts)
@@ -828,69 +1041,316 @@ class DataLoader:
             raise Exception('Unsupported database type: {}'.format(self.database_type))
         return statement
 
-    # Delete a node and children with no other parents recursively
-    def delete_node(self, session, node):
-        delete_queue = deque([node])
-        node_deleted = 0
-        relationship_deleted = 0
-        while len(delete_queue) > 0:
-            root = delete_queue.popleft()
-            delete_queue.extend(self.get_children_with_single_parent(session, root))
-            n_deleted, r_deleted = self.delete_single_node(session, root)
-            node_deleted += n_deleted
-            relationship_deleted += r_deleted
-        return node_deleted, relationship_deleted
-
-    # Return children of node without other parents
-    def get_children_with_single_parent(self, session, node):
-        node_type = node[NODE_TYPE]
-        statement = 'MATCH (n:{0} {{ {1}: ${1} }})<--(m)'.format(node_type, self.schema.get_id_field(node))
-        #statement += ' WHERE NOT (n)<--(m)-->() RETURN m'
-        statement += ' WHERE NOT EXISTS((n)<--(m)-->()) RETURN m'
-        result = session.run(statement, node)
-        children = []
-        for obj in result:
-            children.append(self.get_node_from_result(obj, 'm'))
-        return children
+    def delete_nodes(self, session, file_name):
+        """
+        Delete nodes in a file, and their descendants with no other parents, level by level.
+        In split transactions mode session is a Session, every statement runs in its own transaction
+        :param session: Neo4j session or transaction
+        :param file_name: delete file
+        :return: number of nodes and relationships deleted
+        """
+        cached_file = self.row_cache.get_file(file_name)
+        nodes_deleted = 0
+        relationships_deleted = 0
+        rows = cached_file.prepared_rows(lambda row: self.prepare_node(row, file_name))
+        for batch in iter_batches(rows, BATCH_SIZE):
+            roots = {}
+            for line_num, obj in batch:
+                if not self.schema.get_id(obj):
+                    raise Exception('Line:{}: No ids found!'.format(line_num))
+                id_field = self.schema.get_id_field(obj)
+                roots.setdefault((obj[NODE_TYPE], id_field), set()).add(obj[id_field])
+            frontier = {}
+            for (label, id_field), values in roots.items():
+                frontier.update(self.find_node_ids(session, label, id_field, values))
+            while frontier:
+                children = self.get_orphan_children(session, frontier)
+                n_deleted, r_deleted = self.delete_nodes_by_id(session, frontier)
+                nodes_deleted += n_deleted
+                relationships_deleted += r_deleted
+                frontier = children
+        return nodes_deleted, relationships_deleted
 
     @staticmethod
-    def get_node_from_result(record, name):
-        node = record.data()[name]
-        result = dict(node.items())
-        for label in record[0].labels:
-            result[NODE_TYPE] = label
-            break
-        return result
-
-    # Simple delete given node, and it's relationships
-    def delete_single_node(self, session, node):
-        node_type = node[NODE_TYPE]
-        statement = 'MATCH (n:{0} {{ {1}: ${1} }}) detach delete n'.format(node_type, self.schema.get_id_field(node))
-        result = session.run(statement, node)
-        nodes_deleted = result.consume().counters.nodes_deleted
-        self.nodes_deleted += nodes_deleted
-        self.nodes_deleted_stat[node_type] = self.nodes_deleted_stat.get(node_type, 0) + nodes_deleted
-        relationship_deleted = result.consume().counters.relationships_deleted
-        self.relationships_deleted += relationship_deleted
-        return nodes_deleted, relationship_deleted
+    def find_node_ids(session, label, id_field, values):
+        """
+        :return: dict of internal id to label of nodes found
+        """
+        statement = 'UNWIND $values AS value MATCH (n:{0} {{ {1}: value }}) RETURN id(n) AS id'.format(label, id_field)
+        found = {}
+        for chunk in iter_batches(values, BATCH_SIZE):
+            for record in session.run(statement, values=chunk):
+                found[record['id']] = label
+        return found
+
+    @staticmethod
+    def get_orphan_children(session, frontier):
+        """
+        Find children which would have no parents once the frontier is deleted
+        :param session: Neo4j session or transaction
+        :param frontier: dict of internal id to label of nodes to be deleted
+        :return: dict of internal id to label of children to be deleted next
+        """
+        statement = 'UNWIND $ids AS id MATCH (n)<--(m) WHERE id(n) = id WITH DISTINCT m MATCH (m)-->(p)'
+        statement += ' RETURN id(m) AS id, head(labels(m)) AS label, collect(DISTINCT id(p)) AS parents'
+        children = {}
+        for chunk in iter_batches(frontier.keys(), BATCH_SIZE):
+            for record in session.run(statement, ids=chunk):
+                if all(parent in frontier for parent in record['parents']):
+                    children[record['id']] = record['label']
+        return children
+
+    def delete_nodes_by_id(self, session, nodes):
+        """
+        Detach delete nodes in chunks, one statement per label, so nodes deleted of each label are counted by
+        the database
+        :param session: Neo4j session or transaction
+        :param nodes: dict of internal id to label
+        :return: number of nodes and relationships deleted
+        """
+        statement = 'UNWIND $ids AS id MATCH (n) WHERE id(n) = id DETACH DELETE n'
+        ids_by_label = {}
+        for node_id, label in nodes.items():
+            ids_by_label.setdefault(label, []).append(node_id)
+        nodes_deleted = 0
+        relationships_deleted = 0
+        for label, ids in ids_by_label.items():
+            for chunk in iter_batches(ids, BATCH_SIZE):
+                counters = session.run(statement, ids=chunk).consume().counters
+                nodes_deleted += counters.nodes_deleted
+                relationships_deleted += counters.relationships_deleted
+                with self.stat_lock:
+                    self.nodes_deleted_stat[label] = self.nodes_deleted_stat.get(label, 0) + counters.nodes_deleted
+        with self.stat_lock:
+            self.nodes_deleted += nodes_deleted
+            self.relationships_deleted += relationships_deleted
+        return nodes_deleted, relationships_deleted
 
     # get node count
-    def node_count(self, result, node_type, nodes_created, nodes_updated, batch_obj_list):
-        count = result.consume().counters.nodes_created
+    def node_count(self, counters, node_type, nodes_created, nodes_updated, batch_obj_list):
+        count = counters.nodes_created
         update_count = 0
-        self.nodes_created += count
         nodes_created += count
         batch_length = len(batch_obj_list)
-        if result.consume().counters.nodes_created != batch_length and result.consume().counters.nodes_deleted != batch_length:
-            update_count = batch_length - result.consume().counters.nodes_created
+        if counters.nodes_created != batch_length and counters.nodes_deleted != batch_length:
+            update_count = batch_length - counters.nodes_created
         nodes_updated += update_count
-        self.nodes_updated += update_count
-        self.nodes_stat[node_type] = self.nodes_stat.get(node_type, 0) + count
-        self.nodes_stat_updated[node_type] = self.nodes_stat_updated.get(node_type, 0) + update_count
+        with self.stat_lock:
+            self.nodes_created += count
+            self.nodes_updated += update_count
+            self.nodes_stat[node_type] = self.nodes_stat.get(node_type, 0) + count
+            self.nodes_stat_updated[node_type] = self.nodes_stat_updated.get(node_type, 0) + update_count
         return nodes_created, nodes_updated
 
+    def check_new_nodes(self, session, batches, new_node_lines):
+        """
+        Make sure none of the nodes in a batch exists, with one query per node type and id field
+        :param session: Neo4j session or transaction
+        :param batches: dict of statement to list of rows
+        :param new_node_lines: dict of (node type, id) to line number
+        """
+        ids = {}
+        for batch_obj_list in batches.values():
+            for obj in batch_obj_list:
+                id_field = self.schema.get_id_field(obj)
+                ids.setdefault((obj[NODE_TYPE], id_field), []).append(obj[id_field])
+        existing = []
+        for (node_type, id_field), values in ids.items():
+            for node_id in self.nodes_exist(session, node_type, id_field, values):
+                existing.append((new_node_lines.get((node_type, node_id)), node_type, id_field, node_id))
+        if existing:
+            existing.sort(key=lambda node: node[0] or 0)
+            for line_num, node_type, id_field, node_id in existing:
+                self.log.error('Line: {}: Node (:{} {{ {}: {} }}) exists!'.format(line_num, node_type, id_field,
+                                                                                  node_id))
+            line_num, node_type, id_field, node_id = existing[0]
+            raise Exception(
+                'Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type, id_field,
+                                                                                  node_id))
+
+    def execute_node_batches(self, tx, batches, nodes_created, nodes_updated, managed=False, batcher=None,
+                             in_transactions=False):
+        """
+        Run node statements of a batch, and count created and updated nodes
+        :param tx: transaction or session, must be a session if managed or in_transactions is True
+        :param batches: dict of statement to list of rows
+        :param nodes_created: nodes created so far in current file
+        :param nodes_updated: nodes updated so far in current file
+        :param managed: run each statement in its own managed write transaction
+        :param batcher: AdaptiveBatcher of current file, shrunk when a managed transaction hits memory limits
+        :param in_transactions: run each statement with CALL { } IN TRANSACTIONS
+        :return: updated nodes_created and nodes_updated
+        """
+        # Nodes are only counted after all statements succeeded, so nothing is counted for a failed batch
+        results = [(batch_obj_list, self.execute_batch(tx, statement, batch_obj_list, managed, batcher,
+                                                       in_transactions))
+                   for statement, batch_obj_list in batches.items()]
+        for batch_obj_list, counters in results:
+            node_type = batch_obj_list[0][NODE_TYPE]
+            nodes_created, nodes_updated = self.node_count(counters, node_type, nodes_created, nodes_updated,
+                                                           batch_obj_list)
+            self.remember_nodes(batch_obj_list)
+        return nodes_created, nodes_updated
+
+    def commit_node_batches(self, session, tx, batches, nodes_created, nodes_updated, managed, batcher):
+        """
+        Run and commit node statements of a batch in split transactions mode, and adjust batch size by time used.
+        A transaction which hits memory limits is rolled back, and the batch is written again in managed transactions
+        which split it until it fits
+        :param session: Neo4j session
+        :param tx: current transaction, or the session if managed is True
+        :return: updated nodes_created and nodes_updated
+        """
+        start_time = timer()
+        rows = sum(len(objs) for objs in batches.values())
+        try:
+            nodes_created, nodes_updated = self.execute_node_batches(tx, batches, nodes_created, nodes_updated,
+                                                                     managed, batcher)
+            if not managed:
+                tx.commit()
+        except Neo4jError as e:
+            if managed or not is_memory_error(e):
+                raise
+            tx.close()
+            # Batches prepared before batch size was reduced may be larger than current batch size
+            if rows <= batcher.size:
+                batcher.shrink()
+            self.log.warning('Batch exceeded memory limit, batch size reduced to {}'.format(batcher.size))
+            nodes_created, nodes_updated = self.execute_node_batches(session, batches, nodes_created, nodes_updated,
+                                                                     True, batcher)
+        batcher.record(timer() - start_time, rows)
+        return nodes_created, nodes_updated
+
+    def execute_batch(self, tx, statement, batch, managed=False, batcher=None, in_transactions=False):
+        """
+        Run a batch statement
+        :param tx: transaction or session, must be a session if managed or in_transactions is True
+        :param statement: Cypher statement, batch is passed in as $batch
+        :param batch: list of records
+        :param managed: run the statement in its own managed write transaction, which is retried on transient errors,
+        and split in halves if it hits memory limits
+        :param batcher: AdaptiveBatcher to shrink when a batch is split
+        :param in_transactions: run the statement in an auto-commit transaction, and let the server commit every
+        server_chunk_size rows
+        :return: counters of the statement
+        """
+        if in_transactions:
+            return run_batch_in_transactions(tx, statement, batch, self.server_chunk_size)
+        if managed:
+            try:
+                return tx.write_transaction(run_batch, statement, batch)
+            except Neo4jError as e:
+                if not is_memory_error(e) or len(batch) <= 1:
+                    raise
+                if batcher and len(batch) <= batcher.size:
+                    batcher.shrink()
+                half = len(batch) // 2
+                self.log.warning('Batch of {} rows exceeded memory limit, split in halves'.format(len(batch)))
+                return SummedCounters(self.execute_batch(tx, statement, batch[:half], managed, batcher),
+                                      self.execute_batch(tx, statement, batch[half:], managed, batcher))
+        return run_batch(tx, statement, batch)
+
+    def load_nodes_parallel(self, file_list, loading_mode, workers):
+        """
+        Load nodes from multiple files concurrently, each worker uses its own session and managed transactions.
+        Files of same node type are loaded by same worker, so MERGEs on same label never run concurrently
+        :param file_list: data files
+        :param loading_mode: UPSERT_MODE or NEW_MODE
+        :param workers: number of workers
+        """
+        self.log.info('Loading nodes from {} file(s) with {} workers'.format(len(file_list), workers))
+        self.run_file_groups(file_list, workers, self._load_nodes_worker, loading_mode)
+
+    def load_single_pass_parallel(self, waves, loading_mode, workers):
+        """
+        Load nodes and relationships in single pass mode, files in same wave are loaded concurrently, each wave
+        starts after previous wave finished, so parents are always loaded before their children
+        :param waves: list of file lists, from plan_file_waves
+        :param loading_mode: UPSERT_MODE
+        :param workers: number of workers
+        """
+        for i, wave in enumerate(waves, 1):
+            self.log.info('Loading wave {} of {}: {} file(s) with {} workers'.format(i, len(waves), len(wave), workers))
+            self.run_file_groups(wave, workers, self._load_single_pass_worker, loading_mode)
+
+    def run_file_groups(self, file_list, workers, worker, loading_mode):
+        """
+        Run worker function concurrently on groups of files, files of same node type are in same group
+        """
+        file_groups = {}
+        for txt in file_list:
+            row = self.row_cache.get_file(txt).first_row()
+            node_type = row.get(NODE_TYPE) if row else None
+            file_groups.setdefault(node_type, []).append(txt)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker, files, loading_mode) for files in file_groups.values()]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _load_nodes_worker(self, file_list, loading_mode):
+        with self.driver.session() as session:
+            for txt in file_list:
+                self.load_nodes(session, txt, loading_mode, True, True)
+
+    def _load_single_pass_worker(self, file_list, loading_mode):
+        with self.driver.session() as session:
+            for txt in file_list:
+                self.load_single_pass(session, txt, loading_mode, True)
+
+    def prepare_node_batches(self, rows, loading_mode, batcher=None):
+        """
+        Group rows into batches of node statements, runs in the producer thread of BatchPipeline, so it doesn't use
+        the database
+        :param rows: iterable of (line number, row) tuples
+        :param loading_mode: UPSERT_MODE or NEW_MODE
+        :param batcher: AdaptiveBatcher of current file in split-transactions mode, all rows are in one batch if None
+        :return: generator of (dict of statement to list of rows, dict of (node type, id) to line number of rows,
+        last line number, node type) tuples, the line number dict is only used in NEW_MODE
+        """
+        # Rows of current batch grouped by statement, so each statement only gets rows of its shape
+        batches = {}
+        # (node type, id) -> line number of rows in current batch, only used in NEW_MODE
+        new_node_lines = {}
+        node_type = 'UNKNOWN'
+        line_num = 1
+        for line_num, obj in rows:
+            node_type = obj[NODE_TYPE]
+            node_id = self.schema.get_id(obj)
+            if not node_id:
+                raise Exception('Line:{}: No ids found!'.format(line_num))
+            id_field = self.schema.get_id_field(obj)
+            if loading_mode == UPSERT_MODE:
+                if self.skip_unchanged:
+                    obj[CONTENT_HASH] = get_content_hash(obj)
+                statement = self.get_upsert_statement(node_type, id_field, obj)
+                batches.setdefault(statement, []).append(obj)
+            elif loading_mode == NEW_MODE:
+                # Nodes created by earlier batches are found by check_new_nodes, this catches duplicates in a batch
+                if (node_type, node_id) in new_node_lines:
+                    raise Exception(
+                        'Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type,
+                                                                                          id_field, node_id))
+                new_node_lines[(node_type, node_id)] = line_num
+                statement = self.get_new_statement(node_type, id_field, obj)
+                batches.setdefault(statement, []).append(obj)
+            else:
+                raise Exception('Wrong loading_mode: {}'.format(loading_mode))
+
+            if batcher and batcher.add(obj):
+                batcher.next_batch()
+                yield batches, new_node_lines, line_num, node_type
+                batches = {}
+                new_node_lines = {}
+        if batches or not batcher:
+            yield batches, new_node_lines, line_num, node_type
+
     # load file
-    def load_nodes(self, session, file_name, loading_mode, split=False):
+    def load_nodes(self, session, file_name, loading_mode, split=False, managed=False):
         if loading_mode == NEW_MODE:
             action_word = 'Loading new'
         elif loading_mode == UPSERT_MODE:
@@ -900,95 +1360,206 @@ class DataLoader:
         else:
             raise Exception('Wrong loading_mode: {}'.format(loading_mode))
         self.log.info('{} nodes from file: {}'.format(action_word, file_name))
-
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
-            nodes_created = 0
-            nodes_updated = 0
-            nodes_deleted = 0
-            batch_obj_list = []
-            statement = ""
-            node_type = 'UNKNOWN'
-            relationship_deleted = 0
-            line_num = 1
-            transaction_counter = 0
-
-            # Use session in one transaction mode
-            tx = session
-            # Use transactions in split-transactions mode
-            if split:
-                tx = session.begin_transaction()
-
-            for org_obj in reader:
-                line_num += 1
-                transaction_counter += 1
-                obj = self.prepare_node(org_obj, file_name)
-                node_type = obj[NODE_TYPE]
-                node_id = self.schema.get_id(obj)
-                if not node_id:
-                    raise Exception('Line:{}: No ids found!'.format(line_num))
-                id_field = self.schema.get_id_field(obj)
-                if loading_mode == UPSERT_MODE:
-                    batch_obj_list.append(obj)
-                    updated_statement = self.get_upsert_statement(node_type, id_field, obj)
-                    if len(updated_statement) > len(statement):
-                        statement = updated_statement
-                elif loading_mode == NEW_MODE:
-                    if self.node_exists(tx, node_type, id_field, node_id):
-                        raise Exception(
-                            'Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type,
-                                                                                              id_field, node_id))
-                    else:
-                        statement = self.get_new_statement(node_type, obj)
-                elif loading_mode == DELETE_MODE:
-                    n_deleted, r_deleted = self.delete_node(tx, obj)
-                    nodes_deleted += n_deleted
-                    relationship_deleted += r_deleted
-                else:
-                    raise Exception('Wrong loading_mode: {}'.format(loading_mode))
-
-                # commit and restart a transaction when batch size reached
-                if split and transaction_counter >= BATCH_SIZE:
-                    result = tx.run(statement, batch=batch_obj_list)
-                    tx.commit()
-                    nodes_created, nodes_updated = self.node_count(result, node_type, nodes_created, nodes_updated, batch_obj_list)
-                    tx = session.begin_transaction()
-                    batch_obj_list = []
+        if loading_mode == DELETE_MODE:
+            if self.get_checkpoint(file_name, DELETE_PHASE)[1]:
+                self.log.info('File "{}" already deleted, skipped'.format(file_name))
+                return
+            nodes_deleted, relationship_deleted = self.delete_nodes(session, file_name)
+            self.log.info('{} node(s) deleted'.format(nodes_deleted))
+            self.log.info('{} relationship(s) deleted'.format(relationship_deleted))
+            self.checkpoint(file_name, DELETE_PHASE, 0, True)
+            return
+
+        rows = self.get_resume_rows(file_name, NODES_PHASE)
+        if rows is None:
+            return
+        nodes_created = 0
+        nodes_updated = 0
+        nodes_unchanged = 0
+        node_type = 'UNKNOWN'
+        line_num = 1
+        # Send large chunks and let the server commit them in smaller transactions, rows of a failed chunk may be
+        # partially committed, so only used in upsert mode, where loading them again is harmless
+        in_transactions = split and self.use_server_batching and loading_mode == UPSERT_MODE
+        if in_transactions:
+            batcher = self.new_batcher(self.server_chunk_size)
+        else:
+            batcher = self.new_batcher() if split else None
+        # In split-transactions mode, next batches are prepared in another thread while current batch is written
+        queue_size = self.pipeline_queue_size if split else 0
+        with BatchPipeline(self.prepare_node_batches(rows, loading_mode, batcher), queue_size) as node_batches:
+            for batches, new_node_lines, line_num, node_type in node_batches:
+                # Use session in one transaction mode and for managed transactions, which are committed by
+                # execute_batch, use a transaction per batch in split-transactions mode
+                tx = session.begin_transaction() if split and not managed and not in_transactions else session
+                if loading_mode == NEW_MODE:
+                    self.check_new_nodes(tx, batches, new_node_lines)
+                elif self.skip_unchanged:
+                    batches, unchanged = self.remove_unchanged_nodes(tx, batches)
+                    nodes_unchanged += unchanged
+                if in_transactions:
+                    nodes_created, nodes_updated = self.execute_node_batches(session, batches, nodes_created,
+                                                                             nodes_updated, in_transactions=True)
+                    self.checkpoint(file_name, NODES_PHASE, line_num)
                     self.log.info(f'{line_num - 1} rows loaded ...')
-                    transaction_counter = 0
-            # commit last transaction
-            if not loading_mode == DELETE_MODE:
-                result = tx.run(statement, batch=batch_obj_list)
-                nodes_created, nodes_updated = self.node_count(result, node_type, nodes_created, nodes_updated, batch_obj_list)
-
-            if split:
-                tx.commit()
-            if loading_mode == DELETE_MODE:
-                self.log.info('{} node(s) deleted'.format(nodes_deleted))
-                self.log.info('{} relationship(s) deleted'.format(relationship_deleted))
-            else:
-                self.log.info('{} (:{}) node(s) loaded'.format(nodes_created, node_type))
-                self.log.info('{} (:{}) node(s) updated'.format(nodes_updated, node_type))
+                elif split:
+                    nodes_created, nodes_updated = self.commit_node_batches(session, tx, batches, nodes_created,
+                                                                            nodes_updated, managed, batcher)
+                    self.checkpoint(file_name, NODES_PHASE, line_num)
+                    self.log.info(f'{line_num - 1} rows loaded, batch size: {batcher.size} ...')
+                else:
+                    nodes_created, nodes_updated = self.execute_node_batches(tx, batches, nodes_created,
+                                                                             nodes_updated)
+        if split:
+            self.checkpoint(file_name, NODES_PHASE, line_num, True)
+        self.log.info('{} (:{}) node(s) loaded'.format(nodes_created, node_type))
+        self.log.info('{} (:{}) node(s) updated'.format(nodes_updated, node_type))
+        if nodes_unchanged > 0:
+            self.log.info('{} (:{}) node(s) unchanged'.format(nodes_unchanged, node_type))
 
 
     def node_exists(self, session, label, prop, value):
-        statement = 'MATCH (m:{0} {{ {1}: ${1} }}) return m'.format(label, prop)
+        statement = 'MATCH (m:{0} {{ {1}: ${1} }}) return count(m) AS count'.format(label, prop)
         result = session.run(statement, {prop: value})
-        count = len(result.data())
+        count = result.single()['count']
         if count > 1:
             self.log.warning('More than one nodes found! ')
         return count >= 1
 
-    def collect_relationships(self, obj, session, create_intermediate_node, line_num):
+    def nodes_exist(self, session, label, prop, values):
+        """
+        Check existence of multiple nodes with one query
+        :param session: Neo4j session or transaction
+        :param label: label of the nodes
+        :param prop: property used to find the nodes
+        :param values: values of the property
+        :return: a set of values found in DB
+        """
+        statement = 'UNWIND $values AS value MATCH (m:{0} {{ {1}: value }}) RETURN DISTINCT m.{1} AS value'.format(
+            label, prop)
+        result = session.run(statement, values=list(values))
+        return {record['value'] for record in result}
+
+    def get_content_hashes(self, session, label, prop, values):
+        """
+        Get content hashes of multiple nodes with one query
+        :param session: Neo4j session or transaction
+        :param label: label of the nodes
+        :param prop: property used to find the nodes
+        :param values: values of the property
+        :return: dict of value to content hash, nodes without a hash are not included
+        """
+        statement = 'UNWIND $values AS value MATCH (m:{0} {{ {1}: value }}) WHERE m.{2} IS NOT NULL'.format(
+            label, prop, CONTENT_HASH)
+        statement += ' RETURN m.{0} AS value, m.{1} AS hash'.format(prop, CONTENT_HASH)
+        result = session.run(statement, values=list(values))
+        return {record['value']: record['hash'] for record in result}
+
+    def find_unchanged_nodes(self, session, objs):
+        """
+        Find rows whose content hash is same as the one saved in DB, with one query per label and id field.
+        Unchanged nodes are remembered as known parents. Only node writes are skipped for them, relationships are
+        always merged, because a hash saved by the node phase doesn't mean relationships were written
+        :param session: Neo4j session or transaction
+        :param objs: prepared rows with content hash
+        :return: set of (label, id) of unchanged nodes
+        """
+        ids = {}
+        for obj in objs:
+            id_field = self.schema.get_id_field(obj)
+            ids.setdefault((obj[NODE_TYPE], id_field), {})[obj[id_field]] = obj[CONTENT_HASH]
+        unchanged = set()
+        for (node_type, id_field), hashes in ids.items():
+            for node_id, content_hash in self.get_content_hashes(session, node_type, id_field, hashes.keys()).items():
+                if hashes.get(node_id) == content_hash:
+                    unchanged.add((node_type, node_id))
+        self.remember_nodes([obj for obj in objs if (obj[NODE_TYPE], self.schema.get_id(obj)) in unchanged])
+        return unchanged
+
+    def remove_unchanged_nodes(self, session, batches):
+        """
+        Remove unchanged rows from batches
+        :param session: Neo4j session or transaction
+        :param batches: dict of statement to list of rows
+        :return: dict of statement to list of changed rows, and number of unchanged rows
+        """
+        unchanged = self.find_unchanged_nodes(session, [obj for objs in batches.values() for obj in objs])
+        changed = {}
+        for statement, batch_obj_list in batches.items():
+            objs = [obj for obj in batch_obj_list if (obj[NODE_TYPE], self.schema.get_id(obj)) not in unchanged]
+            if objs:
+                changed[statement] = objs
+        return changed, sum(len(objs) for objs in batches.values()) - sum(len(objs) for objs in changed.values())
+
+
+    def remember_nodes(self, objs):
+        """
+        Record nodes loaded in current load, so they won't be queried again when they are referenced as parents
+        """
+        loaded = set()
+        for obj in objs:
+            node_type = obj[NODE_TYPE]
+            if node_type in self.parent_types:
+                id_field = self.schema.get_id_field(obj)
+                loaded.add((node_type, id_field, obj.get(id_field)))
+        with self.known_nodes_lock:
+            self.known_nodes.update(loaded)
+
+    def is_known_node(self, key):
+        with self.known_nodes_lock:
+            return key in self.known_nodes
+
+    def add_known_nodes(self, keys):
+        with self.known_nodes_lock:
+            self.known_nodes.update(keys)
+
+    def prefetch_parents(self, session, objs):
+        """
+        Check existence of all parents referenced by a batch of nodes, one query per parent label and id field,
+        results are used by parent_exists. Missing parents are returned instead of kept in the loader, so workers loading
+        batches in parallel don't overwrite each other's results
+        :return: set of (label, id field, id) of parents not found
+        """
+        missing = set()
+        pending = {}
+        for obj in objs:
+            for key, value in obj.items():
+                if value and is_parent_pointer(key):
+                    other_node, other_id = key.split('.')
+                    for parent_id in self.schema.get_list_values(value):
+                        if not self.is_known_node((other_node, other_id, parent_id)):
+                            pending.setdefault((other_node, other_id), set()).add(parent_id)
+        for (label, prop), values in pending.items():
+            found = self.nodes_exist(session, label, prop, values)
+            self.add_known_nodes((label, prop, value) for value in values if value in found)
+            missing.update((label, prop, value) for value in values if value not in found)
+        return missing
+
+    def parent_exists(self, session, label, prop, value, missing_nodes=None):
+        """
+        :param missing_nodes: parents not found by prefetch_parents for current batch
+        """
+        key = (label, prop, value)
+        if self.is_known_node(key):
+            return True
+        if missing_nodes is not None and key in missing_nodes:
+            return False
+        if self.node_exists(session, label, prop, value):
+            self.add_known_nodes([key])
+            return True
+        return False
+
+    def collect_relationships(self, obj, session, create_intermediate_node, line_num, missing_nodes=None):
         node_type = obj[NODE_TYPE]
         relationships = []
         int_node_created = 0
         provided_parents = 0
         relationship_properties = {}
+        # Parent pointer and relationship property columns are resolved once per header by the row plan
+        plan = self.schema.get_row_plan(node_type, tuple(obj.keys()))
         #print(obj.items())
         for key, value in obj.items():
-            if is_parent_pointer(key):
+            if key in plan.parent_pointers:
                 parent_value_list = self.schema.get_list_values(value)
                 for value in parent_value_list:
                     provided_parents += 1
@@ -1002,7 +1573,7 @@ class DataLoader:
                     if not relationship_name:
                         self.log.error('Line: {}: Relationship not found!'.format(line_num))
                         raise Exception('Undefined relationship, abort loading!')
-                    if not self.node_exists(session, other_node, other_id, value):
+                    if not self.parent_exists(session, other_node, other_id, value, missing_nodes):
                         create_parent = False
                         if create_intermediate_node:
                             for plugin in self.plugins:
@@ -1010,6 +1581,9 @@ class DataLoader:
                                     create_parent = True
                                     if plugin.create_node(session, line_num, other_node, value, obj):
                                         int_node_created += 1
+                                        self.add_known_nodes([(other_node, other_id, value)])
+                                        if missing_nodes is not None:
+                                            missing_nodes.discard((other_node, other_id, value))
                                         relationships.append(
                                             {PARENT_TYPE: other_node, PARENT_ID_FIELD: other_id, PARENT_ID: value,
                                             RELATIONSHIP_TYPE: relationship_name, MULTIPLIER: multiplier})
@@ -1036,7 +1610,7 @@ class DataLoader:
                         else:
                             relationships.append({PARENT_TYPE: other_node, PARENT_ID_FIELD: other_id, PARENT_ID: value,
                                                 RELATIONSHIP_TYPE: relationship_name, MULTIPLIER: multiplier})
-            elif self.schema.is_relationship_property(key):
+            elif key in plan.relationship_props:
                 parent_value_list = self.schema.get_list_values(value)
                 for value in parent_value_list:
                     rel_name, prop_name = key.split(self.rel_prop_delimiter)
@@ -1110,13 +1684,34 @@ class DataLoader:
                 return parent_id_field
         return None
 
+    def add_old_relationship_check(self, obj, relationship, old_rel_statement_dict, old_rel_base_statement_dict,
+                                   old_rel_value_dict):
+        """
+        Add a node to be checked by batch_remove_old_relationship, only relationships to a single parent are checked
+        """
+        multiplier = relationship[MULTIPLIER]
+        if multiplier in [DEFAULT_MULTIPLIER, ONE_TO_ONE]:
+            parent_node = relationship[PARENT_TYPE]
+            if parent_node not in old_rel_statement_dict.keys():
+                old_rel_base_statement = 'WITH $batch as batch UNWIND batch as record MATCH (n:{0} {{ {1}: record.{1} }})-[r:{2}]->(m:{3})'.format(obj[NODE_TYPE],
+                                                                                                                                                self.schema.get_id_field(obj),
+                                                                                                                                                relationship[RELATIONSHIP_TYPE], parent_node)
+                old_rel_statement = old_rel_base_statement + ' return m.{} AS {}'.format(relationship[PARENT_ID_FIELD], PARENT_ID)
+                old_rel_statement_dict[parent_node] = old_rel_statement
+                old_rel_base_statement_dict[parent_node] = old_rel_base_statement
+                old_rel_value_dict[parent_node] = []
+            old_rel_value_dict[parent_node].append(obj)
+        else:
+            self.log.debug('Multiplier: {}, no action needed!'.format(multiplier))
+
     def batch_remove_old_relationship(self, tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict, old_rel_base_statement_dict, relationships, loading_mode, line_num):
         for parent_node in old_rel_statement_dict.keys():
             parent_id_field = self.find_parent_id_field(parent_node, relationships)
             if parent_id_field is None:
                 self.log.warning(f'Can not find the parent ID field for the parent node {parent_node}')
                 continue
-            parent_query_results = tx.run(old_rel_statement_dict[parent_node], batch=old_rel_value_dict[parent_node])
+            statement, batch = encode_batch(old_rel_statement_dict[parent_node], old_rel_value_dict[parent_node])
+            parent_query_results = tx.run(statement, batch=batch)
             if parent_query_results:
                 if loading_mode == NEW_MODE:
                     raise Exception('Line: {}: Relationship already exists, abort loading!'.format(line_num))
@@ -1133,22 +1728,49 @@ class DataLoader:
                             delete_node_id.append({delete_node_id_field: delete_node[delete_node_id_field]})
                     if len(delete_node_id) > 0:
                         delete_statement = old_rel_base_statement_dict[parent_node] + ' delete r'
-                        tx.run(delete_statement, batch=delete_node_id)
+                        statement, batch = encode_batch(delete_statement, delete_node_id)
+                        tx.run(statement, batch=batch)
                         self.log.warning('Old parent is different from new parent, delete relationship to old parent:'
                                     + ' (:{} {{ {}: "{}" }})!'.format(parent_node, parent_id_field, delete_node_id))
 
-    def relationship_count(self, result, relationships_created, node_type, relationship_dict, parent_node):
-        relationship_name = relationship_dict[parent_node]
-        count = result.consume().counters.relationships_created
+    def relationship_count(self, count, relationships_created, node_type, relationship_name, parent_node):
         relationship_pattern = '(:{})->[:{}]->(:{})'.format(node_type, relationship_name, parent_node)
         relationships_created[relationship_pattern] = relationships_created.get(relationship_pattern,
                                                                                 0) + count
-        self.relationships_stat[relationship_name] = self.relationships_stat.get(relationship_name,
-                                                                                    0) + count
-        self.relationships_created += count
+        with self.stat_lock:
+            self.relationships_stat[relationship_name] = self.relationships_stat.get(relationship_name,
+                                                                                        0) + count
+            self.relationships_created += count
         return relationships_created
-        
-    def load_relationships(self, session, file_name, loading_mode, split=False):
+
+    def write_relationship_batches(self, tx, writer, node_type, parent_statement_dict, parent_value_dict,
+                                   relationship_dict, relationships_created):
+        """
+        Write collected relationships, one statement per parent node type. If a RelationshipWriter is given,
+        batches are handed to its workers, and counted by count_written_relationships later
+        """
+        for parent_node in parent_statement_dict.keys():
+            relationship_name = relationship_dict[parent_node]
+            if writer:
+                writer.submit((node_type, relationship_name, parent_node), parent_node,
+                              parent_statement_dict[parent_node], parent_value_dict[parent_node])
+            else:
+                counters = run_batch(tx, parent_statement_dict[parent_node], parent_value_dict[parent_node])
+                relationships_created = self.relationship_count(counters.relationships_created, relationships_created,
+                                                                node_type, relationship_name, parent_node)
+        return relationships_created
+
+    def count_written_relationships(self, writer, relationships_created):
+        """
+        Wait for a RelationshipWriter to finish all submitted batches and count created relationships
+        """
+        for (node_type, relationship_name, parent_node), count in writer.wait().items():
+            relationships_created = self.relationship_count(count, relationships_created, node_type,
+                                                            relationship_name, parent_node)
+        return relationships_created
+
+
+    def load_relationships(self, session, file_name, loading_mode, split=False, writer=None):
         if loading_mode == NEW_MODE:
             action_word = 'Loading new'
         elif loading_mode == UPSERT_MODE:
@@ -1157,31 +1779,40 @@ class DataLoader:
             raise Exception('Wrong loading_mode: {}'.format(loading_mode))
         self.log.info('{} relationships from file: {}'.format(action_word, file_name))
 
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
-            relationships_created = {}
-            int_nodes_created = 0
-            line_num = 1
-            transaction_counter = 0
-            parent_statement_dict = {}
-            parent_value_dict = {}
-            old_rel_statement_dict = {}
-            old_rel_base_statement_dict = {}
-            old_rel_value_dict = {}
-            uploaded_parent_dict = {}
-            relationship_dict = {}
-            # Use session in one transaction mode
-            tx = session
-            # Use transactions in split-transactions mode
-            if split:
-                tx = session.begin_transaction()
-            for org_obj in reader:
-                line_num += 1
-                transaction_counter += 1
-                obj = self.prepare_node(org_obj, file_name)
+        rows = self.get_resume_rows(file_name, RELATIONSHIPS_PHASE)
+        if rows is None:
+            return True
+        relationships_created = {}
+        int_nodes_created = 0
+        node_type = 'UNKNOWN'
+        line_num = 1
+        relationships = []
+        parent_statement_dict = {}
+        parent_value_dict = {}
+        old_rel_statement_dict = {}
+        old_rel_base_statement_dict = {}
+        old_rel_value_dict = {}
+        uploaded_parent_dict = {}
+        relationship_dict = {}
+        provided_parents = 0
+        # Last line of the batch handed to writer, it's committed once writer finishes the batch
+        submitted_line = 0
+        # Use session in one transaction mode
+        tx = session
+        batches = iter_batches(rows, BATCH_SIZE)
+        # Use transactions in split-transactions mode
+        if split:
+            tx = session.begin_transaction()
+            batcher = self.new_batcher()
+            batches = batcher.batches(rows)
+        for batch in batches:
+            start_time = timer()
+            batch_rows = len(batch)
+            # Check all parents of the batch with one query per parent label and id field
+            missing_nodes = self.prefetch_parents(tx, [obj for _, obj in batch])
+            for line_num, obj in batch:
                 node_type = obj[NODE_TYPE]
-                results = self.collect_relationships(obj, tx, True, line_num)
+                results = self.collect_relationships(obj, tx, True, line_num, missing_nodes)
                 relationships = results[RELATIONSHIPS]
                 int_nodes_created += results[INT_NODE_CREATED]
                 provided_parents = results[PROVIDED_PARENTS]
@@ -1191,25 +1822,13 @@ class DataLoader:
                         raise Exception('Line: {}: No parents found, abort loading!'.format(line_num))
                     for relationship in relationships:
                         relationship_name = relationship[RELATIONSHIP_TYPE]
-                        multiplier = relationship[MULTIPLIER]
                         parent_node = relationship[PARENT_TYPE]
                         parent_id_field = relationship[PARENT_ID_FIELD]
                         parent_id = relationship[PARENT_ID]
                         properties = relationship_props.get(relationship_name, {})
                         relationship_dict[parent_node]  = relationship_name
-                        if multiplier in [DEFAULT_MULTIPLIER, ONE_TO_ONE]:
-                            if parent_node not in old_rel_statement_dict.keys():
-                                old_rel_base_statement = 'WITH $batch as batch UNWIND batch as record MATCH (n:{0} {{ {1}: record.{1} }})-[r:{2}]->(m:{3})'.format(node_type,
-                                                                                                                                                                self.schema.get_id_field(obj),
-                                                                                                                                                                relationship_name, parent_node)
-                                old_rel_statement = old_rel_base_statement + ' return m.{} AS {}'.format(parent_id_field, PARENT_ID)
-                                old_rel_statement_dict[parent_node] = old_rel_statement
-                                old_rel_base_statement_dict[parent_node] = old_rel_base_statement
-                                old_rel_value_dict[parent_node] = []
-                            old_rel_value_dict[parent_node].append(obj)
-                        else:
-                            self.log.debug('Multiplier: {}, no action needed!'.format(multiplier))
-                                
+                        self.add_old_relationship_check(obj, relationship, old_rel_statement_dict, old_rel_base_statement_dict, old_rel_value_dict)
+                            
                         #if multiplier in [DEFAULT_MULTIPLIER, ONE_TO_ONE]:
                         #    if loading_mode == UPSERT_MODE:
                         #        self.remove_old_relationship(tx, node_type, obj, relationship)
@@ -1222,15 +1841,10 @@ class DataLoader:
                         #else:
                         #    self.log.debug('Multiplier: {}, no action needed!'.format(multiplier))
 
-                        prop_statement = ', '.join(self.get_relationship_prop_statements(properties))
                         statement = 'WITH $batch as batch UNWIND batch as record MATCH (m:{0} {{ {1}: record.__parentID__ }})'.format(parent_node, parent_id_field)
                         statement += ' MATCH (n:{0} {{ {1}: record.{1} }})'.format(node_type,
                                                                              self.schema.get_id_field(obj))
-                        statement += ' MERGE (n)-[r:{}]->(m)'.format(relationship_name)
-                        statement += ' ON CREATE SET r.{} = datetime()'.format(CREATED)
-                        statement += ', {}'.format(prop_statement) if prop_statement else ''
-                        statement += ' ON MATCH SET r.{} = datetime()'.format(UPDATED)
-                        statement += ', {}'.format(prop_statement) if prop_statement else ''
+                        statement += self.get_relationship_merge_statement('n', 'm', 'r', relationship_name, properties)
 
                         #result = tx.run(statement, {**obj, "__parentID__": parent_id, **properties})
                         if parent_node not in uploaded_parent_dict.keys():
@@ -1239,52 +1853,258 @@ class DataLoader:
                             parent_statement_dict[parent_node] = statement
                             parent_value_dict[parent_node] = []
                         uploaded_parent_dict[parent_node].append(parent_id)
-                        parent_value_dict[parent_node].append({**obj, "__parentID__": parent_id, **properties})
+                        # Statement only reads child id, parent id and relationship properties
+                        id_field = self.schema.get_id_field(obj)
+                        parent_value_dict[parent_node].append({id_field: obj[id_field], "__parentID__": parent_id,
+                                                               **properties})
                     for plugin in self.plugins:
                         if plugin.should_run(node_type, NODE_LOADED):
                             if plugin.create_node(session=tx, line_num=line_num, src=obj):
                                 int_nodes_created += 1
-                # commit and restart a transaction when batch size reached
-                if split and transaction_counter >= BATCH_SIZE:
-                    self.batch_remove_old_relationship(tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict, old_rel_base_statement_dict, relationships, loading_mode, line_num)
-                    for parent_node in parent_statement_dict.keys():
-                        result = tx.run(parent_statement_dict[parent_node], batch=parent_value_dict[parent_node])
-                        relationships_created = self.relationship_count(result, relationships_created, node_type, relationship_dict, parent_node)
-                        parent_value_dict[parent_node] = []
-                        old_rel_value_dict[parent_node] = []
-                        uploaded_parent_dict[parent_node] = []
+            # commit and restart a transaction when batch is full
+            if split:
+                if writer:
+                    # Relationships of previous batch must be written before old relationships are checked
+                    relationships_created = self.count_written_relationships(writer, relationships_created)
+                    if submitted_line:
+                        self.checkpoint(file_name, RELATIONSHIPS_PHASE, submitted_line)
+                self.batch_remove_old_relationship(tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict, old_rel_base_statement_dict, relationships, loading_mode, line_num)
+                if writer:
+                    # Removed relationships and intermediate nodes must be committed before workers use them
                     tx.commit()
                     tx = session.begin_transaction()
-                    self.log.info(f'{line_num - 1} rows loaded ...')
-                    transaction_counter = 0
+                relationships_created = self.write_relationship_batches(tx, writer, node_type, parent_statement_dict, parent_value_dict, relationship_dict, relationships_created)
+                for parent_node in parent_statement_dict.keys():
+                    parent_value_dict[parent_node] = []
+                    old_rel_value_dict[parent_node] = []
+                    uploaded_parent_dict[parent_node] = []
+                tx.commit()
+                tx = session.begin_transaction()
+                if writer:
+                    submitted_line = line_num
+                else:
+                    self.checkpoint(file_name, RELATIONSHIPS_PHASE, line_num)
+                batcher.record(timer() - start_time, batch_rows)
+                self.log.info(f'{line_num - 1} rows loaded, batch size: {batcher.size} ...')
+
+        # commit last transaction
+        if writer:
+            relationships_created = self.count_written_relationships(writer, relationships_created)
+        self.batch_remove_old_relationship(tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict, old_rel_base_statement_dict, relationships, loading_mode, line_num)
+        if writer:
+            tx.commit()
+            tx = session.begin_transaction()
+        relationships_created = self.write_relationship_batches(tx, writer, node_type, parent_statement_dict, parent_value_dict, relationship_dict, relationships_created)
+        if split:
+            tx.commit()
+        if writer:
+            relationships_created = self.count_written_relationships(writer, relationships_created)
+        if split:
+            self.checkpoint(file_name, RELATIONSHIPS_PHASE, line_num, True)
+        if provided_parents == 0:
+                self.log.warning('there is no parent mapping columns in the node {}'.format(node_type))
+        for rel, count in relationships_created.items():
+            self.log.info('{} {} relationship(s) loaded'.format(count, rel))
+        if int_nodes_created > 0:
+            self.log.info('{} intermediate node(s) loaded'.format(int_nodes_created))
+
+        return True
+
+    def get_single_pass_statement(self, node_type, id_field, obj, parents, unchanged=False):
+        """
+        Get statement which MERGEs nodes and relationships to their parents in one UNWIND, or only relationships of
+        unchanged nodes
+        :param node_type: node type
+        :param id_field: id field of the node
+        :param obj: prepared row
+        :param parents: tuple of (parent type, parent id field, relationship name, relationship property names) tuples,
+        parent ids are passed in as record.__parentIDs_<parent type>__, relationship properties as a map in
+        record.__relprops_<parent type>__
+        :param unchanged: node is matched instead of merged, its content hash is same as the one in DB
+        :return: statement
+        """
+        if unchanged:
+            node_statement = BATCH_PREFIX + 'MATCH (n:{0} {{ {1}: record.{1} }})'.format(node_type, id_field)
+        else:
+            node_statement = self.get_upsert_statement(node_type, id_field, obj)
+        cache_key = (SINGLE_PASS, node_statement, parents)
+        statement = self.statement_cache.get(cache_key)
+        if statement is None:
+            statement = node_statement
+            for i, (parent_node, parent_id_field, relationship_name, properties) in enumerate(parents):
+                parent = 'm{}'.format(i)
+                statement += ' WITH n, record OPTIONAL MATCH ({0}:{1}) WHERE {0}.{2} IN record.{3}'.format(
+                    parent, parent_node, parent_id_field, self.get_parent_ids_key(parent_node))
+                statement += ' WITH n, record, collect({0}) AS {0}_list'.format(parent)
+                statement += ' FOREACH ({0} IN {0}_list |{1})'.format(
+                    parent, self.get_relationship_merge_statement(
+                        'n', parent, 'r{}'.format(i), relationship_name, properties,
+                        'record.{}'.format(self.get_relationship_props_key(parent_node))))
+            self.statement_cache[cache_key] = statement
+        return statement
+
+    @staticmethod
+    def get_parent_ids_key(parent_node):
+        return '__parentIDs_{}__'.format(parent_node)
+
+    @staticmethod
+    def get_relationship_props_key(parent_node):
+        # Relationship properties are kept apart from node properties, which may have same names
+        return '__relprops_{}__'.format(parent_node)
+
+    def load_single_pass(self, session, file_name, loading_mode, split=False):
+        """
+        Load nodes and their relationships from a file in one pass, each batch is sent once, and one statement MERGEs
+        nodes and relationships to their parents. Parents must be loaded before their children, parents not in DB are
+        handled same as in load_relationships
+        """
+        if loading_mode != UPSERT_MODE:
+            raise Exception('Single pass loading only supports {} mode'.format(UPSERT_MODE))
+        self.log.info('Loading nodes and relationships from file: {}'.format(file_name))
 
-            # commit last transaction
-            self.batch_remove_old_relationship(tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict, old_rel_base_statement_dict, relationships, loading_mode, line_num)
-            for parent_node in parent_statement_dict.keys():
-                result = tx.run(parent_statement_dict[parent_node], batch=parent_value_dict[parent_node])
-                relationships_created = self.relationship_count(result, relationships_created, node_type, relationship_dict, parent_node)
+        rows = self.get_resume_rows(file_name, SINGLE_PASS_PHASE)
+        if rows is None:
+            return True
+        nodes_created = 0
+        nodes_updated = 0
+        nodes_unchanged = 0
+        relationships_created = {}
+        int_nodes_created = 0
+        node_type = 'UNKNOWN'
+        line_num = 1
+        # Use session in one transaction mode
+        tx = session
+        batches = iter_batches(rows, BATCH_SIZE)
+        # Use transactions in split-transactions mode
+        if split:
+            tx = session.begin_transaction()
+            batcher = self.new_batcher()
+            batches = batcher.batches(rows)
+        for batch in batches:
+            start_time = timer()
+            batch_rows = len(batch)
+            batch_end_line = batch[-1][0]
+            unchanged = set()
+            if self.skip_unchanged:
+                for _, obj in batch:
+                    obj[CONTENT_HASH] = get_content_hash(obj)
+                unchanged = self.find_unchanged_nodes(tx, [obj for _, obj in batch])
+                nodes_unchanged += sum(1 for _, obj in batch if (obj[NODE_TYPE], self.schema.get_id(obj)) in unchanged)
+            # Records grouped by statement, and relationship names of each statement
+            batches = {}
+            batch_relationship_names = {}
+            # Statements of unchanged rows, which only MERGE relationships
+            relationship_statements = set()
+            old_rel_statement_dict = {}
+            old_rel_base_statement_dict = {}
+            old_rel_value_dict = {}
+            uploaded_parent_dict = {}
+            batch_relationships = []
+            missing_nodes = self.prefetch_parents(tx, [obj for _, obj in batch])
+            for line_num, obj in batch:
+                node_type = obj[NODE_TYPE]
+                if not self.schema.get_id(obj):
+                    raise Exception('Line:{}: No ids found!'.format(line_num))
+                id_field = self.schema.get_id_field(obj)
+                results = self.collect_relationships(obj, tx, True, line_num, missing_nodes)
+                relationships = results[RELATIONSHIPS]
+                int_nodes_created += results[INT_NODE_CREATED]
+                relationship_props = results[RELATIONSHIP_PROPS]
+                if results[PROVIDED_PARENTS] > 0 and len(relationships) == 0:
+                    raise Exception('Line: {}: No parents found, abort loading!'.format(line_num))
+                record = dict(obj)
+                parents = {}
+                for relationship in relationships:
+                    parent_node = relationship[PARENT_TYPE]
+                    relationship_name = relationship[RELATIONSHIP_TYPE]
+                    properties = relationship_props.get(relationship_name, {})
+                    if parent_node not in parents:
+                        parents[parent_node] = (parent_node, relationship[PARENT_ID_FIELD], relationship_name,
+                                                tuple(sorted(properties)))
+                        record[self.get_parent_ids_key(parent_node)] = []
+                        record[self.get_relationship_props_key(parent_node)] = properties
+                    record[self.get_parent_ids_key(parent_node)].append(relationship[PARENT_ID])
+                    self.add_old_relationship_check(obj, relationship, old_rel_statement_dict,
+                                                    old_rel_base_statement_dict, old_rel_value_dict)
+                    uploaded_parent_dict.setdefault(parent_node, []).append(relationship[PARENT_ID])
+                    batch_relationships.append(relationship)
+                parents = tuple(parents[parent_node] for parent_node in sorted(parents))
+                is_unchanged = (node_type, obj[id_field]) in unchanged
+                if is_unchanged and not parents:
+                    continue
+                statement = self.get_single_pass_statement(node_type, id_field, obj, parents, is_unchanged)
+                if is_unchanged:
+                    relationship_statements.add(statement)
+                batches.setdefault(statement, []).append(record)
+                batch_relationship_names[statement] = parents
+
+            self.batch_remove_old_relationship(tx, old_rel_statement_dict, old_rel_value_dict, uploaded_parent_dict,
+                                               old_rel_base_statement_dict, batch_relationships, loading_mode, line_num)
+            for statement, records in batches.items():
+                counters = run_batch(tx, statement, records)
+                if statement not in relationship_statements:
+                    nodes_created, nodes_updated = self.node_count(counters, node_type, nodes_created,
+                                                                   nodes_updated, records)
+                parents = batch_relationship_names[statement]
+                if parents:
+                    # Relationships to different parent types created by one statement can't be counted separately
+                    relationship_name = '|'.join(parent[2] for parent in parents)
+                    parent_node = '|'.join(parent[0] for parent in parents)
+                    relationships_created = self.relationship_count(counters.relationships_created,
+                                                                    relationships_created, node_type,
+                                                                    relationship_name, parent_node)
+                self.remember_nodes(records)
+            for line_num, obj in batch:
+                if (obj[NODE_TYPE], self.schema.get_id(obj)) in unchanged:
+                    continue
+                for plugin in self.plugins:
+                    if plugin.should_run(node_type, NODE_LOADED):
+                        if plugin.create_node(session=tx, line_num=line_num, src=obj):
+                            int_nodes_created += 1
             if split:
                 tx.commit()
-            if provided_parents == 0:
-                    self.log.warning('there is no parent mapping columns in the node {}'.format(node_type))
-            for rel, count in relationships_created.items():
-                self.log.info('{} {} relationship(s) loaded'.format(count, rel))
-            if int_nodes_created > 0:
-                self.log.info('{} intermediate node(s) loaded'.format(int_nodes_created))
+                tx = session.begin_transaction()
+                self.checkpoint(file_name, SINGLE_PASS_PHASE, batch_end_line)
+                batcher.record(timer() - start_time, batch_rows)
+                self.log.info(f'{line_num - 1} rows loaded, batch size: {batcher.size} ...')
 
+        if split:
+            tx.commit()
+            self.checkpoint(file_name, SINGLE_PASS_PHASE, line_num, True)
+        self.log.info('{} (:{}) node(s) loaded'.format(nodes_created, node_type))
+        self.log.info('{} (:{}) node(s) updated'.format(nodes_updated, node_type))
+        if nodes_unchanged > 0:
+            self.log.info('{} (:{}) node(s) unchanged'.format(nodes_unchanged, node_type))
+        for rel, count in relationships_created.items():
+            self.log.info('{} {} relationship(s) loaded'.format(count, rel))
+        if int_nodes_created > 0:
+            self.log.info('{} intermediate node(s) loaded'.format(int_nodes_created))
         return True
 
     @staticmethod
-    def get_relationship_prop_statements(props):
+    def get_relationship_prop_statements(props, rel='r', source='record'):
         prop_stmts = []
 
+        # Relationship properties are passed in each record of the batch, or in a map field of the record
         for key in props:
-            prop_stmts.append('r.{0} = ${0}'.format(key))
+            prop_stmts.append('{0}.{1} = {2}.{1}'.format(rel, key, source))
         return prop_stmts
 
-    def wipe_db(self, session, split=False):
+    def get_relationship_merge_statement(self, child, parent, rel, relationship_name, properties, source='record'):
+        prop_statement = ', '.join(self.get_relationship_prop_statements(properties, rel, source))
+        statement = ' MERGE ({})-[{}:{}]->({})'.format(child, rel, relationship_name, parent)
+        statement += ' ON CREATE SET {}.{} = datetime()'.format(rel, CREATED)
+        statement += ', {}'.format(prop_statement) if prop_statement else ''
+        statement += ' ON MATCH SET {}.{} = datetime()'.format(rel, UPDATED)
+        statement += ', {}'.format(prop_statement) if prop_statement else ''
+        return statement
+
+    def wipe_db(self, session, split=False, workers=1):
+        """
+        :return: True if the database is replaced by a new one, sessions opened before can't be used anymore
+        """
         if split:
-            return self.wipe_db_split(session)
+            return self.wipe_db_split(session, workers)
         else:
             cleanup_db = 'MATCH (n) DETACH DELETE n'
             result = session.run(cleanup_db).consume()
@@ -1293,24 +2113,358 @@ class DataLoader:
             self.log.info('{} nodes deleted!'.format(self.nodes_deleted))
             self.log.info('{} relationships deleted!'.format(self.relationships_deleted))
 
-    def wipe_db_split(self, session):
-        while True:
+    def wipe_db_split(self, session, workers=1):
+        """
+        Wipe database in batches, relationships are deleted first, then nodes of each node type in the schema, node
+        types are deleted concurrently by workers. If wipe_drop_database is enabled, the whole database is dropped
+        instead when the database supports it
+        :return: True if the database is replaced by a new one
+        """
+        if self.wipe_drop_database and self.drop_database(session):
+            # Memgraph drops the graph, but keeps the database
+            return self.database_type == NEO4J
+        # Neo4j 4.4+ deletes all batches in one statement, other databases delete batches of ids collected by the loader
+        in_transactions = self.can_run_in_transactions(session)
+        self.delete_in_batches(session, '()-[r]->()', 'r', 'DELETE r', in_transactions)
+        labels = sorted(self.schema.nodes)
+        if workers > 1 and len(labels) > 1:
+            self.log.info('Deleting nodes of {} node types with {} workers'.format(len(labels), workers))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._wipe_label_worker, label, in_transactions) for label in labels]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        else:
+            for label in labels:
+                self.delete_in_batches(session, '(n:`{}`)'.format(label), 'n', 'DETACH DELETE n', in_transactions)
+        # Nodes not in the schema, like nodes created by plugins
+        self.delete_in_batches(session, '(n)', 'n', 'DETACH DELETE n', in_transactions)
+        self.log.info('{} nodes deleted!'.format(self.nodes_deleted))
+        self.log.info('{} relationships deleted!'.format(self.relationships_deleted))
+        return False
+
+    def _wipe_label_worker(self, label, in_transactions):
+        with self.driver.session() as session:
+            self.delete_in_batches(session, '(n:`{}`)'.format(label), 'n', 'DETACH DELETE n', in_transactions)
+
+    def can_run_in_transactions(self, session):
+        """
+        Check if the database can commit batches with CALL { } IN TRANSACTIONS, without logging like
+        check_server_batching
+        """
+        if self.database_type != NEO4J:
+            return False
+        try:
+            return parse_version(self.get_neo4j_version(session)) >= MIN_SERVER_BATCHING_VERSION
+        except Neo4jError:
+            return False
+
+    def delete_in_batches(self, session, pattern, variable, delete_clause, in_transactions=False):
+        """
+        Delete everything matched by a pattern in batches
+        :param pattern: pattern to match, like "(n:case)"
+        :param variable: variable of the pattern to delete
+        :param delete_clause: DELETE or DETACH DELETE clause of the variable
+        :param in_transactions: let the server commit batches with CALL { } IN TRANSACTIONS
+        """
+        if in_transactions:
+            statement = 'MATCH {} CALL {{ WITH {} {} }} IN TRANSACTIONS OF {} ROWS'.format(
+                pattern, variable, delete_clause, self.server_chunk_size)
+            self.count_deleted(session.run(statement).consume().counters, pattern)
+            return
+        # Ids are collected once, so each batch finds its rows by id instead of scanning past deleted ones
+        ids = [record['id'] for record in session.run(f'MATCH {pattern} RETURN id({variable}) AS id')]
+        cleanup_db = f'UNWIND $ids AS id MATCH {pattern} WHERE id({variable}) = id {delete_clause}'
+        batcher = self.new_batcher()
+        start = 0
+        while start < len(ids):
             tx = session.begin_transaction()
             try:
-                cleanup_db = f'MATCH (n) WITH n LIMIT {BATCH_SIZE} DETACH DELETE n'
-                result = tx.run(cleanup_db).consume()
+                start_time = timer()
+                chunk = ids[start:start + batcher.size]
+                result = tx.run(cleanup_db, ids=chunk).consume()
                 tx.commit()
-                deleted_nodes = result.counters.nodes_deleted
-                self.nodes_deleted += deleted_nodes
-                deleted_relationships = result.counters.relationships_deleted
-                self.relationships_deleted += deleted_relationships
-                self.log.info(f'{deleted_nodes} nodes deleted...')
-                self.log.info(f'{deleted_relationships} relationships deleted...')
-                if deleted_nodes == 0 and deleted_relationships == 0:
-                    break
+                # Batches are limited by rows of the variable, nodes or relationships if no node is deleted
+                counters = result.counters
+                batcher.record(timer() - start_time, counters.nodes_deleted or counters.relationships_deleted)
+                self.count_deleted(counters, pattern)
+                start += len(chunk)
+            except Neo4jError as e:
+                tx.close()
+                if is_memory_error(e) and batcher.size > batcher.min_size:
+                    self.log.warning('Wiping exceeded memory limit, batch size reduced to {}'.format(batcher.shrink()))
+                    continue
+                self.log.exception(e)
+                raise e
             except Exception as e:
                 tx.rollback()
                 self.log.exception(e)
                 raise e
-        self.log.info('{} nodes deleted!'.format(self.nodes_deleted))
-        self.log.info('{} relationships deleted!'.format(self.relationships_deleted))
\ No newline at end of file
+
+    def count_deleted(self, counters, pattern):
+        """
+        :return: number of nodes and relationships deleted
+        """
+        deleted_nodes = counters.nodes_deleted
+        deleted_relationships = counters.relationships_deleted
+        with self.stat_lock:
+            self.nodes_deleted += deleted_nodes
+            self.relationships_deleted += deleted_relationships
+        if deleted_nodes or deleted_relationships:
+            self.log.info(f'{pattern}: {deleted_nodes} nodes and {deleted_relationships} relationships deleted...')
+        return deleted_nodes + deleted_relationships
+
+    def drop_database(self, session):
+        """
+        Wipe database by dropping it as a whole, Memgraph drops the graph with DROP GRAPH, Neo4j replaces the database
+        with an empty one, which needs Neo4j Enterprise Edition. Indexes and constraints are dropped too, indexes in
+        the schema are created again
+        :return: True if the database is dropped
+        """
+        try:
+            if self.database_type == MEMGRAPH:
+                # Load profile has already tried to drop the graph
+                if self.load_profile:
+                    return False
+                profile = MemgraphLoadProfile(self.driver, self.log, snapshot=False)
+                profile.start()
+                try:
+                    dropped = profile.drop_graph()
+                finally:
+                    profile.finish(True)
+            else:
+                dropped = self.replace_neo4j_database(session)
+        except Neo4jError as e:
+            self.log.warning('Can not drop database, deleting data in batches: {}'.format(e))
+            return False
+        if not dropped:
+            return False
+        with self.stat_lock:
+            self.nodes_deleted += dropped[0]
+            self.relationships_deleted += dropped[1]
+        indexes_created = self.create_indexes()
+        if indexes_created is False:
+            raise Exception('Can not create indexes after database is dropped')
+        self.indexes_created = indexes_created
+        return True
+
+    def get_lookup_keys(self, file_list):
+        """
+        Get (label, property) tuples looked up by statements generated for data files, from their node types and columns
+        """
+        files = []
+        for txt in file_list:
+            row = self.row_cache.get_file(txt).first_row()
+            if row:
+                files.append((row.get(NODE_TYPE), list(row.keys())))
+        return get_lookup_keys(self.schema.props.id_fields, files)
+
+    def create_indexes(self):
+        """
+        Create indexes in properties file, and indexes advised for lookups of data files being loaded
+        :return: number of indexes created, False if indexes can't be created
+        """
+        return create_index(self.driver, self.schema, self.log, self.database_type,
+                            self.lookup_keys if self.index_advisor else None)
+
+    def replace_neo4j_database(self, session):
+        """
+        Replace current Neo4j database with an empty one
+        :return: (nodes deleted, relationships deleted)
+        """
+        name = session.run('CALL db.info() YIELD name RETURN name').single()['name']
+        nodes = session.run('MATCH (n) RETURN count(n) AS count').single()['count']
+        relationships = session.run('MATCH ()-[r]->() RETURN count(r) AS count').single()['count']
+        with self.driver.session(database='system') as system_session:
+            system_session.run('CREATE OR REPLACE DATABASE `{}` WAIT'.format(name)).consume()
+        self.log.info('Database "{}" replaced, {} nodes and {} relationships deleted'.format(name, nodes,
+                                                                                             relationships))
+        return nodes, relationships
+
+    def can_bulk_import(self, neo4j_uri, file_list):
+        """
+        Check if database can be rebuilt by bulk import, neo4j-admin import must run on the Neo4j host, Memgraph loads
+        files with LOAD CSV. Relationships are imported by parent ids, so parent pointers must use id fields of parents
+        """
+        if self.plugins:
+            self.log.warning('Bulk import can not create nodes by plugins, loading with batches')
+            return False
+        for txt in file_list:
+            row = self.row_cache.get_file(txt).first_row() or {}
+            for key in row:
+                if key and is_parent_pointer(key):
+                    other_node, other_id = key.split('.')
+                    if other_id != self.schema.get_id_field({NODE_TYPE: other_node}):
+                        self.log.warning('Parent pointer "{}" in file "{}" is not id field of "{}", bulk import can '
+                                         'not find its parents, loading with batches'.format(key, txt, other_node))
+                        return False
+        if self.database_type == MEMGRAPH:
+            return True
+        host = get_host(neo4j_uri) if neo4j_uri else None
+        if host in ['localhost', '127.0.0.1']:
+            return True
+        self.log.warning('neo4j-admin import can only run on the Neo4j host, "{}" is loaded with batches'.format(host))
+        return False
+
+    def get_bulk_relationships(self, obj, line_num):
+        """
+        Get relationships of a row from its parent pointers, parents are not checked in database, they are expected
+        to be in the same import, and found by their id fields
+        :return: list of (relationship name, parent type, parent id, relationship properties) tuples
+        """
+        node_type = obj[NODE_TYPE]
+        relationship_props = {}
+        parents = []
+        plan = self.schema.get_row_plan(node_type, tuple(obj.keys()))
+        for key, value in obj.items():
+            if value is None or value == '':
+                continue
+            values = self.schema.get_list_values(value) if isinstance(value, str) else [value]
+            if key in plan.parent_pointers:
+                other_node, other_id = key.split('.')
+                if other_id != self.schema.get_id_field({NODE_TYPE: other_node}):
+                    raise Exception('Line: {}: Parent pointer "{}" is not id field of "{}", can not bulk import!'
+                                    .format(line_num, key, other_node))
+                relationship = self.schema.get_relationship(node_type, other_node)
+                if not isinstance(relationship, dict) or not relationship[RELATIONSHIP_TYPE]:
+                    self.log.error('Line: {}: Relationship not found!'.format(line_num))
+                    raise Exception('Undefined relationship, abort loading!')
+                parents += [(relationship[RELATIONSHIP_TYPE], other_node, parent_id) for parent_id in values]
+            elif key in plan.relationship_props and values:
+                rel_name, prop_name = key.split(self.rel_prop_delimiter)
+                relationship_props.setdefault(rel_name, {})[prop_name] = values[-1]
+        return [(rel_name, parent_type, parent_id, relationship_props.get(rel_name, {}))
+                for rel_name, parent_type, parent_id in parents]
+
+    def get_bulk_columns(self, node_type, id_field, obj):
+        """
+        Get typed columns of node and relationship files for rows with same keys, types come from the data model,
+        which prepared rows are converted to
+        :return: tuple of node columns, and dict of relationship name to tuple of relationship columns
+        """
+        keys = tuple(obj.keys())
+        columns = self.bulk_columns.get((node_type, id_field, keys))
+        if columns is None:
+            props = self.get_statement_shape(id_field, obj) | {id_field}
+            node_columns = [(name, get_import_type(self.schema.get_prop_type(node_type, name))) for name in props]
+            relationship_columns = {}
+            for key in self.schema.get_row_plan(node_type, keys).relationship_props:
+                rel_name, prop_name = key.split(self.rel_prop_delimiter)
+                relationship_columns.setdefault(rel_name, [(CREATED, DATETIME)]).append(
+                    (prop_name, get_import_type(self.schema.get_prop_type(rel_name, prop_name))))
+            columns = (tuple(sorted(node_columns + [(CREATED, DATETIME)])),
+                       {rel_name: tuple(sorted(rel_columns)) for rel_name, rel_columns in relationship_columns.items()})
+            self.bulk_columns[(node_type, id_field, keys)] = columns
+        return columns
+
+    def write_bulk_file(self, files, file_name, created):
+        """
+        Write nodes and relationships of a data file into bulk import files, in one pass over prepared rows
+        """
+        self.log.info('Writing bulk import files for: {}'.format(file_name))
+        rows = self.row_cache.get_file(file_name).prepared_rows(lambda row: self.prepare_node(row, file_name))
+        no_properties = ((CREATED, DATETIME),)
+        for line_num, obj in rows:
+            node_type = obj[NODE_TYPE]
+            node_id = self.schema.get_id(obj)
+            if not node_id:
+                raise Exception('Line:{}: No ids found!'.format(line_num))
+            id_field = self.schema.get_id_field(obj)
+            node_columns, relationship_columns = self.get_bulk_columns(node_type, id_field, obj)
+            files.write_node(node_type, id_field, node_columns, {**obj, CREATED: created})
+            for rel_name, parent_type, parent_id, properties in self.get_bulk_relationships(obj, line_num):
+                files.write_relationship(rel_name, node_type, parent_type,
+                                         relationship_columns.get(rel_name, no_properties), node_id, parent_id,
+                                         {**properties, CREATED: created})
+
+    def write_bulk_files(self, file_list, temp_folder):
+        folder = self.bulk_import_folder or os.path.join(temp_folder, BULK_IMPORT_FOLDER)
+        created = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with BulkImportFiles(folder, self.log) as files:
+            for txt in file_list:
+                self.write_bulk_file(files, txt, created)
+        if files.duplicates:
+            self.log.warning('{} row(s) with duplicate ids skipped, only first row of each node is imported'.format(
+                files.duplicates))
+        return files
+
+    def count_bulk_import(self, nodes, relationships):
+        """
+        Count nodes and relationships imported
+        :param nodes: dict of node type to count
+        :param relationships: dict of relationship name to count
+        """
+        for node_type, count in nodes.items():
+            self.nodes_stat[node_type] = self.nodes_stat.get(node_type, 0) + count
+            self.nodes_stat_updated.setdefault(node_type, 0)
+            self.nodes_created += count
+        for rel_name, count in relationships.items():
+            self.relationships_stat[rel_name] = self.relationships_stat.get(rel_name, 0) + count
+            self.relationships_created += count
+
+    def bulk_import_neo4j(self, file_list, temp_folder):
+        """
+        Rebuild a local Neo4j database from data files with neo4j-admin import
+        """
+        with self.driver.session() as session:
+            version = self.get_neo4j_version(session)
+        files = self.write_bulk_files(file_list, temp_folder)
+        report_file = os.path.join(files.folder, 'import.report')
+        import_neo4j(files, parse_version(version), self.log, report_file=report_file)
+        wait_for_neo4j(self.driver, self.log)
+        self.count_bulk_import(files.nodes_written, files.relationships_written)
+        self.log.info('Relationships to parents not in data files are skipped, see "{}"'.format(report_file))
+
+    def bulk_import_memgraph(self, session, file_list, temp_folder, wipe_db=True):
+        """
+        Wipe Memgraph and load data files with LOAD CSV, the load profile keeps Memgraph in analytical storage mode
+        while loading
+        """
+        if wipe_db:
+            self.wipe_db(session, True)
+        files = self.write_bulk_files(file_list, temp_folder)
+        nodes = {}
+        relationships = {}
+        for name, is_relationship, statement in files.get_memgraph_statements(self.bulk_import_server_folder):
+            self.log.info('Loading {} from CSV'.format(name))
+            counters = session.run(statement).consume().counters
+            if is_relationship:
+                relationships[name] = relationships.get(name, 0) + counters.relationships_created
+            else:
+                nodes[name] = nodes.get(name, 0) + counters.nodes_created
+        self.count_bulk_import(nodes, relationships)
+
+    def start_load_profile(self):
+        """
+        Switch Memgraph to its load profile for a wipe-and-load, the graph is dropped here instead of deleting data in
+        batches if possible, before indexes are created because DROP GRAPH removes indexes too
+        :return: True if the database still needs to be wiped
+        """
+        self.load_profile = MemgraphLoadProfile(self.driver, self.log)
+        self.load_profile.start()
+        # Dropping again when resuming would remove data committed by the interrupted load
+        if self.get_checkpoint('', WIPE_PHASE)[1]:
+            return True
+        dropped = self.load_profile.drop_graph()
+        if not dropped:
+            return True
+        self.nodes_deleted, self.relationships_deleted = dropped
+        self.checkpoint('', WIPE_PHASE, 0, True)
+        return False
+
+    def finish_load_profile(self, success):
+        """
+        Restore transactional storage mode of Memgraph, and take a snapshot if loading succeeded
+        """
+        if not self.load_profile:
+            return
+        try:
+            self.load_profile.finish(success)
+        except Neo4jError as e:
+            self.log.error('Can not restore Memgraph storage mode or create snapshot: {}'.format(e))
+        finally:
+            self.load_profile = None
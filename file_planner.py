@@ -0,0 +1,70 @@
+from icdc_schema import is_parent_pointer, NODE_TYPE
+
+
+def get_file_dependencies(file_list, schema, row_cache, log):
+    """
+    Find node type of each file, and parent types it depends on, from type column and parent pointer columns
+    :param file_list: data files
+    :param schema: ICDC_Schema
+    :param row_cache: RowCache
+    :param log: logger
+    :return: dict of file to (node type, set of parent types)
+    """
+    dependencies = {}
+    for txt in file_list:
+        cached_file = row_cache.get_file(txt)
+        row = cached_file.first_row()
+        node_type = row.get(NODE_TYPE) if row else None
+        parents = set()
+        for column in cached_file.header:
+            if column and is_parent_pointer(column):
+                parent_type = column.split('.')[0]
+                if parent_type == node_type:
+                    continue
+                if node_type and not schema.get_relationship(node_type, parent_type):
+                    log.warning('File "{}": no relationship from "{}" to "{}" in data model'.format(
+                        txt, node_type, parent_type))
+                    continue
+                parents.add(parent_type)
+        dependencies[txt] = (node_type, parents)
+    return dependencies
+
+
+def plan_file_waves(file_list, schema, row_cache, log):
+    """
+    Order files so parents are loaded before their children, files in the same wave don't depend on each other and
+    can be loaded concurrently. Files keep their original order within a wave. Files in a dependency cycle are put
+    in one last wave in their original order
+    :param file_list: data files
+    :param schema: ICDC_Schema
+    :param row_cache: RowCache
+    :param log: logger
+    :return: list of waves, each wave is a list of files
+    """
+    dependencies = get_file_dependencies(file_list, schema, row_cache, log)
+    files_by_type = {}
+    for txt in file_list:
+        files_by_type.setdefault(dependencies[txt][0], []).append(txt)
+
+    # File depends on all files of its parent types, parent types without files are already in DB
+    remaining = {}
+    for txt in file_list:
+        _, parents = dependencies[txt]
+        remaining[txt] = {parent_file for parent in parents for parent_file in files_by_type.get(parent, [])}
+
+    waves = []
+    while remaining:
+        wave = [txt for txt in file_list if txt in remaining and not remaining[txt]]
+        if not wave:
+            cycle = [txt for txt in file_list if txt in remaining]
+            log.warning('Circular dependencies found between files: {}, load them in original order'.format(
+                ', '.join(cycle)))
+            waves.append(cycle)
+            break
+        waves.append(wave)
+        for txt in wave:
+            del remaining[txt]
+        for parent_files in remaining.values():
+            parent_files.difference_update(wave)
+    return waves
+
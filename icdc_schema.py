@@ -1,9 +1,10 @@
+import json
 import os
 import re
 import sys
 import yaml
 from bento.common.utils import get_logger, MULTIPLIER, DEFAULT_MULTIPLIER, RELATIONSHIP_TYPE, get_uuid, \
-    parse_date
+    parse_date, reformat_date
 from props import Props
 
 NODES = 'Nodes'
@@ -34,10 +35,49 @@ MAX = 'maximum'
 EX_MIN = 'exclusiveMinimum'
 EX_MAX = 'exclusiveMaximum'
 DESCRIPTION = 'Desc'
+PARENT_POINTER_PATTERN = re.compile(r'\w+\.\w+')
+BOOLEAN_TRUE_PATTERN = re.compile(r'yes|true', re.IGNORECASE)
+BOOLEAN_FALSE_PATTERN = re.compile(r'no|false', re.IGNORECASE)
 
 
 def is_parent_pointer(field_name):
-    return re.fullmatch(r'\w+\.\w+', field_name) is not None
+    return PARENT_POINTER_PATTERN.fullmatch(field_name) is not None
+
+
+def _to_int(value):
+    try:
+        return None if value is None else int(value)
+    except ValueError:
+        return None
+
+
+def _to_float(value):
+    try:
+        return None if value is None else float(value)
+    except ValueError:
+        return None
+
+
+def _to_date(value):
+    return None if value is None else reformat_date(value)
+
+
+class RowPlan:
+    """
+    Compiled plan to prepare rows of one node type with one header, built once by ICDC_Schema.get_row_plan
+
+    converters: list of (column, function) tuples, one for every column that needs type conversion
+    parent_pointers: dict of parent pointer column to (parent type, parent id field, name of the field
+    if parent id is saved in the node)
+    extra_props: dict of column to (unit property name, original value property name, original unit property name,
+    default unit) tuples for "value with unit" properties
+    relationship_props: set of relationship property columns
+    """
+    def __init__(self, converters, parent_pointers, extra_props, relationship_props):
+        self.converters = converters
+        self.parent_pointers = parent_pointers
+        self.extra_props = extra_props
+        self.relationship_props = relationship_props
 
 
 class ICDC_Schema:
@@ -46,7 +86,9 @@ class ICDC_Schema:
             raise AssertionError
         self.props = props
         self.rel_prop_delimiter = props.rel_prop_delimiter
+        self.rel_prop_pattern = re.compile('^.+{}.+$'.format(re.escape(self.rel_prop_delimiter)))
         self.delimiter = props.delimiter
+        self.row_plans = {}
         if not yaml_files:
             raise Exception('File list is empty,could not initialize ICDC_Schema object!')
         else:
@@ -683,4 +725,78 @@ class ICDC_Schema:
             return obj[id_field]
 
     def is_relationship_property(self, key):
-        return re.match('^.+\{}.+$'.format(self.rel_prop_delimiter), key)
+        return self.rel_prop_pattern.match(key)
+
+    def get_row_plan(self, node_type, header):
+        """
+        Get compiled plan to prepare rows, plan is compiled once per node type and header
+
+        :param node_type: node type of the rows
+        :param header: tuple of column names of the rows
+        :return: RowPlan
+        """
+        key = (node_type, header)
+        plan = self.row_plans.get(key)
+        if plan is None:
+            plan = self._compile_row_plan(node_type, header)
+            self.row_plans[key] = plan
+        return plan
+
+    def _compile_row_plan(self, node_type, header):
+        converters = []
+        parent_pointers = {}
+        extra_props = {}
+        relationship_props = set()
+        for column in header:
+            if not column:
+                continue
+            search_node_type = node_type
+            search_key = column
+            if is_parent_pointer(column):
+                search_node_type, search_key = column.split('.')
+                field_name = search_key
+                if field_name in header:
+                    combined = '{}_{}'.format(search_node_type, field_name)
+                    self.log.debug('"{}" field is in both current node and parent "{}", use {} instead !'.format(
+                        column, search_node_type, combined))
+                    field_name = combined
+                parent_pointers[column] = (search_node_type, search_key, field_name)
+            elif self.is_relationship_property(column):
+                search_node_type, search_key = column.split(self.rel_prop_delimiter)
+                relationship_props.add(column)
+
+            converter = self._get_converter(self.get_prop_type(search_node_type, search_key))
+            if converter:
+                converters.append((column, converter))
+
+            prop = self.get_prop(node_type, column)
+            if prop and HAS_UNIT in prop and prop[HAS_UNIT]:
+                default_unit = self.get_default_unit(node_type, column)
+                org_prop_name = self.get_original_value_property_name(column)
+                extra_props[column] = (self.get_unit_property_name(column), org_prop_name,
+                                       self.get_unit_property_name(org_prop_name), default_unit)
+        return RowPlan(converters, parent_pointers, extra_props, relationship_props)
+
+    def _get_converter(self, prop_type):
+        if prop_type == 'Boolean':
+            return self._to_boolean
+        elif prop_type == 'Int':
+            return _to_int
+        elif prop_type == 'Float':
+            return _to_float
+        elif prop_type == 'Array':
+            # todo: need to transform items if item type is not string
+            return lambda value: json.dumps(self.get_list_values(value))
+        elif prop_type == 'DateTime' or prop_type == 'Date':
+            return _to_date
+        return None
+
+    def _to_boolean(self, value):
+        if isinstance(value, str):
+            if BOOLEAN_TRUE_PATTERN.search(value):
+                return True
+            elif BOOLEAN_FALSE_PATTERN.search(value):
+                return False
+            else:
+                self.log.debug('Unsupported Boolean value: "{}"'.format(value))
+        return None
@@ -0,0 +1,24 @@
+from icdc_schema import is_parent_pointer
+
+# Nodes without id field in properties file are merged on uuid
+DEFAULT_ID_FIELD = 'uuid'
+
+
+def get_lookup_keys(id_fields, files):
+    """
+    Get properties looked up by statements generated for data files. Nodes are merged, matched and deleted by their id
+    fields, parents are matched by the fields named in parent pointer columns like "case.case_id", which are used by
+    relationship MERGEs, parent checks and old relationship removal
+    :param id_fields: dict of node type to id field, from properties file
+    :param files: iterable of (node type, column names) tuples of data files
+    :return: sorted list of (label, property) tuples
+    """
+    keys = set()
+    for node_type, columns in files:
+        if node_type:
+            keys.add((node_type, id_fields.get(node_type, DEFAULT_ID_FIELD)))
+        for column in columns:
+            if is_parent_pointer(column):
+                label, prop = column.split('.')
+                keys.add((label, prop))
+    return sorted(keys)
@@ -0,0 +1,130 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+
+MANIFEST_VERSION = 1
+MANIFEST_FOLDER = 'manifests'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_md5(file_name):
+    md5 = hashlib.md5()
+    with open(file_name, 'rb') as in_file:
+        for chunk in iter(lambda: in_file.read(HASH_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def get_schema_hash(file_list):
+    """
+    Hash of schema and props files, files are hashed in given order
+    :param file_list: schema and props files
+    :return: hex digest
+    """
+    md5 = hashlib.md5()
+    for file_name in file_list:
+        md5.update(get_file_md5(file_name).encode())
+    return md5.hexdigest()
+
+
+def get_manifest_file(temp_folder, target, source):
+    """
+    Default manifest location, one manifest per target database and dataset source
+    :param temp_folder: temp folder
+    :param target: target database, like Neo4j URI
+    :param source: dataset source, like dataset folder or S3 location
+    :return: manifest file path
+    """
+    key = hashlib.md5('{}|{}'.format(target, source).encode()).hexdigest()
+    return os.path.join(temp_folder, MANIFEST_FOLDER, key + '.json')
+
+
+class LoadManifest:
+    """
+    Record of data files loaded by previous successful loads, files with same content, schema and loading mode as
+    recorded can be skipped. Files are keyed by file name, so datasets downloaded into different folders still match
+    """
+    def __init__(self, file_name, schema_hash, loading_mode, log):
+        self.file_name = file_name
+        self.schema_hash = schema_hash
+        self.loading_mode = loading_mode
+        self.log = log
+        self.entries = {}
+        # File name -> current entry of files checked by find_changed_files
+        self.pending = {}
+        if os.path.isfile(file_name):
+            try:
+                with open(file_name) as in_file:
+                    manifest = json.load(in_file)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self.entries = manifest.get('files', {})
+                else:
+                    self.log.warning('Manifest "{}" has a different version, all files will be loaded'.format(
+                        file_name))
+            except (ValueError, OSError) as e:
+                self.log.warning('Can not read manifest "{}", all files will be loaded: {}'.format(file_name, e))
+
+    def _get_entry(self, data_file):
+        stat = os.stat(data_file)
+        old_entry = self.entries.get(os.path.basename(data_file))
+        if old_entry and old_entry['size'] == stat.st_size and old_entry['mtime'] == stat.st_mtime:
+            # Same size and modification time, content is not hashed again
+            md5 = old_entry['md5']
+        else:
+            md5 = get_file_md5(data_file)
+        return {
+            'path': os.path.abspath(data_file),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'md5': md5,
+            'schema_hash': self.schema_hash,
+            'loading_mode': self.loading_mode
+        }
+
+    def is_unchanged(self, entry, old_entry):
+        return (old_entry is not None and old_entry['md5'] == entry['md5'] and
+                old_entry['schema_hash'] == entry['schema_hash'] and
+                old_entry['loading_mode'] == entry['loading_mode'])
+
+    def find_changed_files(self, file_list):
+        """
+        Split data files into changed files and files unchanged since last successful load
+        :param file_list: data files
+        :return: list of changed files, list of unchanged files
+        """
+        changed = []
+        unchanged = []
+        self.pending = {}
+        for data_file in file_list:
+            entry = self._get_entry(data_file)
+            old_entry = self.entries.get(os.path.basename(data_file))
+            if self.is_unchanged(entry, old_entry):
+                # Keep when it was loaded, size and modification time are refreshed so it won't be hashed again
+                entry['loaded_at'] = old_entry.get('loaded_at')
+                unchanged.append(data_file)
+            else:
+                changed.append(data_file)
+            self.pending[os.path.basename(data_file)] = entry
+        return changed, unchanged
+
+    def save(self):
+        """
+        Record files checked by find_changed_files as loaded, should only be called after a successful load
+        """
+        loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+        for entry in self.pending.values():
+            if not entry.get('loaded_at'):
+                entry['loaded_at'] = loaded_at
+        self.entries.update(self.pending)
+        self.pending = {}
+        folder = os.path.dirname(self.file_name)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Write to a temp file first, so an interrupted save won't leave a broken manifest
+        fd, temp_file = tempfile.mkstemp(dir=folder or None, suffix='.json')
+        with os.fdopen(fd, 'w') as out_file:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.entries}, out_file, indent=2, sort_keys=True)
+        os.replace(temp_file, self.file_name)
+        self.log.info('Load manifest saved to "{}"'.format(self.file_name))
@@ -22,6 +22,7 @@ os.environ[APP_NAME] = 'Data_Loader'
 
 from config import BentoConfig
 from data_loader import DataLoader
+from load_manifest import LoadManifest, get_manifest_file, get_schema_hash
 from bento.common.s3 import S3Bucket, upload_log_file
 
 DEFAULT_MAX_VIOLATIONS = 1000000
@@ -51,6 +52,18 @@ def parse_arguments(args = None):
     parser.add_argument('--dataset', help='Dataset directory')
     parser.add_argument('--split-transactions', help='Creates a separate transaction for each file',
                         action='store_true')
+    parser.add_argument('--workers', help='Number of workers loading nodes and relationships concurrently, requires split transactions',
+                        type=int)
+    parser.add_argument('--single-pass', help='Load nodes and relationships in one pass, parents must be loaded before children',
+                        action='store_true')
+    parser.add_argument('--skip-unchanged', help='Skip rows whose content is unchanged since last load, upsert mode only',
+                        action='store_true')
+    parser.add_argument('--incremental', help='Skip files unchanged since last successful load',
+                        action='store_true')
+    parser.add_argument('--resume', help='Record a checkpoint journal of a split transactions load, and resume an interrupted load from it',
+                        action='store_true')
+    parser.add_argument('--bulk-import', help='Rebuild the database from CSV files with neo4j-admin import or LOAD CSV, requires wipe_db',
+                        action='store_true')
     parser.add_argument('--upload-log-dir', help='Upload destination dir for log file,  if dir in s3, use the format, s3://[bucket]/[prefix]')
     parser.add_argument('--database-type', help='The database type, can be either neo4j or memgraph', choices=[NEO4J, MEMGRAPH])
     return parser.parse_args(args)
@@ -109,6 +122,16 @@ def process_arguments(args, log):
     #    log.error('--split-transaction and --no-backup cannot both be enabled, a backup is required when running'
     #              ' in split transactions mode')
     #    sys.exit(1)
+    if args.workers:
+        config.workers = args.workers
+    if not config.workers:
+        config.workers = 1
+    if config.workers < 1:
+        log.error('Number of workers must be a positive integer!')
+        sys.exit(1)
+    if config.workers > 1 and not config.split_transactions:
+        log.error('Multiple workers can only be used in split transactions mode!')
+        sys.exit(1)
     if not config.backup_folder and not config.no_backup:
         log.error('Backup folder not specified! A backup folder is required unless the --no-backup argument is used')
         sys.exit(1)
@@ -166,6 +189,39 @@ def process_arguments(args, log):
     if not config.loading_mode:
         config.loading_mode = UPSERT_MODE
 
+    if args.single_pass:
+        config.single_pass = args.single_pass
+    if config.single_pass and config.loading_mode != UPSERT_MODE:
+        log.error('Single pass loading can only be used in {} mode!'.format(UPSERT_MODE))
+        sys.exit(1)
+
+    if args.skip_unchanged:
+        config.skip_unchanged = args.skip_unchanged
+    if config.skip_unchanged and config.loading_mode != UPSERT_MODE:
+        log.error('Skipping unchanged rows can only be used in {} mode!'.format(UPSERT_MODE))
+        sys.exit(1)
+
+    if args.resume:
+        config.resume = args.resume
+    if config.resume and not config.split_transactions:
+        log.error('Resuming a load is only available in split transactions mode!')
+        sys.exit(1)
+
+    if args.incremental:
+        config.incremental = args.incremental
+    if config.incremental and config.wipe_db:
+        log.error('Incremental loading can not be used with wipe_db!')
+        sys.exit(1)
+
+    if args.bulk_import:
+        config.bulk_import = args.bulk_import
+    if config.bulk_import and (not config.wipe_db or config.loading_mode == DELETE_MODE):
+        log.error('Bulk import can only be used with wipe_db in {} or {} mode!'.format(UPSERT_MODE, NEW_MODE))
+        sys.exit(1)
+    if config.bulk_import and config.resume:
+        log.error('Bulk import can not be resumed!')
+        sys.exit(1)
+
     if args.max_violations:
         config.max_violations = int(args.max_violations)
     if not config.max_violations:
@@ -234,10 +290,9 @@ def main(args):
                     sys.exit(1)
 
             prop_path = os.path.join(config.dataset, config.prop_file)
-            if os.path.isfile(prop_path):
-                props = Props(prop_path)
-            else:
-                props = Props(config.prop_file)
+            if not os.path.isfile(prop_path):
+                prop_path = config.prop_file
+            props = Props(prop_path)
             schema = ICDC_Schema(config.schema_files, props)
             if not config.dry_run or config.loading_mode == DELETE_MODE:
                 driver = GraphDatabase.driver(
@@ -255,15 +310,37 @@ def main(args):
                 memgraph_snapshot_dir = config.memgraph_snapshot_dir
             loader = DataLoader(driver, schema, config, memgraph_snapshot_dir, plugins)
 
-            load_result = loader.load(file_list, config.cheat_mode, config.dry_run, config.loading_mode, config.wipe_db,
-                        config.max_violations, config.temp_folder, config.verbose, split=config.split_transactions,
-                        no_backup=config.no_backup, neo4j_uri=config.neo4j_uri, backup_folder=config.backup_folder, username=config.neo4j_user, password=config.neo4j_password)
+            manifest = None
+            if config.incremental:
+                manifest_file = config.manifest_file
+                if not manifest_file:
+                    source = f's3://{config.s3_bucket}/{config.s3_folder}' if config.s3_bucket else os.path.abspath(config.dataset)
+                    manifest_file = get_manifest_file(config.temp_folder, config.neo4j_uri, source)
+                manifest = LoadManifest(manifest_file, get_schema_hash(config.schema_files + [prop_path]),
+                                        config.loading_mode, log)
+                file_list, loader.skipped_files = manifest.find_changed_files(file_list)
+                for txt in loader.skipped_files:
+                    log.info('File "{}" unchanged since last load, skipped'.format(txt))
+
+            if file_list:
+                load_result = loader.load(file_list, config.cheat_mode, config.dry_run, config.loading_mode, config.wipe_db,
+                            config.max_violations, config.temp_folder, config.verbose, split=config.split_transactions,
+                            no_backup=config.no_backup, neo4j_uri=config.neo4j_uri, backup_folder=config.backup_folder, username=config.neo4j_user, password=config.neo4j_password,
+                            workers=config.workers, single_pass=config.single_pass,
+                            skip_unchanged=config.skip_unchanged, resume=config.resume,
+                            bulk_import=config.bulk_import)
+            else:
+                log.info('All {} file(s) unchanged since last load, nothing to load.'.format(len(loader.skipped_files)))
+                load_result = {}
+            if manifest and load_result != False and not config.dry_run:
+                manifest.save()
             
             if load_result == False:
                 if loader.validation_result_file_key != "":
-                    zip_file_key = loader.validation_result_file_key.replace(".xlsx", ".zip")
+                    zip_file_key = os.path.splitext(loader.validation_result_file_key)[0] + ".zip"
                     with zipfile.ZipFile(zip_file_key, 'w') as zipf:
-                        zipf.write(loader.validation_result_file_key, os.path.basename(loader.validation_result_file_key))
+                        for report_file in loader.validation_result_files:
+                            zipf.write(report_file, os.path.basename(report_file))
                         zipf.write(log_file, os.path.basename(log_file))
                     log.error('Data loading failed, validation result zip file was created at {}'.format(zip_file_key))
                 else:
@@ -176,6 +176,12 @@ class Config:
         self.plugins = []
         self.temp_folder = temp_folder
         self.database_type = database_type
+        self.workers = None
+        self.single_pass = None
+        self.skip_unchanged = None
+        self.incremental = None
+        self.resume = None
+        self.bulk_import = None
         for plugin in plugins:
             self.plugins.append(PluginConfig(plugin))
 
@@ -0,0 +1,67 @@
+from neo4j.exceptions import Neo4jError
+
+ANALYTICAL_MODE = 'IN_MEMORY_ANALYTICAL'
+TRANSACTIONAL_MODE = 'IN_MEMORY_TRANSACTIONAL'
+
+
+def set_storage_mode(session, mode):
+    session.run('STORAGE MODE {}'.format(mode)).consume()
+
+
+class MemgraphLoadProfile:
+    """
+    Load profile for rebuilding a Memgraph database. While loading, Memgraph runs in analytical storage mode, which
+    doesn't keep undo data or write-ahead logs, so writes are much faster and use less memory, but failed transactions
+    can't be rolled back, so it's only used when the database is wiped anyway. Transactional mode is restored when
+    loading finishes, and a snapshot is created after a successful load, because analytical mode isn't persisted by
+    write-ahead logs. Only storage mode is changed, rows are still written by the loader's UNWIND batches, data files
+    are loaded by Memgraph itself only by bulk import, with LOAD CSV
+    """
+    def __init__(self, driver, log, snapshot=True):
+        self.driver = driver
+        self.log = log
+        self.snapshot = snapshot
+        self.analytical = False
+
+    def start(self):
+        """
+        Switch to analytical storage mode, loading continues in transactional mode if Memgraph doesn't support it
+        """
+        with self.driver.session() as session:
+            try:
+                set_storage_mode(session, ANALYTICAL_MODE)
+                self.analytical = True
+                self.log.info('Memgraph switched to {} storage mode for loading'.format(ANALYTICAL_MODE))
+            except Neo4jError as e:
+                self.log.warning('Can not switch Memgraph to {} storage mode: {}'.format(ANALYTICAL_MODE, e))
+
+    def drop_graph(self):
+        """
+        Remove all data with DROP GRAPH, which is much faster than deleting nodes in batches. DROP GRAPH also removes
+        indexes and constraints, so it's only used if there are no constraints, and indexes must be created after it
+        :return: (nodes deleted, relationships deleted), or None if the graph is not dropped
+        """
+        if not self.analytical:
+            return None
+        with self.driver.session() as session:
+            if list(session.run('SHOW CONSTRAINT INFO')):
+                self.log.info('Database has constraints, data is deleted in batches')
+                return None
+            nodes = session.run('MATCH (n) RETURN count(n) AS count').single()['count']
+            relationships = session.run('MATCH ()-[r]->() RETURN count(r) AS count').single()['count']
+            session.run('DROP GRAPH').consume()
+        self.log.info('Graph dropped, {} nodes and {} relationships deleted'.format(nodes, relationships))
+        return nodes, relationships
+
+    def finish(self, success):
+        """
+        Restore transactional storage mode, and create a snapshot if loading succeeded
+        """
+        with self.driver.session() as session:
+            if self.analytical:
+                set_storage_mode(session, TRANSACTIONAL_MODE)
+                self.analytical = False
+                self.log.info('Memgraph switched back to {} storage mode'.format(TRANSACTIONAL_MODE))
+            if self.snapshot and success:
+                session.run('CREATE SNAPSHOT').consume()
+                self.log.info('Memgraph snapshot created')
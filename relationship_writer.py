@@ -0,0 +1,130 @@
+import queue
+import random
+import threading
+import time
+
+from neo4j.exceptions import Neo4jError, TransientError
+
+from batch_encoding import encode_batch
+
+PARENT_ID_KEY = '__parentID__'
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30
+# Memgraph aborts a transaction writing a node or relationship written by another running transaction
+MEMGRAPH_CONFLICT_MESSAGE = 'Cannot resolve conflicting transactions'
+
+
+def is_retryable_error(error):
+    """
+    Check if a write failed by conflicting with concurrent transactions, and can be retried: transient errors
+    (deadlocks, lock timeouts) on Neo4j, write conflicts on Memgraph
+    """
+    return isinstance(error, TransientError) or MEMGRAPH_CONFLICT_MESSAGE in str(error)
+
+
+class RelationshipWriter:
+    """
+    Write relationship batches with multiple workers, each worker has its own session.
+
+    Batches are partitioned by (child label, relationship type, parent label), and records of each partition are
+    sharded by parent id, so relationships to the same parent node are always written by the same worker and
+    concurrent writers don't take conflicting locks on parent nodes. A child with parents of different labels is in
+    more than one partition, so its relationships may be written by two workers at the same time, and the two
+    transactions conflict on the child node. Conflicts like this, and other transient errors (deadlocks, lock
+    timeouts), are retried with exponential backoff.
+    """
+    def __init__(self, driver, workers, log, max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY):
+        self.driver = driver
+        self.log = log
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        self.error = None
+        self.relationships_created = {}
+        self.queues = [queue.Queue() for _ in range(workers)]
+        self.threads = []
+        for work_queue in self.queues:
+            thread = threading.Thread(target=self._work, args=(work_queue,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, key, parent_type, statement, records):
+        """
+        Shard records by parent and queue them for workers
+        :param key: partition key, (child label, relationship type, parent label)
+        :param parent_type: label of parent nodes
+        :param statement: Cypher statement, records are passed in as $batch
+        :param records: list of records, parent id is in PARENT_ID_KEY
+        """
+        if self.error:
+            raise self.error
+        shards = [[] for _ in self.queues]
+        for record in records:
+            shards[hash((parent_type, record[PARENT_ID_KEY])) % len(shards)].append(record)
+        for work_queue, shard in zip(self.queues, shards):
+            if shard:
+                # Same lock acquisition order in every transaction makes deadlocks less likely
+                shard.sort(key=lambda record: str(record[PARENT_ID_KEY]))
+                work_queue.put((key, statement, shard))
+
+    def wait(self):
+        """
+        Wait until all queued batches are written
+        :return: dict of relationships created since last call, keyed by partition key
+        """
+        for work_queue in self.queues:
+            work_queue.join()
+        if self.error:
+            raise self.error
+        with self.lock:
+            result = self.relationships_created
+            self.relationships_created = {}
+        return result
+
+    def close(self):
+        for work_queue in self.queues:
+            work_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self, work_queue):
+        with self.driver.session() as session:
+            while True:
+                task = work_queue.get()
+                try:
+                    if task is None:
+                        return
+                    # Skip remaining work once any worker failed
+                    if self.error:
+                        continue
+                    key, statement, records = task
+                    counters = self._write(session, statement, records)
+                    with self.lock:
+                        self.relationships_created[key] = self.relationships_created.get(key, 0) + \
+                            counters.relationships_created
+                except Exception as e:
+                    self.log.exception(e)
+                    with self.lock:
+                        if not self.error:
+                            self.error = e
+                finally:
+                    work_queue.task_done()
+
+    def _write(self, session, statement, records):
+        attempt = 0
+        while True:
+            try:
+                with session.begin_transaction() as tx:
+                    encoded_statement, rows = encode_batch(statement, records)
+                    counters = tx.run(encoded_statement, batch=rows).consume().counters
+                    tx.commit()
+                    return counters
+            except Neo4jError as e:
+                attempt += 1
+                if not is_retryable_error(e) or attempt > self.max_retries:
+                    raise
+                delay = min(self.retry_delay * 2 ** (attempt - 1), MAX_RETRY_DELAY) * (1 + random.random())
+                self.log.warning('Transient error writing relationships ({}), retry {} of {} in {:.1f} seconds'.format(
+                    getattr(e, 'code', None) or e, attempt, self.max_retries, delay))
+                time.sleep(delay)
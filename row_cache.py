@@ -0,0 +1,223 @@
+import codecs
+import csv
+import os
+import pickle
+import tempfile
+import threading
+
+UTF8 = 'utf-8'
+WINDOWS1252 = 'windows-1252'
+# Number of bytes read from the beginning of a file to detect its encoding
+ENCODING_SAMPLE_SIZE = 1024 * 1024
+# Number of cells (rows x columns) kept in memory before rows are spilled to disk
+DEFAULT_MAX_CACHED_CELLS = 50000000
+SPILL_CHUNK_SIZE = 10000
+
+
+def check_encoding(file_name, sample_size=ENCODING_SAMPLE_SIZE):
+    """
+    Detect encoding of a data file from a bounded prefix of the file
+    :param file_name: file to be checked
+    :param sample_size: number of bytes to sample
+    :return: 'utf-8' if the sample can be decoded as UTF-8, otherwise 'windows-1252'
+    """
+    with open(file_name, 'rb') as in_file:
+        sample = in_file.read(sample_size)
+    decoder = codecs.getincrementaldecoder(UTF8)()
+    try:
+        # A multibyte character may be cut at the end of the sample, only treat it as an error at the end of file
+        decoder.decode(sample, final=len(sample) < sample_size)
+        return UTF8
+    except UnicodeDecodeError:
+        return WINDOWS1252
+
+
+def _strip(value):
+    return value if not value else value.strip()
+
+
+class RowStore:
+    """
+    Append-only list of rows, rows will be pickled into a spill file once the cache runs out of its memory budget
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.count = 0
+        self._rows = []
+        self._cells = 0
+        self._spill_file = None
+
+    def append(self, row, cells):
+        self._rows.append(row)
+        self.count += 1
+        if self._spill_file is None:
+            self._cells += cells
+            if not self.cache.reserve(cells):
+                self._start_spill()
+        elif len(self._rows) >= SPILL_CHUNK_SIZE:
+            self._flush()
+
+    def _start_spill(self):
+        fd, self._spill_file = tempfile.mkstemp(prefix='row_cache_', suffix='.pkl', dir=self.cache.spill_folder)
+        os.close(fd)
+        self.cache.release(self._cells)
+        self._cells = 0
+        self._flush()
+
+    def _flush(self):
+        with open(self._spill_file, 'ab') as spill:
+            pickle.dump(self._rows, spill, pickle.HIGHEST_PROTOCOL)
+        self._rows = []
+
+    def finish(self):
+        if self._spill_file and self._rows:
+            self._flush()
+
+    def __iter__(self):
+        if self._spill_file:
+            # Each iteration opens its own handle, so the same store can be read by more than one consumer
+            with open(self._spill_file, 'rb') as spill:
+                while True:
+                    try:
+                        chunk = pickle.load(spill)
+                    except EOFError:
+                        break
+                    yield from chunk
+        yield from self._rows
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.cache.release(self._cells)
+        self._cells = 0
+        self._rows = []
+        if self._spill_file:
+            if os.path.exists(self._spill_file):
+                os.remove(self._spill_file)
+            self._spill_file = None
+
+
+class CachedFile:
+    """
+    A data file parsed once, values are stored as tuples in column order with keys and values stripped,
+    same as DataLoader.cleanup_node
+    """
+    def __init__(self, cache, file_name):
+        self.cache = cache
+        self.file_name = file_name
+        stat = os.stat(file_name)
+        self.signature = (stat.st_size, stat.st_mtime_ns)
+        self.encoding = check_encoding(file_name)
+        self.header = ()
+        self._keys = ()
+        self._rows = None
+        try:
+            self._parse(self.encoding)
+        except UnicodeDecodeError:
+            if self.encoding != UTF8:
+                raise
+            # Non UTF-8 characters after the sampled prefix, parse the file again
+            self.encoding = WINDOWS1252
+            self._parse(self.encoding)
+
+    def _parse(self, encoding):
+        if self._rows is not None:
+            self._rows.close()
+        self._rows = RowStore(self.cache)
+        with open(self.file_name, encoding=encoding, newline='') as in_file:
+            reader = csv.reader(in_file, delimiter='\t')
+            header = next(reader, None)
+            self.header = tuple(_strip(key) for key in header) if header else ()
+            # Extra values of a row longer than the header are stored under None key, same as csv.DictReader
+            self._keys = self.header + (None,)
+            width = len(self.header)
+            for values in reader:
+                # csv.DictReader skips empty lines
+                if not values:
+                    continue
+                if len(values) < width:
+                    values = values + [None] * (width - len(values))
+                    row = tuple(_strip(value) for value in values)
+                elif len(values) > width:
+                    row = tuple(_strip(value) for value in values[:width]) + \
+                        ([_strip(value) for value in values[width:]],)
+                else:
+                    row = tuple(_strip(value) for value in values)
+                self._rows.append(row, width)
+        self._rows.finish()
+
+    def is_stale(self):
+        try:
+            stat = os.stat(self.file_name)
+        except OSError:
+            return True
+        return (stat.st_size, stat.st_mtime_ns) != self.signature
+
+    def __len__(self):
+        return len(self._rows)
+
+    def rows(self):
+        """
+        Iterate cleaned rows
+        :return: generator of (line number, row dict) tuples
+        """
+        keys = self._keys
+        for line_num, values in enumerate(self._rows, 2):
+            yield line_num, dict(zip(keys, values))
+
+    def first_row(self):
+        for _, row in self.rows():
+            return row
+        return None
+
+    def prepared_rows(self, prepare):
+        """
+        Iterate rows transformed by prepare function, prepared rows are not cached, so only the parsed rows of a
+        file are kept, rows are prepared again by each phase with compiled row plans
+        :param prepare: function takes a cleaned row and returns prepared row
+        :return: generator of (line number, prepared row dict) tuples
+        """
+        for line_num, row in self.rows():
+            yield line_num, prepare(row)
+
+    def close(self):
+        if self._rows is not None:
+            self._rows.close()
+
+
+class RowCache:
+    """
+    Parse-once cache of data files, shared by validation, node loading and relationship loading
+    """
+    def __init__(self, spill_folder=None, max_cells=None):
+        if spill_folder:
+            os.makedirs(spill_folder, exist_ok=True)
+        self.spill_folder = spill_folder or None
+        self.max_cells = max_cells if max_cells else DEFAULT_MAX_CACHED_CELLS
+        self.cells = 0
+        self.files = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, cells):
+        with self._lock:
+            self.cells += cells
+            return self.cells <= self.max_cells
+
+    def release(self, cells):
+        with self._lock:
+            self.cells -= cells
+
+    def get_file(self, file_name):
+        cached = self.files.get(file_name)
+        if cached is None or cached.is_stale():
+            if cached is not None:
+                cached.close()
+            cached = CachedFile(self, file_name)
+            self.files[file_name] = cached
+        return cached
+
+    def clear(self):
+        for cached in self.files.values():
+            cached.close()
+        self.files = {}
@@ -60,3 +60,11 @@ def reset_env_vars(monkeypatch):
         if value is not None:
             monkeypatch.setenv(var, value)
 
+
+@pytest.fixture
+def schema(project_root_path):
+    """Return a small data model: sample -> case -> study, of_case relationship has a property."""
+    from icdc_schema import ICDC_Schema
+    from props import Props
+    data = project_root_path / 'tests' / 'data'
+    return ICDC_Schema([str(data / 'test-model.yml')], Props(str(data / 'test-model-props.yml')))
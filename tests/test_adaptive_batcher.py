@@ -0,0 +1,47 @@
+"""
+Unit tests for adaptive_batcher module.
+"""
+from adaptive_batcher import AdaptiveBatcher, is_memory_error
+
+
+class FakeError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class TestAdaptiveBatcher:
+    """Test cases for AdaptiveBatcher class."""
+
+    def test_size_follows_commit_time(self):
+        """Test that batch size grows on fast commits, shrinks on slow commits and stays within bounds."""
+        batcher = AdaptiveBatcher(100, 1000, target_seconds=5.0, initial_size=400)
+        batcher.record(1.0, 400)
+        assert batcher.size == 800
+        batcher.record(1.0, 800)
+        assert batcher.size == 1000
+        batcher.record(5.0, 1000)
+        assert batcher.size == 1000
+        batcher.record(100.0, 1000)
+        assert batcher.size == 100
+
+    def test_batches_limited_by_size_and_bytes(self):
+        """Test that batches are split by batch size and by payload size."""
+        batcher = AdaptiveBatcher(1, 3, target_bytes=10 ** 6, initial_size=3)
+        rows = [(i, {'id': str(i)}) for i in range(7)]
+        assert [len(batch) for batch in batcher.batches(rows)] == [3, 3, 1]
+
+        batcher = AdaptiveBatcher(1, 100, target_bytes=100, initial_size=100)
+        rows = [(i, {'id': 'x' * 18}) for i in range(10)]
+        assert [len(batch) for batch in batcher.batches(rows)] == [5, 5]
+
+    def test_shrink_on_memory_error(self):
+        """Test that memory errors are detected and batch size doesn't grow back after shrinking."""
+        assert is_memory_error(FakeError('', 'Neo.TransientError.General.MemoryPoolOutOfMemoryError'))
+        assert is_memory_error(FakeError('Memory limit exceeded!'))
+        assert not is_memory_error(FakeError('Syntax error', 'Neo.ClientError.Statement.SyntaxError'))
+
+        batcher = AdaptiveBatcher(100, 1000, initial_size=800)
+        assert batcher.shrink() == 400
+        batcher.record(0.1, 400)
+        assert batcher.size == 400
@@ -0,0 +1,40 @@
+"""
+Unit tests for batch_encoding module.
+"""
+from batch_encoding import encode_batch
+
+
+class TestBatchEncoding:
+    """Test cases for encode_batch function."""
+
+    def test_only_used_fields_sent(self):
+        """Test that records are sent as row lists of fields read by the statement, in order of first use."""
+        statement = ('WITH $batch as batch UNWIND batch as record MATCH (m:case { case_id: record.__parentID__ }) '
+                     'MATCH (n:sample { sample_id: record.sample_id }) MERGE (n)-[r:of_case]->(m) '
+                     'ON CREATE SET r.created = datetime(), r.weight = record.weight '
+                     'ON MATCH SET r.updated = datetime(), r.weight = record.weight')
+        batch = [{'sample_id': 's1', '__parentID__': 'c1', 'weight': 1, 'case.case_id': 'c1', 'name': 'x'},
+                 {'sample_id': 's2', '__parentID__': 'c2'}]
+        encoded_statement, rows = encode_batch(statement, batch)
+        assert 'record.' not in encoded_statement
+        assert 'case_id: record[0]' in encoded_statement
+        assert 'sample_id: record[1]' in encoded_statement
+        assert encoded_statement.count('r.weight = record[2]') == 2
+        assert rows == [['c1', 's1', 1], ['c2', 's2', None]]
+
+    def test_statement_without_fields(self):
+        """Test that a statement which doesn't read record fields gets the batch unchanged."""
+        statement = 'UNWIND $batch AS id MATCH (n) WHERE id(n) = id DETACH DELETE n'
+        assert encode_batch(statement, [1, 2]) == (statement, [1, 2])
+
+    def test_map_field(self):
+        """Test that a map field, like relationship properties of single pass records, is sent whole."""
+        statement = ('WITH $batch as batch UNWIND batch as record MERGE (n:sample { sample_id: record.sample_id }) '
+                     'ON CREATE SET n.weight = record.weight '
+                     'FOREACH (m0 IN m0_list | MERGE (n)-[r0:of_case]->(m0) '
+                     'ON CREATE SET r0.weight = record.__relprops_case__.weight)')
+        batch = [{'sample_id': 's1', 'weight': 5, '__relprops_case__': {'weight': 1}}]
+        encoded_statement, rows = encode_batch(statement, batch)
+        assert 'n.weight = record[1]' in encoded_statement
+        assert 'r0.weight = record[2].weight' in encoded_statement
+        assert rows == [['s1', 5, {'weight': 1}]]
@@ -0,0 +1,52 @@
+"""
+Unit tests for batch_pipeline module.
+"""
+import threading
+
+import pytest
+
+from batch_pipeline import BatchPipeline
+
+
+class TestBatchPipeline:
+    """Test cases for BatchPipeline class."""
+
+    @pytest.mark.parametrize('queue_size', [0, 2])
+    def test_items_in_order(self, queue_size):
+        """Test that all items are consumed in order, with or without a producer thread."""
+        with BatchPipeline(iter(range(100)), queue_size) as items:
+            assert list(items) == list(range(100))
+
+    def test_producer_error(self):
+        """Test that a producer error is raised in the consumer after items produced before it."""
+        def produce():
+            yield 1
+            yield 2
+            raise ValueError('Line:4: No ids found!')
+
+        consumed = []
+        with pytest.raises(ValueError, match='No ids found'):
+            with BatchPipeline(produce(), 1) as items:
+                for item in items:
+                    consumed.append(item)
+        assert consumed == [1, 2]
+
+    def test_consumer_error_stops_producer(self):
+        """Test that the producer is blocked by a full queue and stopped when the consumer fails."""
+        produced = []
+        closed = threading.Event()
+
+        def produce():
+            try:
+                for i in range(1000):
+                    produced.append(i)
+                    yield i
+            finally:
+                closed.set()
+
+        with pytest.raises(RuntimeError):
+            with BatchPipeline(produce(), 2) as items:
+                for _ in items:
+                    raise RuntimeError('write failed')
+        assert closed.is_set()
+        assert len(produced) <= 4
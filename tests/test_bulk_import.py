@@ -0,0 +1,59 @@
+"""
+Unit tests for bulk_import module.
+"""
+import csv
+import logging
+
+from bulk_import import BulkImportFiles, get_import_type, DATETIME
+
+log = logging.getLogger('test')
+
+
+def read_csv(file_name):
+    with open(file_name, newline='') as in_file:
+        return list(csv.reader(in_file))
+
+
+class TestBulkImportFiles:
+    """Test cases for BulkImportFiles class."""
+
+    def test_import_types(self):
+        """Test that converted data model types are typed columns, other types are strings."""
+        assert [get_import_type(t) for t in ['Int', 'Float', 'Boolean', 'String', 'DateTime', 'Array']] == \
+            ['long', 'double', 'boolean', 'string', 'string', 'string']
+
+    def test_write_files(self, tmp_path):
+        """Test that rows are routed to files by headers and duplicates are skipped."""
+        with BulkImportFiles(str(tmp_path), log) as files:
+            columns = (('age', 'long'), ('case_id', 'string'), ('created', DATETIME))
+            files.write_node('case', 'case_id', columns, {'case_id': 'c1', 'age': 3, 'created': 't'})
+            files.write_node('case', 'case_id', (('case_id', 'string'),), {'case_id': 'c3'})
+            files.write_node('case', 'case_id', columns, {'case_id': 'c2', 'age': None, 'created': 't'})
+            files.write_node('case', 'case_id', columns, {'case_id': 'c1', 'age': 5, 'created': 't'})
+            for start_id, end_id in [('s1', 'c1'), ('s1', 'c1'), ('s2', 'c2')]:
+                files.write_relationship('of_case', 'sample', 'case', (), start_id, end_id, {})
+
+        assert [label for label, _, _, _ in files.nodes] == ['case', 'case']
+        assert read_csv(files.nodes[0][2]) == [[':ID(case)', 'age:long', 'case_id', 'created:datetime'],
+                                               ['c1', '3', 'c1', 't'], ['c2', '', 'c2', 't']]
+        assert read_csv(files.nodes[1][2]) == [[':ID(case)', 'case_id'], ['c3', 'c3']]
+        assert read_csv(files.relationships[0][3]) == [[':START_ID(sample)', ':END_ID(case)'],
+                                                       ['s1', 'c1'], ['s2', 'c2']]
+        assert files.duplicates == 1
+        assert files.nodes_written == {'case': 3}
+        assert files.relationships_written == {'of_case': 2}
+
+    def test_commands(self, tmp_path):
+        """Test that neo4j-admin command matches Neo4j version and Memgraph statements convert types."""
+        with BulkImportFiles(str(tmp_path), log) as files:
+            files.write_node('case', 'case_id', (('case_id', 'long'),), {'case_id': 1})
+            files.write_node('sample', 'sample_id', (('sample_id', 'string'),), {'sample_id': 's1'})
+            files.write_relationship('of_case', 'sample', 'case', (), 's1', 1, {})
+
+        assert files.get_neo4j_import_command((5, 12, 0))[:4] == ['neo4j-admin', 'database', 'import', 'full']
+        assert files.get_neo4j_import_command((4, 4, 26))[:3] == ['neo4j-admin', 'import', '--database=neo4j']
+        statements = files.get_memgraph_statements('/import')
+        assert [(name, is_relationship) for name, is_relationship, _ in statements] == \
+            [('case', False), ('sample', False), ('of_case', True)]
+        assert 'case_id: toInteger(row.`case_id`)' in statements[0][2]
+        assert 'MATCH (p:case { case_id: toInteger(row.`:END_ID(case)`) })' in statements[2][2]
@@ -0,0 +1,56 @@
+"""
+Unit tests for checkpoint_journal module.
+"""
+import logging
+
+from checkpoint_journal import CheckpointJournal, NODES_PHASE, RELATIONSHIPS_PHASE
+
+log = logging.getLogger('test')
+
+
+class TestCheckpointJournal:
+    """Test cases for CheckpointJournal class."""
+
+    def test_resume(self, tmp_path):
+        """Test that last committed line and counters are restored from an existing journal."""
+        journal_file = str(tmp_path / 'journal.jsonl')
+        journal = CheckpointJournal(journal_file, 'sig', log)
+        journal.start()
+        journal.commit('case.tsv', NODES_PHASE, 10001, {'nodes_created': 10000})
+        journal.commit('case.tsv', NODES_PHASE, 12000, {'nodes_created': 11999}, True)
+        journal.commit('case.tsv', RELATIONSHIPS_PHASE, 10001, {'nodes_created': 11999})
+        journal.close()
+
+        journal = CheckpointJournal(journal_file, 'sig', log)
+        assert journal.resume()
+        assert journal.get_checkpoint('case.tsv', NODES_PHASE) == (12000, True)
+        assert journal.get_checkpoint('case.tsv', RELATIONSHIPS_PHASE) == (10001, False)
+        assert journal.get_checkpoint('sample.tsv', NODES_PHASE) == (0, False)
+        assert journal.counters == {'nodes_created': 11999}
+        journal.close(remove=True)
+        assert not (tmp_path / 'journal.jsonl').exists()
+
+    def test_changed_files_not_resumed(self, tmp_path):
+        """Test that a journal written for different data files is not resumed."""
+        journal_file = str(tmp_path / 'journal.jsonl')
+        journal = CheckpointJournal(journal_file, 'sig', log)
+        journal.start()
+        journal.commit('case.tsv', NODES_PHASE, 10001)
+        journal.close()
+
+        assert not CheckpointJournal(journal_file, 'sig2', log).resume()
+
+    def test_incomplete_record(self, tmp_path):
+        """Test that an incomplete last record is ignored and new records are still readable."""
+        journal_file = tmp_path / 'journal.jsonl'
+        journal_file.write_text('{"signature": "sig"}\n'
+                                '{"file": "case.tsv", "phase": "nodes", "line": 10001, "done": false, "counters": null}\n'
+                                '{"file": "case.tsv", "pha')
+        journal = CheckpointJournal(str(journal_file), 'sig', log)
+        assert journal.resume()
+        journal.commit('case.tsv', NODES_PHASE, 20001)
+        journal.close()
+
+        journal = CheckpointJournal(str(journal_file), 'sig', log)
+        assert journal.resume()
+        assert journal.get_checkpoint('case.tsv', NODES_PHASE) == (20001, False)
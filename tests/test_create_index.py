@@ -0,0 +1,59 @@
+"""
+Unit tests for create_index module.
+"""
+import logging
+from types import SimpleNamespace
+
+from create_index import MEMGRAPH, create_index, get_index_statement, get_constraint_statement, parse_version
+
+log = logging.getLogger('test')
+
+
+class FakeSession:
+    """Memgraph driver and session with existing indexes, records statements."""
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def session(self):
+        return self
+
+    def run(self, statement):
+        self.statements.append(statement)
+        if statement == 'SHOW INDEX INFO':
+            return [{'label': label, 'property': prop} for label, prop in self.indexes]
+        return None
+
+
+class TestCreateIndex:
+    """Test cases for index and constraint statements."""
+
+    def test_parse_version(self):
+        """Test that Neo4j version strings are parsed into comparable tuples."""
+        assert parse_version('4.4.26-enterprise') == (4, 4, 26)
+        assert parse_version('5.12.0') > (4, 4)
+
+    def test_statements(self):
+        """Test that statement syntax follows Neo4j version, and Memgraph uses legacy index syntax."""
+        assert get_index_statement('case', 'case_id') == 'CREATE INDEX ON :case(case_id);'
+        assert get_index_statement('case', ['a', 'b'], (3, 5, 0)) == 'CREATE INDEX ON :case(a,b);'
+        assert get_index_statement('case', ['a', 'b'], (5, 12, 0)) == \
+            'CREATE INDEX IF NOT EXISTS FOR (n:case) ON (n.a, n.b)'
+        assert get_constraint_statement('case', 'case_id', (4, 3, 0)) == \
+            'CREATE CONSTRAINT IF NOT EXISTS ON (n:case) ASSERT n.case_id IS UNIQUE'
+        assert get_constraint_statement('case', 'case_id', (5, 12, 0)) == \
+            'CREATE CONSTRAINT IF NOT EXISTS FOR (n:case) REQUIRE n.case_id IS UNIQUE'
+
+    def test_lookup_indexes(self):
+        """Test that lookup keys without indexes get indexes along with indexes in the properties file."""
+        schema = SimpleNamespace(props=SimpleNamespace(id_fields={'case': 'case_id'}, indexes=[{'sample': 'name'}]))
+        driver = FakeSession([('case', 'case_id'), ('cohort', None)])
+        assert create_index(driver, schema, log, MEMGRAPH, [('case', 'case_id'), ('case', 'patient_id')]) == 2
+        assert driver.statements == ['SHOW INDEX INFO', 'CREATE INDEX ON :sample(name);',
+                                     'CREATE INDEX ON :case(patient_id);']
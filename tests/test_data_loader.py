@@ -0,0 +1,540 @@
+"""
+Unit tests for data_loader module.
+"""
+import logging
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+from neo4j import Driver
+from neo4j.exceptions import Neo4jError
+
+import data_loader
+
+from adaptive_batcher import AdaptiveBatcher
+from bento.common.utils import DELETE_MODE, NEW_MODE, UPSERT_MODE, reformat_date
+from checkpoint_journal import JOURNAL_EXT
+from data_loader import DataLoader, MEMGRAPH, NEO4J, get_content_hash
+
+
+class FakeSchema:
+    def get_list_values(self, list_str):
+        return [item.strip() for item in list_str.split('*') if item.strip()]
+
+    def is_relationship_property(self, key):
+        return '$' in key
+
+
+class Counters:
+    """Counters of a result, counters not given are 0."""
+    def __init__(self, **counts):
+        self.counts = counts
+
+    def __getattr__(self, name):
+        return self.counts.get(name, 0)
+
+
+class FakeResult:
+    def __init__(self, records=(), **counts):
+        self.records = list(records)
+        self.counters = Counters(**counts)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def single(self):
+        return self.records[0] if self.records else None
+
+    def consume(self):
+        return self
+
+
+class RecordingSession:
+    """Driver, session and transaction of a fake database, records statements, results are given by respond."""
+    def __init__(self, respond=None):
+        self.respond = respond
+        self.statements = []
+
+    def run(self, statement, parameters=None, **kwargs):
+        parameters = dict(parameters or {}, **kwargs)
+        self.statements.append((statement, parameters))
+        result = self.respond(statement, parameters) if self.respond else None
+        return result if result is not None else FakeResult()
+
+    def session(self, **kwargs):
+        return self
+
+    def begin_transaction(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def find(self, text):
+        return [(statement, parameters) for statement, parameters in self.statements if text in statement]
+
+
+class RecordingDriver(RecordingSession, Driver):
+    """Driver of a fake database, loader checks its type."""
+
+
+class MemoryLimitSession(RecordingSession):
+    """Session failing statements of more than given rows with a memory error, managed transactions run once."""
+    def __init__(self, max_rows):
+        super().__init__(self.check_memory)
+        self.max_rows = max_rows
+
+    def check_memory(self, statement, parameters):
+        if len(parameters['batch']) > self.max_rows:
+            raise Neo4jError('The allocation of an extra 2.0 MiB would use more than the limit 1.0 GiB. Transaction '
+                             'memory limit exceeded')
+        return FakeResult(nodes_created=len(parameters['batch']))
+
+    def write_transaction(self, work, *args):
+        return work(self, *args)
+
+
+class SessionsDriver:
+    """Driver opening a new recording session for each session call."""
+    def __init__(self):
+        self.sessions = []
+
+    def session(self, **kwargs):
+        session = RecordingSession()
+        self.sessions.append(session)
+        return session
+
+
+def write_tsv(tmp_path, name, rows):
+    path = tmp_path / name
+    header = list(rows[0].keys())
+    lines = ['\t'.join(header)] + ['\t'.join(str(row.get(key, '')) for key in header) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def found_values(statement, parameters):
+    """Respond to existence checks of nodes_exist as if all nodes exist."""
+    if statement.startswith('UNWIND $values') and 'RETURN DISTINCT' in statement:
+        return FakeResult([{'value': value} for value in parameters['values']])
+    return None
+
+
+class BarrierSession:
+    """Session with existing case ids, both workers query parents before either of them uses the results."""
+    def __init__(self, case_ids, workers):
+        self.case_ids = case_ids
+        self.barrier = threading.Barrier(workers)
+        self.statements = []
+
+    def run(self, statement, values):
+        self.statements.append(statement)
+        if statement.startswith('UNWIND'):
+            self.barrier.wait()
+        return [{'value': value} for value in values if value in self.case_ids]
+
+
+class FakeDeleteSession(RecordingSession):
+    """Session with given node ids, each node has two relationships, some nodes are gone after ids are collected."""
+    def __init__(self, nodes, gone=()):
+        super().__init__(self.delete)
+        self.nodes = set(nodes)
+        self.gone = set(gone)
+
+    def delete(self, statement, parameters):
+        if statement.endswith('RETURN id(n) AS id'):
+            ids = sorted(self.nodes)
+            self.nodes -= self.gone
+            return FakeResult([{'id': node_id} for node_id in ids])
+        deleted = self.nodes.intersection(parameters['ids'])
+        self.nodes -= deleted
+        return FakeResult(nodes_deleted=len(deleted), relationships_deleted=len(deleted) * 2)
+
+
+class RecordingBatcher:
+    size = 10
+    min_size = 1
+
+    def __init__(self):
+        self.rows = []
+
+    def record(self, seconds, rows):
+        self.rows.append(rows)
+
+
+class TestDataLoader:
+    """Test cases for DataLoader class."""
+
+    def test_parallel_prefetch_parents(self):
+        """Test that workers prefetching parents at the same time keep their own missing parents."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.schema = FakeSchema()
+        loader.known_nodes = set()
+        loader.known_nodes_lock = threading.Lock()
+        session = BarrierSession({'c1', 'c2'}, workers=2)
+        batches = [[{'type': 'sample', 'case.case_id': 'c1'}, {'type': 'sample', 'case.case_id': 'c3'}],
+                   [{'type': 'sample', 'case.case_id': 'c2'}, {'type': 'sample', 'case.case_id': 'c4'}]]
+        results = {}
+
+        def worker(index):
+            missing = loader.prefetch_parents(session, batches[index])
+            results[index] = [loader.parent_exists(session, 'case', 'case_id', obj['case.case_id'], missing)
+                              for obj in batches[index]]
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(batches))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {0: [True, False], 1: [True, False]}
+        assert loader.known_nodes == {('case', 'case_id', 'c1'), ('case', 'case_id', 'c2')}
+        # Missing parents are answered by the prefetch, not queried one by one
+        assert len(session.statements) == 2
+
+    def test_nodes_exist(self):
+        """Test that existence of many nodes is checked with one query."""
+        loader = DataLoader.__new__(DataLoader)
+        session = RecordingSession(lambda statement, parameters: FakeResult([{'value': 'c1'}, {'value': 'c3'}]))
+        assert loader.nodes_exist(session, 'case', 'case_id', {'c1', 'c2', 'c3'}) == {'c1', 'c3'}
+        assert len(session.statements) == 1
+        statement, parameters = session.statements[0]
+        assert statement == \
+            'UNWIND $values AS value MATCH (m:case { case_id: value }) RETURN DISTINCT m.case_id AS value'
+        assert sorted(parameters['values']) == ['c1', 'c2', 'c3']
+
+    def test_prefetch_parents_missing_nodes(self):
+        """Test that each batch gets its own missing parents, and known parents are not queried again."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.schema = FakeSchema()
+        loader.known_nodes = {('study', 'study_id', 'st1')}
+        loader.known_nodes_lock = threading.Lock()
+        existing = {'c1', 'c2', 'st2'}
+
+        def respond(statement, parameters):
+            return FakeResult([{'value': value} for value in parameters['values'] if value in existing])
+
+        session = RecordingSession(respond)
+        missing = loader.prefetch_parents(session, [
+            {'type': 'sample', 'case.case_id': 'c1*c9', 'study.study_id': 'st1'},
+            {'type': 'sample', 'case.case_id': 'c2', 'study.study_id': 'st2'},
+            {'type': 'sample', 'case.case_id': '', 'sample_id': 's1'}])
+        assert missing == {('case', 'case_id', 'c9')}
+        assert sorted(sorted(parameters['values']) for _, parameters in session.statements) == \
+            [['c1', 'c2', 'c9'], ['st2']]
+        assert not loader.parent_exists(session, 'case', 'case_id', 'c9', missing)
+        assert loader.parent_exists(session, 'case', 'case_id', 'c2', missing)
+        assert len(session.statements) == 2
+
+        # Parents found by the previous batch are known, missing ones are checked again for a new batch
+        session = RecordingSession(respond)
+        assert loader.prefetch_parents(session, [{'type': 'sample', 'case.case_id': 'c1*c9'}]) == \
+            {('case', 'case_id', 'c9')}
+        assert [parameters['values'] for _, parameters in session.statements] == [['c9']]
+
+    def test_content_hash_statement(self):
+        """Test that content hash is set apart from node properties, and is a node property without skip_unchanged."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.schema = FakeSchema()
+        loader.database_type = NEO4J
+        loader.statement_cache = {}
+        loader.statement_shapes = {}
+        obj = {'type': 'case', 'case_id': 'c1', 'age': 3, 'cohort.cohort_id': 'co1', 'content_hash': 'abc'}
+        loader.skip_unchanged = True
+        assert loader.get_statement_shape('case_id', obj) == {'age'}
+        assert loader.get_upsert_statement('case', 'case_id', obj).endswith(
+            'ON MATCH SET n.updated = datetime(), n.age = record.age ,n.content_hash = record.content_hash')
+        assert 'content_hash' not in loader.get_node_properties(obj)
+        loader.skip_unchanged = False
+        assert loader.get_statement_shape('case_id', obj) == {'age', 'content_hash'}
+        assert 'content_hash' in loader.get_node_properties(obj)
+
+    def test_delete_in_batches(self):
+        """Test that ids are collected once and deleted in chunks, batch sizes are adjusted by rows deleted."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.log = logging.getLogger('test')
+        loader.stat_lock = threading.Lock()
+        loader.nodes_deleted = loader.relationships_deleted = 0
+        batcher = RecordingBatcher()
+        loader.new_batcher = lambda: batcher
+        session = FakeDeleteSession(range(25), gone=[12])
+        loader.delete_in_batches(session, '(n)', 'n', 'DETACH DELETE n')
+        assert [statement for statement, _ in session.statements] == [
+            'MATCH (n) RETURN id(n) AS id'] + ['UNWIND $ids AS id MATCH (n) WHERE id(n) = id DETACH DELETE n'] * 3
+        assert [parameters['ids'] for _, parameters in session.statements[1:]] == [
+            list(range(10)), list(range(10, 20)), list(range(20, 25))]
+        assert batcher.rows == [10, 9, 5]
+        assert (loader.nodes_deleted, loader.relationships_deleted) == (24, 48)
+
+    def test_replaced_database_session(self):
+        """Test that loading continues with a new session after the database is replaced by wiping."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.journal = None
+        loader.driver = RecordingSession()
+        old_session = RecordingSession()
+        wipes = []
+        loader.wipe_db = lambda session, split, workers: wipes.append(session) or True
+        sessions = []
+        loader.load_nodes = lambda session, txt, loading_mode, split: sessions.append(session)
+        loader._load_all(old_session, ['case.tsv'], DELETE_MODE, True, True)
+        assert wipes == [old_session]
+        assert sessions == [loader.driver]
+
+    def test_delete_nodes_by_id(self):
+        """Test that deleted nodes are counted by database counters, not by ids submitted."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.stat_lock = threading.Lock()
+        loader.nodes_deleted = loader.relationships_deleted = 0
+        loader.nodes_deleted_stat = {}
+        existing = {1, 3, 4}
+
+        def respond(statement, parameters):
+            deleted = [node_id for node_id in parameters['ids'] if node_id in existing]
+            return FakeResult(nodes_deleted=len(deleted), relationships_deleted=2 * len(deleted))
+
+        session = RecordingSession(respond)
+        # Node 2 was already deleted as a child of another node
+        assert loader.delete_nodes_by_id(session, {1: 'case', 2: 'sample', 3: 'sample', 4: 'case'}) == (3, 6)
+        assert loader.nodes_deleted_stat == {'case': 2, 'sample': 1}
+        assert (loader.nodes_deleted, loader.relationships_deleted) == (3, 6)
+        assert [parameters['ids'] for _, parameters in session.statements] == [[1, 4], [2, 3]]
+
+    def test_server_chunk_size(self):
+        """Test that server side transactions commit configured server_chunk_size rows."""
+        loader = DataLoader.__new__(DataLoader)
+        loader.log = logging.getLogger('test')
+        loader.stat_lock = threading.Lock()
+        loader.nodes_deleted = loader.relationships_deleted = 0
+        loader.server_chunk_size = 500
+        session = RecordingSession()
+        loader.execute_batch(session, 'WITH $batch as batch UNWIND batch as record MERGE (n:case { case_id: '
+                                      'record.case_id })', [{'case_id': 'c1'}], in_transactions=True)
+        loader.delete_in_batches(session, '(n:case)', 'n', 'DETACH DELETE n', in_transactions=True)
+        assert [statement.split(' IN TRANSACTIONS ')[1] for statement, _ in session.statements] == \
+            ['OF 500 ROWS', 'OF 500 ROWS']
+
+    def test_unchanged_rows_get_relationships(self, schema, tmp_path):
+        """Test that a node with unchanged content hash still gets relationships missing in DB."""
+        loader = DataLoader(None, schema)
+        loader.skip_unchanged = True
+        file_name = write_tsv(tmp_path, 'sample.tsv', [{'type': 'sample', 'sample_id': 's1', 'case.case_id': 'c1'}])
+        saved_hash = get_content_hash(loader.prepare_node(loader.row_cache.get_file(file_name).first_row(),
+                                                          file_name))
+
+        def respond(statement, parameters):
+            if 'content_hash IS NOT NULL' in statement:
+                return FakeResult([{'value': 's1', 'hash': saved_hash}])
+            return found_values(statement, parameters)
+
+        # Node phase saved the hash, but relationship phase didn't run
+        session = RecordingSession(respond)
+        loader.load_nodes(session, file_name, UPSERT_MODE)
+        assert not session.find('MERGE (n:sample')
+        loader.load_relationships(session, file_name, UPSERT_MODE)
+        assert len(session.find('MERGE (n)-[r:of_case]->(m)')) == 1
+
+        session = RecordingSession(respond)
+        loader.load_single_pass(session, file_name, UPSERT_MODE)
+        statements = session.find('of_case')
+        assert [statement.split(' WITH n, record')[0] for statement, _ in statements
+                if 'MERGE (n)-[r0:of_case]->(m0)' in statement] == [
+            'WITH $batch as batch UNWIND batch as record MATCH (n:sample { sample_id: record[0] })']
+
+    def test_bulk_import_needs_parent_id_pointers(self, schema, tmp_path):
+        """Test that bulk import falls back to batches when a parent pointer is not the id field of the parent."""
+        loader = DataLoader(None, schema)
+        loader.database_type = MEMGRAPH
+        by_id = write_tsv(tmp_path, 'case.tsv', [{'type': 'case', 'case_id': 'c1', 'study.study_id': 'st1'}])
+        by_accession = write_tsv(tmp_path, 'case2.tsv',
+                                 [{'type': 'case', 'case_id': 'c2', 'study.phs_accession': 'phs001'}])
+        assert loader.can_bulk_import(None, [by_id])
+        assert not loader.can_bulk_import(None, [by_id, by_accession])
+        obj = loader.prepare_node(loader.row_cache.get_file(by_id).first_row(), by_id)
+        assert loader.get_bulk_relationships(obj, 2) == [('of_study', 'study', 'st1', {})]
+        obj = loader.prepare_node(loader.row_cache.get_file(by_accession).first_row(), by_accession)
+        with pytest.raises(Exception, match='not id field of "study"'):
+            loader.get_bulk_relationships(obj, 2)
+
+    def test_journal_only_when_resumable(self, schema, tmp_path):
+        """Test that checkpoint journal is only written when resume is enabled, and removed after loading succeeded."""
+        loader = DataLoader(None, schema)
+        loader.driver = RecordingDriver()
+        loader.validate_files = lambda *args: True
+        loader.create_indexes = lambda: 0
+        journals = []
+
+        def load_all(*args, **kwargs):
+            journals.append(loader.journal)
+            loader.checkpoint(file_name, 'nodes', 2)
+
+        loader._load_all = load_all
+        file_name = write_tsv(tmp_path, 'case.tsv', [{'type': 'case', 'case_id': 'c1'}])
+        temp_folder = str(tmp_path / 'tmp')
+        for resume in [False, True]:
+            assert loader._load([file_name], False, False, UPSERT_MODE, False, 1, temp_folder, False, True, True,
+                                None, None, None, None, 1, resume=resume)
+            assert not list((tmp_path / 'tmp').rglob('*' + JOURNAL_EXT))
+        assert journals[0] is None
+        assert journals[1].file_name.startswith(temp_folder)
+        assert not os.path.exists(journals[1].file_name)
+
+    def test_violations_flushed_while_validating(self, schema, tmp_path, monkeypatch):
+        """Test that violations are written into report every VIOLATION_FLUSH_ROWS rows, not after the whole file."""
+        monkeypatch.setattr(data_loader, 'VIOLATION_FLUSH_ROWS', 2)
+        loader = DataLoader(None, schema)
+        file_name = write_tsv(tmp_path, 'case.tsv', [{'type': 'case', 'case_id': 'c{}'.format(i), 'age': 'old'}
+                                                     for i in range(4)])
+        written = []
+        report_writer = SimpleNamespace(write=lambda sheet, row: written.append(row))
+        assert not loader.validate_file(file_name, 10, False, report_writer)
+        # Line numbers of rows in the report, rows after last flush are still in the collector
+        assert [row[4] for row in written] == ['2', '3,4']
+        assert [row[4] for row in loader.violations.sheets['case']] == ['5']
+
+    def test_load_nodes_parallel(self, schema, tmp_path):
+        """Test that files of same node type are loaded in order by one worker, each worker has its own session."""
+        loader = DataLoader(None, schema)
+        loader.driver = SessionsDriver()
+        case1 = write_tsv(tmp_path, 'case1.tsv', [{'type': 'case', 'case_id': 'c1'}])
+        sample = write_tsv(tmp_path, 'sample.tsv', [{'type': 'sample', 'sample_id': 's1'}])
+        case2 = write_tsv(tmp_path, 'case2.tsv', [{'type': 'case', 'case_id': 'c2'}])
+        loaded = []
+        lock = threading.Lock()
+
+        def load_nodes(session, txt, loading_mode, split, managed):
+            with lock:
+                loaded.append((session, txt, split, managed))
+
+        loader.load_nodes = load_nodes
+        loader.load_nodes_parallel([case1, sample, case2], UPSERT_MODE, 2)
+        sessions = {txt: session for session, txt, _, _ in loaded}
+        assert [txt for _, txt, _, _ in loaded if txt != sample] == [case1, case2]
+        assert sessions[case1] is sessions[case2] is not sessions[sample]
+        assert len(loader.driver.sessions) == 2
+        assert all(split and managed for _, _, split, managed in loaded)
+
+    def test_load_nodes_parallel_error(self, schema, tmp_path):
+        """Test that an error of a worker stops loading."""
+        loader = DataLoader(None, schema)
+        loader.driver = SessionsDriver()
+        case = write_tsv(tmp_path, 'case.tsv', [{'type': 'case', 'case_id': 'c1'}])
+        sample = write_tsv(tmp_path, 'sample.tsv', [{'type': 'sample', 'sample_id': 's1'}])
+
+        def load_nodes(session, txt, loading_mode, split, managed):
+            if txt == sample:
+                raise ValueError('Can not load "{}"'.format(txt))
+
+        loader.load_nodes = load_nodes
+        with pytest.raises(ValueError, match='sample.tsv'):
+            loader.load_nodes_parallel([case, sample], UPSERT_MODE, 2)
+
+    def test_statements_grouped_by_shape(self, schema):
+        """Test that rows are batched by the properties they set, pointers and relationship properties aren't set."""
+        loader = DataLoader(None, schema)
+        loader.database_type = NEO4J
+        rows = [
+            {'type': 'sample', 'sample_id': 's1', 'sample_type': 'blood', 'case.case_id': 'c1'},
+            {'sample_type': 'tissue', 'type': 'sample', 'sample_id': 's2', 'of_case$sampled_on': 'd'},
+            {'type': 'sample', 'sample_id': 's3'},
+            {'type': 'sample', 'sample_id': 's4', 'sample_type': 'blood', 'case.case_id': 'c2'},
+        ]
+        (batches, _, line_num, node_type), = loader.prepare_node_batches(enumerate(rows, 2), UPSERT_MODE)
+        assert (line_num, node_type) == (5, 'sample')
+        assert sorted([obj['sample_id'] for obj in objs] for objs in batches.values()) == [['s1', 's2', 's4'], ['s3']]
+        statement = loader.get_upsert_statement('sample', 'sample_id', rows[0])
+        assert statement.endswith('ON MATCH SET n.updated = datetime(), n.sample_type = record.sample_type')
+        assert len(loader.statement_cache) == 2
+
+    def test_single_pass(self, schema, tmp_path):
+        """Test that nodes and relationships of a batch are written by one statement, parents are checked at once."""
+        loader = DataLoader(None, schema)
+        loader.database_type = NEO4J
+        loader.nodes_stat, loader.nodes_stat_updated, loader.relationships_stat = {}, {}, {}
+        file_name = write_tsv(tmp_path, 'sample.tsv', [
+            {'type': 'sample', 'sample_id': 's{}'.format(i), 'sample_type': 'blood', 'case.case_id': 'c{}'.format(i),
+             'of_case$sampled_on': '2020-01-0{}'.format(i)} for i in range(1, 3)])
+        session = RecordingSession(found_values)
+        loader.load_single_pass(session, file_name, UPSERT_MODE)
+        exists = session.find('RETURN DISTINCT m.case_id')
+        assert [sorted(parameters['values']) for _, parameters in exists] == [['c1', 'c2']]
+        (statement, parameters), = session.find('MERGE (n:sample')
+        assert 'MERGE (n)-[r0:of_case]->(m0)' in statement
+        assert 'n.of_case' not in statement and 'r0.sampled_on = record[4].sampled_on' in statement
+        assert [row[3:] for row in parameters['batch']] == [[['c1'], {'sampled_on': reformat_date('2020-01-01')}],
+                                                            [['c2'], {'sampled_on': reformat_date('2020-01-02')}]]
+
+    def test_single_pass_missing_parent(self, schema, tmp_path):
+        """Test that single pass loading stops at a row whose parents are not found."""
+        loader = DataLoader(None, schema)
+        loader.database_type = NEO4J
+        file_name = write_tsv(tmp_path, 'sample.tsv', [{'type': 'sample', 'sample_id': 's1', 'case.case_id': 'c1'}])
+        session = RecordingSession()
+        with pytest.raises(Exception, match='Line: 2: No parents found'):
+            loader.load_single_pass(session, file_name, UPSERT_MODE)
+        assert not session.find('MERGE (n:sample')
+
+    def test_find_missing_delete_nodes(self, schema, tmp_path, monkeypatch):
+        """Test that nodes of a delete file are checked in chunks, one query per label in each chunk."""
+        monkeypatch.setattr(data_loader, 'BATCH_SIZE', 3)
+        loader = DataLoader(None, schema)
+        path = tmp_path / 'delete.tsv'
+        path.write_text('type\tcase_id\tsample_id\ncase\tc1\ncase\tc9\nsample\t\ts1\ncase\nsample\t\ts9\n'
+                        'case\tc9\n', encoding='utf-8')
+
+        def respond(statement, parameters):
+            return FakeResult([{'value': value} for value in parameters['values'] if value in {'c1', 's1'}])
+
+        session = RecordingSession(respond)
+        missing_nodes, valid = loader.find_missing_delete_nodes(session, str(path))
+        assert missing_nodes == [(3, 'case', 'case_id', 'c9'), (6, 'sample', 'sample_id', 's9'),
+                                 (7, 'case', 'case_id', 'c9')]
+        assert not valid
+        # Chunks are lines 2-4 and 5-7, line 5 has no id
+        queries = [(statement.split()[5], sorted(parameters['values'])) for statement, parameters in session.statements]
+        assert queries == [('(m:case', ['c1', 'c9']), ('(m:sample', ['s1']), ('(m:sample', ['s9']), ('(m:case', ['c9'])]
+
+    def test_check_new_nodes(self, schema):
+        """Test that existing nodes of a batch are found with one query per label, first line is reported."""
+        loader = DataLoader(None, schema)
+        loader.database_type = NEO4J
+        rows = [{'type': 'case', 'case_id': 'c1', 'age': 3}, {'type': 'case', 'case_id': 'c2'},
+                {'type': 'sample', 'sample_id': 's1'}, {'type': 'case', 'case_id': 'c3', 'age': 5}]
+        (batches, new_node_lines, _, _), = loader.prepare_node_batches(enumerate(rows, 2), NEW_MODE)
+        assert len(batches) == 3
+
+        def respond(statement, parameters):
+            return FakeResult([{'value': value} for value in parameters['values'] if value in {'c3', 'c2'}])
+
+        session = RecordingSession(respond)
+        with pytest.raises(Exception, match=r'Line: 3: Node \(:case { case_id: c2 }\) exists'):
+            loader.check_new_nodes(session, batches, new_node_lines)
+        assert sorted(sorted(parameters['values']) for _, parameters in session.statements) == [['c1', 'c2', 'c3'],
+                                                                                               ['s1']]
+        session = RecordingSession()
+        loader.check_new_nodes(session, batches, new_node_lines)
+        assert len(session.statements) == 2
+
+    def test_memory_error_shrinks_batch(self, schema):
+        """Test that a batch hitting memory limit is written again in halves, and later batches are smaller."""
+        loader = DataLoader(None, schema)
+        loader.database_type = NEO4J
+        loader.nodes_stat, loader.nodes_stat_updated = {}, {}
+        rows = [{'type': 'case', 'case_id': 'c{}'.format(i)} for i in range(4)]
+        (batches, _, _, _), = loader.prepare_node_batches(enumerate(rows, 2), UPSERT_MODE)
+        batcher = AdaptiveBatcher(1, 100, initial_size=4)
+        session = MemoryLimitSession(2)
+        assert loader.commit_node_batches(session, session, batches, 0, 0, False, batcher) == (4, 0)
+        assert [len(parameters['batch']) for _, parameters in session.statements] == [4, 4, 2, 2]
+        assert batcher.size == 2
@@ -0,0 +1,77 @@
+"""
+Unit tests for file_planner module.
+"""
+import logging
+
+from file_planner import plan_file_waves
+from row_cache import RowCache
+
+log = logging.getLogger('test')
+
+
+class FakeSchema:
+    """Data model with given (child, parent) relationships."""
+    def __init__(self, relationships):
+        self.relationships = relationships
+
+    def get_relationship(self, node_type, parent_type):
+        return {'relationship_type': 'of_' + parent_type} if (node_type, parent_type) in self.relationships else None
+
+
+def write_file(tmp_path, name, header, row=None):
+    path = tmp_path / name
+    lines = ['\t'.join(header)] + (['\t'.join(row)] if row else [])
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+class TestPlanFileWaves:
+    """Test cases for plan_file_waves function."""
+
+    def test_dependency_waves(self, tmp_path):
+        """Test that parents are loaded in earlier waves, independent files share a wave in original order."""
+        schema = FakeSchema({('case', 'study'), ('sample', 'case'), ('diagnosis', 'case')})
+        sample = write_file(tmp_path, 'sample.tsv', ['type', 'sample_id', 'case.case_id'], ['sample', 's1', 'c1'])
+        diagnosis = write_file(tmp_path, 'diagnosis.tsv', ['type', 'diagnosis_id', 'case.case_id'],
+                               ['diagnosis', 'd1', 'c1'])
+        case = write_file(tmp_path, 'case.tsv', ['type', 'case_id', 'study.study_id'], ['case', 'c1', 'st1'])
+        study = write_file(tmp_path, 'study.tsv', ['type', 'study_id'], ['study', 'st1'])
+        assert plan_file_waves([sample, diagnosis, case, study], schema, RowCache(), log) == \
+            [[study], [case], [sample, diagnosis]]
+
+    def test_parents_not_in_files(self, tmp_path):
+        """Test that parent types without files don't hold back their children."""
+        schema = FakeSchema({('sample', 'case')})
+        sample = write_file(tmp_path, 'sample.tsv', ['type', 'sample_id', 'case.case_id'], ['sample', 's1', 'c1'])
+        assert plan_file_waves([sample], schema, RowCache(), log) == [[sample]]
+
+    def test_cycle(self, tmp_path, caplog):
+        """Test that files in a dependency cycle are loaded last in original order."""
+        schema = FakeSchema({('case', 'study'), ('sample', 'case'), ('case', 'sample')})
+        sample = write_file(tmp_path, 'sample.tsv', ['type', 'sample_id', 'case.case_id'], ['sample', 's1', 'c1'])
+        case = write_file(tmp_path, 'case.tsv', ['type', 'case_id', 'sample.sample_id', 'study.study_id'],
+                          ['case', 'c1', 's1', 'st1'])
+        study = write_file(tmp_path, 'study.tsv', ['type', 'study_id'], ['study', 'st1'])
+        assert plan_file_waves([sample, case, study], schema, RowCache(), log) == [[study], [sample, case]]
+        assert 'Circular dependencies' in caplog.text
+
+    def test_self_reference(self, tmp_path):
+        """Test that a file pointing to nodes of its own type doesn't depend on itself."""
+        schema = FakeSchema({('case', 'case')})
+        case = write_file(tmp_path, 'case.tsv', ['type', 'case_id', 'case.case_id'], ['case', 'c2', 'c1'])
+        assert plan_file_waves([case], schema, RowCache(), log) == [[case]]
+
+    def test_undefined_relationship(self, tmp_path, caplog):
+        """Test that pointers without relationship in data model are not dependencies."""
+        schema = FakeSchema(set())
+        case = write_file(tmp_path, 'case.tsv', ['type', 'case_id'], ['case', 'c1'])
+        sample = write_file(tmp_path, 'sample.tsv', ['type', 'sample_id', 'case.case_id'], ['sample', 's1', 'c1'])
+        assert plan_file_waves([sample, case], schema, RowCache(), log) == [[sample, case]]
+        assert 'no relationship from "sample" to "case"' in caplog.text
+
+    def test_unknown_type(self, tmp_path):
+        """Test that a file without rows still waits for its parents, and nothing waits for it."""
+        schema = FakeSchema({('sample', 'case')})
+        empty = write_file(tmp_path, 'empty.tsv', ['type', 'sample_id', 'case.case_id'])
+        case = write_file(tmp_path, 'case.tsv', ['type', 'case_id'], ['case', 'c1'])
+        assert plan_file_waves([empty, case], schema, RowCache(), log) == [[case], [empty]]
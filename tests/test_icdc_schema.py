@@ -0,0 +1,87 @@
+"""
+Unit tests for icdc_schema module.
+"""
+import json
+
+import pytest
+
+from bento.common.utils import reformat_date
+
+# (node type, column, raw value, value prepared by prepare_node before row plans)
+CONVERSIONS = [
+    ('case', 'age', '42', 42),
+    ('case', 'age', '', None),
+    ('case', 'age', None, None),
+    ('case', 'age', '4.5', None),
+    ('case', 'age', 'abc', None),
+    ('case', 'weight', '4.5', 4.5),
+    ('case', 'weight', '7', 7.0),
+    ('case', 'weight', '', None),
+    ('case', 'weight', None, None),
+    ('case', 'weight', 'heavy', None),
+    ('case', 'alive', 'Yes', True),
+    ('case', 'alive', 'TRUE', True),
+    ('case', 'alive', 'no', False),
+    ('case', 'alive', 'False', False),
+    ('case', 'alive', 'unknown', False),
+    ('case', 'alive', 'maybe', None),
+    ('case', 'alive', '', None),
+    ('case', 'alive', None, None),
+    ('case', 'enrolled', '2020-01-02', reformat_date('2020-01-02')),
+    ('case', 'enrolled', None, None),
+    ('case', 'tags', 'a|b | c', json.dumps(['a', 'b', 'c'])),
+    ('case', 'tags', 'a', json.dumps(['a'])),
+    ('case', 'tags', '', json.dumps([])),
+    ('sample', 'of_case$sampled_on', '2021-03-04', reformat_date('2021-03-04')),
+    ('sample', 'of_case$sampled_on', None, None),
+    ('sample', 'case.age', '42', 42),
+    ('sample', 'case.age', 'abc', None),
+]
+
+# (node type, column) without conversion
+UNCONVERTED = [
+    ('case', 'case_id'),
+    ('case', 'study.study_id'),
+    ('sample', 'sample_type'),
+    ('sample', 'case.case_id'),
+    ('sample', 'unknown_column'),
+    ('sample', 'of_case$unknown_property'),
+]
+
+
+def get_converters(schema, node_type, header):
+    return dict(schema.get_row_plan(node_type, header).converters)
+
+
+class TestRowPlan:
+    """Test cases for row plans of ICDC_Schema."""
+
+    @pytest.mark.parametrize('node_type,column,value,expected', CONVERSIONS)
+    def test_converters(self, schema, node_type, column, value, expected):
+        """Test that converters prepare values same as prepare_node did before row plans."""
+        converters = get_converters(schema, node_type, ('type', column))
+        assert converters[column](value) == expected
+
+    @pytest.mark.parametrize('node_type,column', UNCONVERTED)
+    def test_unconverted_columns(self, schema, node_type, column):
+        """Test that columns of string or unknown properties are not converted."""
+        assert column not in get_converters(schema, node_type, ('type', column))
+
+    def test_parent_pointers(self, schema):
+        """Test that parent pointers keep parent type and id field, and are renamed if a column has same name."""
+        plan = schema.get_row_plan('sample', ('type', 'sample_id', 'case.case_id', 'study.sample_id', ''))
+        assert plan.parent_pointers == {'case.case_id': ('case', 'case_id', 'case_id'),
+                                        'study.sample_id': ('study', 'sample_id', 'study_sample_id')}
+        assert plan.relationship_props == set()
+
+    def test_relationship_props(self, schema):
+        """Test that relationship property columns are found by relationship property delimiter."""
+        plan = schema.get_row_plan('sample', ('type', 'sample_id', 'case.case_id', 'of_case$sampled_on'))
+        assert plan.relationship_props == {'of_case$sampled_on'}
+        assert list(plan.parent_pointers) == ['case.case_id']
+
+    def test_plan_cache(self, schema):
+        """Test that a plan is compiled once per node type and header."""
+        header = ('type', 'case_id', 'age')
+        assert schema.get_row_plan('case', header) is schema.get_row_plan('case', header)
+        assert schema.get_row_plan('case', header) is not schema.get_row_plan('case', header + ('weight',))
@@ -0,0 +1,17 @@
+"""
+Unit tests for index_advisor module.
+"""
+from index_advisor import get_lookup_keys
+
+
+class TestIndexAdvisor:
+    """Test cases for index_advisor module."""
+
+    def test_lookup_keys(self):
+        """Test that id fields of node types and parent pointer columns are looked up, uuid without id field."""
+        files = [('case', ['type', 'case_id', 'cohort.cohort_id']),
+                 ('sample', ['type', 'sample_id', 'case.case_id', 'case.patient_id']),
+                 ('visit', ['type', 'visit_date', 'case.case_id'])]
+        assert get_lookup_keys({'case': 'case_id', 'sample': 'sample_id'}, files) == [
+            ('case', 'case_id'), ('case', 'patient_id'), ('cohort', 'cohort_id'), ('sample', 'sample_id'),
+            ('visit', 'uuid')]
@@ -0,0 +1,43 @@
+"""
+Unit tests for load_manifest module.
+"""
+import logging
+
+from load_manifest import LoadManifest
+
+log = logging.getLogger('test')
+
+
+def write_file(path, content):
+    path.write_text(content)
+    return str(path)
+
+
+class TestLoadManifest:
+    """Test cases for LoadManifest class."""
+
+    def test_unchanged_files_skipped(self, tmp_path):
+        """Test that only files changed since last save are reported as changed."""
+        case_file = write_file(tmp_path / 'case.tsv', 'type\tcase_id\ncase\t1\n')
+        sample_file = write_file(tmp_path / 'sample.tsv', 'type\tsample_id\nsample\t1\n')
+        manifest_file = str(tmp_path / 'manifest.json')
+        manifest = LoadManifest(manifest_file, 'schema', 'upsert', log)
+        assert manifest.find_changed_files([case_file, sample_file]) == ([case_file, sample_file], [])
+        manifest.save()
+
+        write_file(tmp_path / 'sample.tsv', 'type\tsample_id\nsample\t22\n')
+        manifest = LoadManifest(manifest_file, 'schema', 'upsert', log)
+        assert manifest.find_changed_files([case_file, sample_file]) == ([sample_file], [case_file])
+
+    def test_schema_and_mode_changes(self, tmp_path):
+        """Test that all files are changed when schema or loading mode changes."""
+        case_file = write_file(tmp_path / 'case.tsv', 'type\tcase_id\ncase\t1\n')
+        manifest_file = str(tmp_path / 'manifest.json')
+        manifest = LoadManifest(manifest_file, 'schema', 'upsert', log)
+        manifest.find_changed_files([case_file])
+        manifest.save()
+
+        assert LoadManifest(manifest_file, 'schema2', 'upsert', log).find_changed_files([case_file]) == \
+            ([case_file], [])
+        assert LoadManifest(manifest_file, 'schema', 'new', log).find_changed_files([case_file]) == \
+            ([case_file], [])
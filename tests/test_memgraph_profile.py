@@ -0,0 +1,82 @@
+"""
+Unit tests for memgraph_profile module.
+"""
+import logging
+
+from neo4j.exceptions import Neo4jError
+
+from memgraph_profile import MemgraphLoadProfile
+
+log = logging.getLogger('test')
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def single(self):
+        return self.records[0]
+
+    def consume(self):
+        return self
+
+
+class FakeDriver:
+    """Driver whose sessions record statements, storage mode can be rejected like by older Memgraph versions."""
+    def __init__(self, constraints=(), storage_mode=True):
+        self.constraints = list(constraints)
+        self.storage_mode = storage_mode
+        self.statements = []
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def run(self, statement):
+        self.statements.append(statement)
+        if statement.startswith('STORAGE MODE') and not self.storage_mode:
+            raise Neo4jError('Storage mode not supported')
+        if statement == 'SHOW CONSTRAINT INFO':
+            return FakeResult(self.constraints)
+        if 'count(' in statement:
+            return FakeResult([{'count': 3}])
+        return FakeResult([])
+
+
+class TestMemgraphLoadProfile:
+    """Test cases for MemgraphLoadProfile class."""
+
+    def test_load_profile(self):
+        """Test that the graph is dropped in analytical mode, and transactional mode and a snapshot follow loading."""
+        driver = FakeDriver()
+        profile = MemgraphLoadProfile(driver, log)
+        profile.start()
+        assert profile.drop_graph() == (3, 3)
+        profile.finish(True)
+        assert driver.statements[0] == 'STORAGE MODE IN_MEMORY_ANALYTICAL'
+        assert driver.statements[-3:] == ['DROP GRAPH', 'STORAGE MODE IN_MEMORY_TRANSACTIONAL', 'CREATE SNAPSHOT']
+
+    def test_no_drop(self):
+        """Test that the graph isn't dropped with constraints or outside analytical mode, and failures skip snapshot."""
+        driver = FakeDriver(constraints=[{'constraint type': 'unique'}])
+        profile = MemgraphLoadProfile(driver, log)
+        profile.start()
+        assert profile.drop_graph() is None
+        profile.finish(False)
+        assert 'DROP GRAPH' not in driver.statements
+        assert driver.statements[-1] == 'STORAGE MODE IN_MEMORY_TRANSACTIONAL'
+
+        driver = FakeDriver(storage_mode=False)
+        profile = MemgraphLoadProfile(driver, log)
+        profile.start()
+        assert profile.drop_graph() is None
+        profile.finish(True)
+        assert driver.statements == ['STORAGE MODE IN_MEMORY_ANALYTICAL', 'CREATE SNAPSHOT']
@@ -0,0 +1,153 @@
+"""
+Unit tests for relationship_writer module.
+"""
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+from neo4j.exceptions import ClientError, TransientError
+
+import relationship_writer
+from relationship_writer import RelationshipWriter, PARENT_ID_KEY, is_retryable_error
+
+log = logging.getLogger('test')
+STATEMENT = ('WITH $batch as batch UNWIND batch as record MATCH (m:case {{ case_id: record.{} }}) '
+             'MATCH (n:sample {{ sample_id: record.sample_id }}) MERGE (n)-[r:of_case]->(m)').format(PARENT_ID_KEY)
+
+
+class FakeResult:
+    def __init__(self, relationships_created):
+        self.counters = SimpleNamespace(relationships_created=relationships_created)
+
+    def consume(self):
+        return self
+
+
+class FakeDriver:
+    """Driver recording rows written by each worker session, errors are raised by the first transactions."""
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.lock = threading.Lock()
+        self.writes = []
+        self.attempts = 0
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def begin_transaction(self):
+        return self
+
+    def run(self, statement, batch):
+        with self.driver.lock:
+            self.driver.attempts += 1
+            if self.driver.errors:
+                raise self.driver.errors.pop(0)
+            self.driver.writes.append((id(self), batch))
+        return FakeResult(len(batch))
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def no_delay(monkeypatch):
+    monkeypatch.setattr(relationship_writer.time, 'sleep', lambda seconds: None)
+
+
+def get_records(pairs):
+    return [{PARENT_ID_KEY: parent_id, 'sample_id': sample_id} for sample_id, parent_id in pairs]
+
+
+class TestRelationshipWriter:
+    """Test cases for RelationshipWriter class."""
+
+    def test_shard_by_parent(self):
+        """Test that relationships to one parent are written by one worker, sorted by parent id in each shard."""
+        driver = FakeDriver()
+        writer = RelationshipWriter(driver, 3, log)
+        try:
+            key = ('sample', 'of_case', 'case')
+            writer.submit(key, 'case', STATEMENT, get_records(
+                [('s{}'.format(i), 'c{}'.format(i % 7)) for i in range(40)]))
+            writer.submit(key, 'case', STATEMENT, get_records([('s40', 'c1'), ('s41', 'c8')]))
+            assert writer.wait() == {key: 42}
+        finally:
+            writer.close()
+
+        # Encoded rows are [parent id, sample id]
+        sessions_by_parent = {}
+        for session_id, rows in driver.writes:
+            parent_ids = [row[0] for row in rows]
+            assert parent_ids == sorted(parent_ids)
+            for parent_id in parent_ids:
+                sessions_by_parent.setdefault(parent_id, set()).add(session_id)
+        assert all(len(sessions) == 1 for sessions in sessions_by_parent.values())
+        assert sorted(row[1] for _, rows in driver.writes for row in rows) == sorted(
+            's{}'.format(i) for i in range(42))
+
+    def test_child_of_parents_of_different_types(self):
+        """Test that a child is in a partition for each parent type, conflicting writes of the child are retried."""
+        conflict = ClientError('Cannot resolve conflicting transactions. You can retry this transaction when the '
+                               'conflicting transaction is finished')
+        driver = FakeDriver([conflict])
+        writer = RelationshipWriter(driver, 2, log)
+        try:
+            writer.submit(('sample', 'of_case', 'case'), 'case', STATEMENT, get_records([('s1', 'c1')]))
+            writer.submit(('sample', 'of_study', 'study'), 'study', STATEMENT, get_records([('s1', 'st1')]))
+            assert writer.wait() == {('sample', 'of_case', 'case'): 1, ('sample', 'of_study', 'study'): 1}
+        finally:
+            writer.close()
+        assert driver.attempts == 3
+
+    def test_retry(self):
+        """Test that transient errors are retried."""
+        driver = FakeDriver([TransientError('deadlock'), TransientError('deadlock')])
+        writer = RelationshipWriter(driver, 1, log)
+        try:
+            writer.submit(('sample', 'of_case', 'case'), 'case', STATEMENT, get_records([('s1', 'c1')]))
+            assert writer.wait() == {('sample', 'of_case', 'case'): 1}
+        finally:
+            writer.close()
+        assert driver.attempts == 3
+
+    def test_give_up(self):
+        """Test that writing stops after max retries, and other errors are not retried."""
+        driver = FakeDriver([TransientError('deadlock')] * 3)
+        writer = RelationshipWriter(driver, 1, log, max_retries=2)
+        try:
+            writer.submit(('sample', 'of_case', 'case'), 'case', STATEMENT, get_records([('s1', 'c1')]))
+            with pytest.raises(TransientError):
+                writer.wait()
+            with pytest.raises(TransientError):
+                writer.submit(('sample', 'of_case', 'case'), 'case', STATEMENT, get_records([('s2', 'c1')]))
+        finally:
+            writer.close()
+        assert driver.attempts == 3
+
+        driver = FakeDriver([ClientError('Invalid input')])
+        writer = RelationshipWriter(driver, 1, log)
+        try:
+            writer.submit(('sample', 'of_case', 'case'), 'case', STATEMENT, get_records([('s1', 'c1')]))
+            with pytest.raises(ClientError):
+                writer.wait()
+        finally:
+            writer.close()
+        assert driver.attempts == 1
+
+    def test_is_retryable_error(self):
+        """Test that Neo4j transient errors and Memgraph write conflicts are retryable."""
+        assert is_retryable_error(TransientError('deadlock'))
+        assert is_retryable_error(ClientError('Cannot resolve conflicting transactions.'))
+        assert not is_retryable_error(ClientError('Invalid input'))
@@ -0,0 +1,77 @@
+"""
+Unit tests for row_cache module.
+"""
+import pytest
+
+import row_cache
+from row_cache import RowCache, check_encoding, UTF8, WINDOWS1252
+
+
+@pytest.fixture
+def tsv_file(tmp_path):
+    path = tmp_path / 'case.tsv'
+    path.write_text('type\t case_id \tage\n\ncase\t c1 \t5\ncase\tc2\n', encoding='utf-8')
+    return str(path)
+
+
+class TestCheckEncoding:
+    """Test cases for check_encoding function."""
+
+    def test_utf8(self, tsv_file):
+        """Test that a UTF-8 file is detected as UTF-8."""
+        assert check_encoding(tsv_file) == UTF8
+
+    def test_windows1252(self, tmp_path):
+        """Test that a non UTF-8 file is detected as windows-1252."""
+        path = tmp_path / 'case.tsv'
+        path.write_bytes(b'type\tname\ncase\t\xe9\n')
+        assert check_encoding(str(path)) == WINDOWS1252
+
+
+class TestRowCache:
+    """Test cases for RowCache class."""
+
+    def test_rows_are_cleaned(self, tsv_file):
+        """Test that keys and values are stripped, empty lines skipped and short rows padded."""
+        rows = list(RowCache().get_file(tsv_file).rows())
+        assert rows == [
+            (2, {'type': 'case', 'case_id': 'c1', 'age': '5'}),
+            (3, {'type': 'case', 'case_id': 'c2', 'age': None}),
+        ]
+
+    def test_file_parsed_once(self, tsv_file):
+        """Test that the same parsed file is returned for an unchanged file."""
+        cache = RowCache()
+        assert cache.get_file(tsv_file) is cache.get_file(tsv_file)
+
+    def test_spill_to_disk(self, tsv_file, tmp_path):
+        """Test that rows spilled to disk are read back in order."""
+        cache = RowCache(str(tmp_path / 'spill'), max_cells=1)
+        rows = list(cache.get_file(tsv_file).rows())
+        assert [row['case_id'] for _, row in rows] == ['c1', 'c2']
+        cache.clear()
+        assert cache.cells == 0
+
+    def test_non_utf8_after_sample(self, tmp_path, monkeypatch):
+        """Test that a file is parsed again as windows-1252 if non UTF-8 bytes are found after the sample."""
+        path = tmp_path / 'case.tsv'
+        path.write_bytes(b'type\tname\n' + b'case\tabc\n' * 1000 + b'case\t\xe9\n')
+        monkeypatch.setattr(row_cache, 'check_encoding', lambda file_name: UTF8)
+        cached = RowCache().get_file(str(path))
+        assert cached.encoding == WINDOWS1252
+        assert len(cached) == 1001
+
+    def test_prepared_rows(self, tsv_file):
+        """Test that prepared rows are not cached, each iteration prepares parsed rows again."""
+        calls = []
+
+        def prepare(row):
+            calls.append(row['case_id'])
+            return {**row, 'prepared': True}
+
+        cached = RowCache().get_file(tsv_file)
+        first = list(cached.prepared_rows(prepare))
+        second = list(cached.prepared_rows(prepare))
+        assert first == second == [(2, {'type': 'case', 'case_id': 'c1', 'age': '5', 'prepared': True}),
+                                   (3, {'type': 'case', 'case_id': 'c2', 'age': None, 'prepared': True})]
+        assert calls == ['c1', 'c2', 'c1', 'c2']
@@ -0,0 +1,81 @@
+"""
+Unit tests for validation_report module.
+"""
+import csv
+
+from validation_report import ViolationCollector, LineGroups, open_report_writer
+
+
+def read_tsv(file_name):
+    with open(file_name, newline='', encoding='utf-8') as in_file:
+        return list(csv.reader(in_file, delimiter='\t'))
+
+
+class TestViolationCollector:
+    """Test cases for ViolationCollector and LineGroups classes."""
+
+    def test_grouped_lines(self):
+        """Test that violations with same key are reported once with sorted line numbers."""
+        groups = LineGroups()
+        groups.add(('age', 'abc', 'wrong_type'), 5)
+        groups.add(('age', 'abc', 'wrong_type'), 3)
+        groups.add(('sex', None, 'property_missing'), 4)
+        collector = ViolationCollector()
+        collector.add_groups('case', '/data/case.tsv', groups, 'error')
+        assert collector.sheets['case'] == [
+            ('case.tsv', 'age', 'abc', 'wrong_type', '3,5', 'error'),
+            ('case.tsv', 'sex', None, 'property_missing', '4', 'error'),
+        ]
+
+    def test_flush(self, tmp_path):
+        """Test that flushed violations are written and removed from the buffer."""
+        collector = ViolationCollector()
+        collector.add('case', 'case.tsv', 'foo', 'property_not_found_in_model', 'warning')
+        writer = open_report_writer('tsv', str(tmp_path / 'report'))
+        collector.flush(writer)
+        writer.close()
+        assert len(collector) == 0
+        assert read_tsv(str(tmp_path / 'report.tsv'))[1] == \
+            ['case', 'case.tsv', 'foo', '', 'property_not_found_in_model', '', 'warning']
+
+
+class TestReportWriter:
+    """Test cases for report writers."""
+
+    def test_max_rows(self, tmp_path):
+        """Test that rows over the cap are only counted in the summary."""
+        writer = open_report_writer('tsv', str(tmp_path / 'report'), max_rows=2)
+        for line_num in range(3):
+            writer.write('case', ('case.tsv', 'age', 'abc', 'wrong_type', str(line_num), 'error'))
+        writer.close()
+        assert len(read_tsv(str(tmp_path / 'report.tsv'))) == 3
+        assert read_tsv(str(tmp_path / 'report_summary.tsv'))[1] == ['case', 'wrong_type', 'error', '3', '1']
+
+    def test_xlsx(self, tmp_path):
+        """Test that an Excel report is written and can be removed."""
+        writer = open_report_writer('xlsx', str(tmp_path / 'report'))
+        writer.write('case', ('case.tsv', 'age', 'abc', 'wrong_type', '2', 'error'))
+        writer.close()
+        assert (tmp_path / 'report.xlsx').exists()
+        writer.remove()
+        assert not (tmp_path / 'report.xlsx').exists()
+
+    @staticmethod
+    def get_sheet_names(tmp_path, node_types):
+        writer = open_report_writer('xlsx', str(tmp_path / 'report'))
+        for node_type in node_types:
+            writer.write(node_type, ('case.tsv', 'age', 'abc', 'wrong_type', '2', 'error'))
+        writer.close()
+        return [worksheet.get_name() for worksheet in writer.workbook.worksheets()]
+
+    def test_xlsx_long_sheet_names(self, tmp_path):
+        """Test that node types sharing their first 31 characters get unique sheet names."""
+        assert self.get_sheet_names(tmp_path, ['a' * 40, 'a' * 40 + 'b']) == ['a' * 31, 'a' * 29 + '~2', 'Summary']
+
+    def test_xlsx_summary_sheet_name(self, tmp_path):
+        """Test that a node type named like the summary sheet doesn't collide with it."""
+        assert self.get_sheet_names(tmp_path, ['summary']) == ['summary~2', 'Summary']
+
+    def test_xlsx_invalid_sheet_name(self, tmp_path):
+        """Test that characters not allowed in sheet names are replaced."""
+        assert self.get_sheet_names(tmp_path, ['case[1]:*?/\\']) == ['case_1______', 'Summary']
@@ -0,0 +1,259 @@
+import csv
+import os
+import re
+
+import xlsxwriter
+
+REPORT_COLUMNS = ['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity']
+SUMMARY_COLUMNS = ['Node Type', 'Reason', 'Severity', 'Count', 'Rows Omitted']
+SUMMARY_SHEET = 'Summary'
+XLSX_FORMAT = 'xlsx'
+TSV_FORMAT = 'tsv'
+XLSX_EXT = '.xlsx'
+TSV_EXT = '.tsv'
+# Max rows of an Excel worksheet, minus header
+XLSX_MAX_ROWS = 1048575
+XLSX_MAX_SHEET_NAME = 31
+# Characters not allowed in Excel sheet names
+XLSX_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+# Sheet names used by the report itself or reserved by Excel, compared case-insensitively like Excel does
+XLSX_RESERVED_SHEETS = {SUMMARY_SHEET.lower(), 'history'}
+
+
+def _group_key(value):
+    # Values used as group keys must be hashable
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return str(value)
+
+
+def _sort_key(key):
+    return tuple('' if item is None else str(item) for item in key)
+
+
+def format_line_numbers(line_numbers):
+    return ','.join(str(line_num) for line_num in sorted(line_numbers))
+
+
+class LineGroups:
+    """
+    Line numbers of violations grouped by a key, like (property, value, reason), so each key is reported once
+    """
+    def __init__(self):
+        self.groups = {}
+
+    def add(self, key, line_num):
+        key = tuple(_group_key(item) for item in key)
+        lines = self.groups.get(key)
+        if lines is None:
+            lines = set()
+            self.groups[key] = lines
+        lines.add(line_num)
+
+    def items(self):
+        """
+        :return: list of (key, line numbers) tuples, sorted by key
+        """
+        return sorted(self.groups.items(), key=lambda item: _sort_key(item[0]))
+
+    def __len__(self):
+        return len(self.groups)
+
+
+class ViolationCollector:
+    """
+    Append-only buffer of validation violations, one list of report rows per sheet (node type).
+    Buffered rows are written to a ReportWriter by flush
+    """
+    def __init__(self):
+        self.sheets = {}
+
+    def add(self, sheet, file_name, prop, reason, severity, value=None, line_numbers=None):
+        rows = self.sheets.get(sheet)
+        if rows is None:
+            rows = []
+            self.sheets[sheet] = rows
+        rows.append((os.path.basename(file_name), prop, value, reason, line_numbers, severity))
+
+    def add_groups(self, sheet, file_name, groups, severity):
+        """
+        Add grouped violations
+        :param sheet: sheet name
+        :param file_name: data file
+        :param groups: LineGroups keyed by (property, value, reason)
+        :param severity: severity of the violations
+        """
+        for (prop, value, reason), line_numbers in groups.items():
+            self.add(sheet, file_name, prop, reason, severity, value, format_line_numbers(line_numbers))
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.sheets.values())
+
+    def clear(self):
+        self.sheets = {}
+
+    def flush(self, writer):
+        """
+        Write buffered violations to a report writer and clear the buffer, so memory used by violations is bounded
+        by rows validated since last flush
+        :param writer: ReportWriter
+        """
+        for sheet, rows in self.sheets.items():
+            for row in rows:
+                writer.write(sheet, row)
+        self.clear()
+
+
+class ReportWriter:
+    """
+    Base class of streaming validation report writers, rows are written as they come, only counts are kept in memory.
+    Each sheet holds at most max_rows rows, rows over the cap are only counted in the summary
+    """
+    def __init__(self, file_name, max_rows=None):
+        self.file_name = file_name
+        self.files = [file_name]
+        self.max_rows = max_rows
+        self.rows_written = {}
+        self.rows_omitted = {}
+        # (sheet, reason, severity) -> count
+        self.summary = {}
+
+    def write(self, sheet, row):
+        summary_key = (sheet, row[3], row[5])
+        self.summary[summary_key] = self.summary.get(summary_key, 0) + 1
+        written = self.rows_written.get(sheet, 0)
+        if self.max_rows is not None and written >= self.max_rows:
+            self.rows_omitted[sheet] = self.rows_omitted.get(sheet, 0) + 1
+            return
+        self._write_row(sheet, written, row)
+        self.rows_written[sheet] = written + 1
+
+    def summary_rows(self):
+        """
+        :return: list of (sheet, reason, severity, count, rows omitted) tuples, rows omitted is reported once per sheet
+        """
+        rows = []
+        reported = set()
+        for (sheet, reason, severity), count in sorted(self.summary.items(), key=lambda item: _sort_key(item[0])):
+            omitted = None
+            if sheet not in reported:
+                omitted = self.rows_omitted.get(sheet, 0)
+                reported.add(sheet)
+            rows.append((sheet, reason, severity, count, omitted))
+        return rows
+
+    def remove(self):
+        """
+        Remove report files, used when validation passed
+        """
+        for file_name in self.files:
+            if os.path.exists(file_name):
+                os.remove(file_name)
+
+    def _write_row(self, sheet, row_num, row):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class XlsxReportWriter(ReportWriter):
+    """
+    Write validation report as an Excel workbook in xlsxwriter constant memory mode, one sheet per node type plus
+    a summary sheet
+    """
+    def __init__(self, file_name, max_rows=None):
+        max_rows = XLSX_MAX_ROWS if max_rows is None else min(max_rows, XLSX_MAX_ROWS)
+        super().__init__(file_name, max_rows)
+        self.workbook = xlsxwriter.Workbook(file_name, {'constant_memory': True})
+        self.worksheets = {}
+        self.sheet_names = set(XLSX_RESERVED_SHEETS)
+
+    def _get_sheet_name(self, sheet):
+        """
+        Get a valid and unique Excel sheet name for a node type, invalid characters are replaced, and names colliding
+        after being cut to 31 characters get a "~N" suffix
+        """
+        name = XLSX_INVALID_SHEET_CHARS.sub('_', str(sheet)).strip("'")[:XLSX_MAX_SHEET_NAME] or 'Sheet'
+        unique_name = name
+        suffix_num = 1
+        while unique_name.lower() in self.sheet_names:
+            suffix_num += 1
+            suffix = '~{}'.format(suffix_num)
+            unique_name = name[:XLSX_MAX_SHEET_NAME - len(suffix)] + suffix
+        self.sheet_names.add(unique_name.lower())
+        return unique_name
+
+    def _get_worksheet(self, sheet):
+        worksheet = self.worksheets.get(sheet)
+        if worksheet is None:
+            worksheet = self.workbook.add_worksheet(self._get_sheet_name(sheet))
+            self._write_cells(worksheet, 0, REPORT_COLUMNS)
+            self.worksheets[sheet] = worksheet
+        return worksheet
+
+    @staticmethod
+    def _write_cells(worksheet, row_num, values):
+        for col_num, value in enumerate(values):
+            if value is None:
+                continue
+            elif isinstance(value, str):
+                # Written as string, so values like "=..." are not treated as formulas
+                worksheet.write_string(row_num, col_num, value)
+            elif isinstance(value, (bool, int, float)):
+                worksheet.write(row_num, col_num, value)
+            else:
+                worksheet.write_string(row_num, col_num, str(value))
+
+    def _write_row(self, sheet, row_num, row):
+        # First row of each sheet is the header
+        self._write_cells(self._get_worksheet(sheet), row_num + 1, row)
+
+    def close(self):
+        summary = self.workbook.add_worksheet(SUMMARY_SHEET)
+        self._write_cells(summary, 0, SUMMARY_COLUMNS)
+        for row_num, row in enumerate(self.summary_rows(), 1):
+            self._write_cells(summary, row_num, row)
+        self.workbook.close()
+
+
+class TsvReportWriter(ReportWriter):
+    """
+    Write validation report as a TSV file with node type in the first column, and summary in a separate TSV file
+    """
+    def __init__(self, file_name, max_rows=None):
+        super().__init__(file_name, max_rows)
+        self.summary_file_name = os.path.splitext(file_name)[0] + '_summary' + TSV_EXT
+        self.files.append(self.summary_file_name)
+        self.out_file = open(file_name, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.out_file, delimiter='\t')
+        self.writer.writerow(['Node Type'] + REPORT_COLUMNS)
+
+    def _write_row(self, sheet, row_num, row):
+        self.writer.writerow((sheet,) + tuple(row))
+
+    def close(self):
+        self.out_file.close()
+        with open(self.summary_file_name, 'w', newline='', encoding='utf-8') as summary_file:
+            writer = csv.writer(summary_file, delimiter='\t')
+            writer.writerow(SUMMARY_COLUMNS)
+            writer.writerows(self.summary_rows())
+
+
+def open_report_writer(report_format, file_prefix, max_rows=None):
+    """
+    Create a streaming validation report writer
+    :param report_format: "xlsx" or "tsv"
+    :param file_prefix: report file path without extension
+    :param max_rows: max number of rows per sheet, None means no limit other than the format's own limit
+    :return: ReportWriter
+    """
+    report_format = (report_format or XLSX_FORMAT).lower()
+    if report_format == XLSX_FORMAT:
+        return XlsxReportWriter(file_prefix + XLSX_EXT, max_rows)
+    elif report_format == TSV_FORMAT:
+        return TsvReportWriter(file_prefix + TSV_EXT, max_rows)
+    else:
+        raise ValueError('Unsupported validation report format: "{}"'.format(report_format))